@@ -17,7 +17,7 @@ const formatDate = (dateString) => {
 };
 
 const Meetings = () => {
-  const { meetings, loading, error, fetchMeetings } = useMeetings();
+  const { meetings, loading, error, fetchMeetings, loadMore, hasMore } = useMeetings();
   const { userProfile } = useAuth();
 
   useEffect(() => {
@@ -55,6 +55,11 @@ const Meetings = () => {
             </li>
           ))}
         </ul>
+        {hasMore && (
+          <button onClick={loadMore} disabled={loading}>
+            {loading ? 'Loading...' : 'Load more meetings'}
+          </button>
+        )}
       </StatusDisplay>
     </div>
   );
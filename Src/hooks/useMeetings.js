@@ -1,17 +1,25 @@
 import { useState, useCallback } from 'react';
 import api from '../api';
 
+// Meetings fetched per request; the API caps page_size at 100.
+const PAGE_SIZE = 50;
+
 export const useMeetings = () => {
   const [meetings, setMeetings] = useState([]);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState(null);
+  const [nextCursor, setNextCursor] = useState(null);
 
-  const fetchMeetings = useCallback(async () => {
+  // Fetches the page after `cursor`, or the first page when it is null.
+  const fetchPage = useCallback(async (cursor) => {
     setLoading(true);
     setError(null);
     try {
-      const response = await api.get('/meetings/');
-      setMeetings(response.data);
+      const params = cursor ? { cursor, page_size: PAGE_SIZE } : { page_size: PAGE_SIZE };
+      const response = await api.get('/meetings/', { params });
+      const { results, next } = response.data;
+      setMeetings((previous) => (cursor ? [...previous, ...results] : results));
+      setNextCursor(next ? new URL(next).searchParams.get('cursor') : null);
     } catch (err) {
       setError('Failed to load meetings.');
       console.error(err);
@@ -20,5 +28,14 @@ export const useMeetings = () => {
     }
   }, []);
 
-  return { meetings, loading, error, fetchMeetings };
-};
\ No newline at end of file
+  // Reloads the first page, dropping any pages loaded before.
+  const fetchMeetings = useCallback(() => fetchPage(null), [fetchPage]);
+
+  const loadMore = useCallback(() => {
+    if (nextCursor) {
+      fetchPage(nextCursor);
+    }
+  }, [fetchPage, nextCursor]);
+
+  return { meetings, loading, error, fetchMeetings, loadMore, hasMore: nextCursor !== null };
+};
@@ -1,8 +1,13 @@
 from django.contrib import admin
 from django.urls import path, include, re_path
 from django.views.generic import TemplateView
+from rest_framework.routers import SimpleRouter
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
-from scheduling.views import ProfileView, health_check
+from scheduling.views import (CommonAvailabilityView, NotificationViewSet, ProfileView, ScheduleJobDetailView,
+                              ScheduleJobListCreateView, health_check)
+
+router = SimpleRouter()
+router.register('notifications', NotificationViewSet, basename='notification')
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -12,7 +17,11 @@ urlpatterns = [
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('api/profile/', ProfileView.as_view(), name='profile'),
     path('api/meetings/', include('scheduling.urls')),
+    path('api/availability/common/<int:user_id>/', CommonAvailabilityView.as_view(), name='common-availability'),
+    path('api/schedule-jobs/', ScheduleJobListCreateView.as_view(), name='schedule-job-list'),
+    path('api/schedule-jobs/<int:pk>/', ScheduleJobDetailView.as_view(), name='schedule-job-detail'),
     path('api/health-check/', health_check, name='health_check'),
+    path('api/', include(router.urls)),
 
     # Frontend Serving
     # This catch-all route serves the React index.html for any non-API, non-admin path.
@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import (Meeting, MeetingFeedback, MeetingRescheduleProposal, Profile, Room, Skill, TimeSlot, UserAvailability)
+from .models import (Meeting, MeetingFeedback, MeetingRescheduleProposal, Profile, Room, ScheduleJob, Skill, TimeSlot,
+                     UserAvailability, UserRatingStats)
 
 
 class UserAvailabilityInline(admin.TabularInline):
@@ -71,5 +72,25 @@ class MeetingFeedbackAdmin(admin.ModelAdmin):
     search_fields = ('meeting__attendee1__username', 'meeting__attendee2__username', 'reviewer__username', 'comments')
     raw_id_fields = ('meeting', 'reviewer')
 
+@admin.register(UserRatingStats)
+class UserRatingStatsAdmin(admin.ModelAdmin):
+    """Read-only view of the ratings each user has received; the feedback signals maintain it."""
+    list_display = ('user', 'count', 'average', 'stars_1', 'stars_2', 'stars_3', 'stars_4', 'stars_5')
+    search_fields = ('user__username',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+@admin.register(ScheduleJob)
+class ScheduleJobAdmin(admin.ModelAdmin):
+    """Admin view for background scheduling jobs."""
+    list_display = ('__str__', 'status', 'requested_by', 'created_at', 'finished_at', 'num_meetings', 'best_objective')
+    list_filter = ('status', 'created_at')
+    raw_id_fields = ('requested_by',)
+    readonly_fields = ('started_at', 'finished_at', 'phase_timings', 'best_objective', 'num_meetings', 'result', 'error')
+
 admin.site.register(Skill)
 admin.site.register(Room)
\ No newline at end of file
@@ -5,4 +5,4 @@ class SchedulingConfig(AppConfig):
     name = 'scheduling'
 
     def ready(self):
-        pass
\ No newline at end of file
+        from . import signals  # noqa: F401  Connects the signal handlers
\ No newline at end of file
@@ -0,0 +1,101 @@
+"""
+Synthetic event generator for scheduler benchmarks.
+
+Fills Skill, Profile, TimeSlot, UserAvailability, Room and the block lists with a
+reproducible random event of the requested size, using bulk inserts so large
+events can be generated quickly. Run it against an empty database (or inside a
+transaction that is rolled back, as the benchmark runner does).
+"""
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from scheduling.models import Profile, Room, Skill, TimeSlot, UserAvailability
+
+User = get_user_model()
+
+
+def zipf_weights(n, exponent):
+    """Probabilities proportional to 1 / rank**exponent for ranks 1..n."""
+    weights = 1.0 / np.arange(1, n + 1) ** exponent
+    return weights / weights.sum()
+
+
+def generate_event(num_people, num_slots, num_rooms, num_skills=50, interests_per_person=3, zipf_exponent=1.1,
+                   availability_density=0.5, block_rate=0.001, mentor_fraction=0.05, mentee_fraction=0.1,
+                   slot_minutes=30, seed=0, prefix='bench'):
+    """
+    Creates a synthetic event and returns a dict with the number of rows created.
+
+    - Interests: each person gets up to `interests_per_person` distinct skills drawn
+      from a Zipf distribution with `zipf_exponent`, so a few skills are very popular.
+    - Availability: each person is free in each slot with probability `availability_density`.
+    - Blocks: each ordered pair of people is blocked with probability `block_rate`.
+    - Roles: `mentor_fraction` and `mentee_fraction` of people are mentors and mentees.
+    """
+    rng = np.random.default_rng(seed)
+    num_skills = max(num_skills, interests_per_person)
+
+    skills = Skill.objects.bulk_create([Skill(name=f'{prefix}_skill_{i}') for i in range(num_skills)])
+    Room.objects.bulk_create([Room(name=f'{prefix}_room_{i}') for i in range(num_rooms)])
+    start = timezone.now().replace(second=0, microsecond=0)
+    slots = TimeSlot.objects.bulk_create([
+        TimeSlot(
+            start_time=start + timezone.timedelta(minutes=slot_minutes * i),
+            end_time=start + timezone.timedelta(minutes=slot_minutes * (i + 1)),
+            description=f'{prefix} slot {i}',
+        )
+        for i in range(num_slots)
+    ])
+
+    # bulk_create skips the post_save signal, so profiles are created explicitly.
+    users = User.objects.bulk_create([User(username=f'{prefix}_user_{i}') for i in range(num_people)])
+    if not users or users[0].pk is None:
+        users = list(User.objects.filter(username__startswith=f'{prefix}_user_').order_by('id'))
+    role_draws = rng.random(num_people)
+    roles = np.where(
+        role_draws < mentor_fraction, Profile.Role.MENTOR,
+        np.where(role_draws < mentor_fraction + mentee_fraction, Profile.Role.MENTEE, Profile.Role.ATTENDEE),
+    )
+    Profile.objects.bulk_create([Profile(user=user, role=str(role)) for user, role in zip(users, roles)])
+    profile_ids = dict(Profile.objects.filter(user__in=users).values_list('user_id', 'id'))
+    profiles = [profile_ids[user.pk] for user in users]
+
+    skill_weights = zipf_weights(num_skills, zipf_exponent)
+    Interest = Profile.interests.through
+    interests = [
+        Interest(profile_id=profile_id, skill_id=skills[skill_idx].pk)
+        for profile_id in profiles
+        for skill_idx in rng.choice(num_skills, size=interests_per_person, replace=False, p=skill_weights)
+    ]
+    Interest.objects.bulk_create(interests, batch_size=5000)
+
+    available = rng.random((num_people, num_slots)) < availability_density
+    availabilities = [
+        UserAvailability(user_id=users[p_idx].pk, time_slot_id=slots[t_idx].pk)
+        for p_idx, t_idx in zip(*np.nonzero(available))
+    ]
+    UserAvailability.objects.bulk_create(availabilities, batch_size=5000)
+
+    # Draw the number of blocks first so the full people x people space is never materialized.
+    num_blocks = rng.binomial(num_people * (num_people - 1), block_rate) if num_people > 1 else 0
+    blocked = set()
+    while len(blocked) < num_blocks:
+        p1_idx, p2_idx = rng.integers(num_people, size=2)
+        if p1_idx != p2_idx:
+            blocked.add((int(p1_idx), int(p2_idx)))
+    Block = Profile.blocked_users.through
+    Block.objects.bulk_create(
+        [Block(from_profile_id=profiles[p1_idx], to_profile_id=profiles[p2_idx]) for p1_idx, p2_idx in blocked],
+        batch_size=5000,
+    )
+
+    return {
+        'people': num_people,
+        'slots': num_slots,
+        'rooms': num_rooms,
+        'skills': num_skills,
+        'interests': len(interests),
+        'availabilities': len(availabilities),
+        'blocks': len(blocked),
+    }
@@ -0,0 +1,152 @@
+"""
+Scheduler benchmark runner.
+
+For each event size in a grid, generates a synthetic event (see `generator`) and
+runs every engine configuration against it, recording the time spent in each
+phase of `solve_meeting_schedule`, the model size, the solver outcome and the
+peak RSS. Each event is generated inside a transaction that is rolled back, so
+the runner leaves the database as it found it.
+
+The result is a JSON-serializable dict; compare the output of two versions to
+spot regressions.
+"""
+
+import datetime
+import platform
+import time
+import django
+import numpy as np
+from django.db import transaction
+from scheduling.intelligent_scheduler import build_scheduling_problem, load_schedule_data
+from scheduling.models import Profile, Room, TimeSlot
+from scheduling.scheduler_engines import get_engine
+from scheduling.scheduler_model import SolverOptions, cp_model
+from scheduling.scheduler_stats import children_peak_rss_kb, peak_rss_kb
+from .generator import generate_event
+
+# Event sizes, smallest first: peak RSS only ever grows during a run.
+DEFAULT_SIZES = [
+    {'num_people': 50, 'num_slots': 4, 'num_rooms': 5},
+    {'num_people': 200, 'num_slots': 8, 'num_rooms': 10},
+    {'num_people': 1000, 'num_slots': 12, 'num_rooms': 30},
+]
+
+# Engine configurations: 'name' labels the run, 'max_people' skips it on larger events
+# and the rest is passed to get_engine.
+DEFAULT_ENGINES = [
+    # The pair x slot x room model has num_rooms times the two-stage variables: at
+    # 1000 people, 12 slots and 30 rooms that is tens of millions of booleans.
+    {'name': 'cpsat', 'engine': 'cpsat', 'max_people': 200},
+    {'name': 'cpsat-two-stage', 'engine': 'cpsat', 'two_stage': True},
+    {'name': 'matching', 'engine': 'matching'},
+    {'name': 'tiered', 'engine': 'tiered'},
+]
+
+
+def run_benchmarks(sizes=None, engines=None, generator_options=None, max_time_in_seconds=60, top_k=None,
+                   label=None, progress=None):
+    """
+    Runs every engine configuration against every event size and returns
+    {'metadata': {...}, 'results': [...]}, with one result per (size, engine).
+
+    `generator_options` are passed to `generate_event` for every size, and
+    `max_time_in_seconds` caps each CP-SAT solve. With `top_k` the candidates
+    are pruned with `find_top_k_candidates` before modelling. `progress`, if
+    given, is called with each result as soon as it is recorded.
+
+    Raises RuntimeError if the database already holds an event, since the
+    generated one would be mixed with it.
+    """
+    if TimeSlot.objects.exists() or Room.objects.exists() or Profile.objects.exists():
+        raise RuntimeError("The benchmarks need an empty database; found existing time slots, rooms or profiles.")
+    sizes = DEFAULT_SIZES if sizes is None else sizes
+    engines = DEFAULT_ENGINES if engines is None else engines
+    generator_options = generator_options or {}
+
+    results = []
+    for size in sizes:
+        with transaction.atomic():
+            results.extend(_run_size(size, engines, generator_options, max_time_in_seconds, top_k, progress))
+            transaction.set_rollback(True)
+
+    return {
+        'metadata': {
+            'label': label,
+            'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'django': django.get_version(),
+            'numpy': np.__version__,
+            'ortools': _ortools_version(),
+            'generator_options': generator_options,
+            'max_time_in_seconds': max_time_in_seconds,
+            'top_k': top_k,
+        },
+        'results': results,
+    }
+
+
+def _run_size(size, engines, generator_options, max_time_in_seconds, top_k, progress):
+    """Generates one event and runs every engine configuration against it."""
+    started = time.perf_counter()
+    counts = generate_event(**dict(generator_options, **size))
+    generate_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    data = load_schedule_data(load_previous=False)
+    load_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    problem = build_scheduling_problem(data, warm_start=False, top_k=top_k)
+    candidates_time = time.perf_counter() - started
+
+    results = []
+    for config in engines:
+        options = {key: value for key, value in config.items() if key not in ('name', 'engine', 'max_people')}
+        result = {
+            'size': size,
+            'engine': config['name'],
+            'rows': counts,
+            'num_candidates': len(problem.candidates),
+            'generate_time': generate_time,
+            'load_time': load_time,
+            'candidates_time': candidates_time,
+        }
+        if config['engine'] != 'matching' and cp_model is None:
+            result['skipped'] = 'OR-Tools is not installed'
+        elif size['num_people'] > config.get('max_people', size['num_people']):
+            result['skipped'] = f"more than {config['max_people']} people"
+        else:
+            engine = get_engine(
+                config['engine'], solver_options=SolverOptions(max_time_in_seconds=max_time_in_seconds), **options
+            )
+            selected = engine.schedule(problem)
+            stats = engine.last_stats
+            result.update(
+                build_time=stats['build_time'],
+                solve_time=stats['solve_time'],
+                num_variables=stats['num_variables'],
+                num_constraints=stats['num_constraints'],
+                status=stats['status'],
+                objective=stats['objective'],
+                best_bound=stats['best_bound'],
+                num_conflicts=stats['num_conflicts'],
+                num_branches=stats['num_branches'],
+                num_meetings=len(selected) if selected is not None else 0,
+            )
+            if 'tiers' in stats:
+                result['tiers'] = stats['tiers']
+        result['peak_rss_kb'] = peak_rss_kb()
+        result['children_peak_rss_kb'] = children_peak_rss_kb()
+        results.append(result)
+        if progress is not None:
+            progress(result)
+    return results
+
+
+def _ortools_version():
+    try:
+        import ortools
+    except ImportError:
+        return None
+    return ortools.__version__
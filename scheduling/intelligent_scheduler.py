@@ -4,21 +4,96 @@ A simplified example of an intelligent meeting scheduler using Google OR-Tools.
 This script models the problem of scheduling 1-on-1 meetings between attendees
 at a conference based on shared interests to maximize attendee satisfaction.
 
-To run this, you'll need to install Google's OR-Tools:
-pip install ortools
+To run this, you'll need to install Google's OR-Tools (which also brings in NumPy):
+pip install ortools numpy
+
+Only the "cpsat" and "auto" engines use OR-Tools; the "matching" engine just needs NumPy.
 """
 
 import collections
-from ortools.sat.python import cp_model
+import contextlib
+import itertools
+import logging
+import os
+from dataclasses import dataclass
+import numpy as np
 
 # Django-specific imports. This script must now be run within the Django context.
 from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
 from django.db.models import Avg, Q
-from .models import (Meeting, MeetingFeedback, Profile, Room, TimeSlot)
-from .utils import calculate_average_ratings_for_users
+from django.utils import timezone
+from .models import (Meeting, MeetingFeedback, Notification, Profile, Room, TimeSlot, UserAvailability)
+from .scheduler_engines import SchedulingProblem, get_engine
+from .scheduler_model import (SlotOverlapIndex, SolverOptions, conflict_groups, cp_model, find_candidate_pairs,
+                              mask_to_slots, slots_to_mask, solve_component)
+from .scheduler_stats import PROFILE_ENV_VAR, ScheduleStats, children_peak_rss_kb, peak_rss_kb, profiled
+from .utils import calculate_average_ratings_for_users, load_slot_overlaps, notify_many
 
 User = get_user_model()
 
+logger = logging.getLogger(__name__)
+
+# Objective bonus (in the solver's x10 score units) for keeping a meeting from the
+# persisted schedule when solving with keep_stable=True, i.e. half a score point.
+KEEP_STABLE_BONUS = 5
+
+# Time limit in seconds for the CP-SAT solve in repair_schedule, which runs inside API requests.
+REPAIR_TIME_LIMIT = 0.5
+
+# Candidate pairs repair_schedule models per freed room, best-scoring first.
+REPAIR_PAIRS_PER_ROOM = 20
+
+# Rows fetched per round trip when streaming the event with QuerySet.iterator().
+ITERATOR_CHUNK_SIZE = 10000
+
+@dataclass
+class ScheduleData:
+    """
+    The event as loaded from the database (see `load_schedule_data`), as flat NumPy
+    arrays indexed by solver index. Interests and availability are CSR adjacency
+    lists: person p's entries are indices[indptr[p]:indptr[p + 1]], sorted.
+    """
+    # Database ids (int64), indexed by solver index.
+    person_ids: np.ndarray
+    slot_ids: np.ndarray
+    room_ids: np.ndarray
+    # Per person: Profile.Role value and average rating received.
+    roles: np.ndarray
+    ratings: np.ndarray
+    # CSR person -> skill index (skills are numbered 0..num_skills-1, int32)
+    interest_indptr: np.ndarray
+    interest_indices: np.ndarray
+    # CSR person -> slot index (int32)
+    availability_indptr: np.ndarray
+    availability_indices: np.ndarray
+    # int32 edge list of shape (num_blocks, 2), one row per blocked pair with p1_idx < p2_idx
+    blocked_pairs: np.ndarray
+    # The persisted schedule as {(p1_idx, p2_idx, t_idx): r_idx}
+    previous_meetings: dict
+    # SlotOverlapIndex over slot indices: a person can only be in one slot of each of its groups
+    slot_overlaps: SlotOverlapIndex = None
+
+    @property
+    def num_people(self):
+        return len(self.person_ids)
+
+    @property
+    def num_slots(self):
+        return len(self.slot_ids)
+
+    @property
+    def num_rooms(self):
+        return len(self.room_ids)
+
+    def availability_lists(self):
+        """The slot indices each person is free in, as a list of lists."""
+        return [slots.tolist() for slots in np.split(self.availability_indices, self.availability_indptr[1:-1])]
+
+    def availability_masks(self):
+        """Each person's availability as a bitmask with bit t set if they are free in slot t."""
+        return [slots_to_mask(slots) for slots in self.availability_lists()]
+
 def calculate_interest_score(person1_data, person2_data):
     """
     Calculates a score based on shared interests, special roles, and past feedback.
@@ -46,167 +121,729 @@ def calculate_interest_score(person1_data, person2_data):
 
     return base_score + role_bonus + feedback_bonus
 
-def solve_meeting_schedule():
-    """Creates and solves the meeting scheduling model using data from the database."""
-    # 1. Fetch real data from Django models
-
-    # Get all relevant objects and create mappings from DB ID -> solver index
-    all_time_slots = list(TimeSlot.objects.all())
-    slot_map = {slot.id: i for i, slot in enumerate(all_time_slots)}
-
-    all_rooms = list(Room.objects.all())
-    room_map = {room.id: i for i, room in enumerate(all_rooms)}
-
-    all_users_with_profiles_qs = User.objects.filter(profile__isnull=False)
-    all_user_ids = [u.id for u in all_users_with_profiles_qs]
-
-    # Use the new utility function to get average ratings
-    avg_ratings_received = calculate_average_ratings_for_users(all_user_ids)
-
-    # Fetch users who have marked availability and have a profile with interests
-    all_people_qs = User.objects.filter(
-        available_slots__isnull=False, profile__isnull=False
-    ).prefetch_related(
-        'profile__interests', 'available_slots', 'profile__blocked_users', 'profile__blocked_by'
-    ).distinct()
-    all_people = list(all_people_qs)
-    people_map = {person.id: i for i, person in enumerate(all_people)}
-
-    # Structure the data into a format the solver can use
-    attendees_data = collections.defaultdict(dict)
-    for person in all_people:
-        person_idx = people_map[person.id]
-        interests = [interest.name for interest in person.profile.interests.all()]
-        availability = [slot_map[slot.id] for slot in person.available_slots.all() if slot.id in slot_map]
-        attendees_data[person_idx]['interests'] = interests
-        attendees_data[person_idx]['availability'] = availability
-        attendees_data[person_idx]['role'] = person.profile.role
-        attendees_data[person_idx]['avg_rating_received'] = avg_ratings_received.get(person.id, 3.0)
-
-    num_people = len(all_people)
-    num_slots = len(all_time_slots)
-    num_rooms = len(all_rooms)
-
-    # Create a set of blocked pairs (p1_idx, p2_idx) where p1_idx < p2_idx
-    blocked_pairs = set()
-    for person in all_people:
-        p1_idx = people_map[person.id]
-        # People this person has blocked
-        for blocked_profile in person.profile.blocked_users.all():
-            if blocked_profile.user_id in people_map:
-                p2_idx = people_map[blocked_profile.user_id]
-                blocked_pairs.add(tuple(sorted((p1_idx, p2_idx))))
-        # People who have blocked this person
-        for blocking_profile in person.profile.blocked_by.all():
-            if blocking_profile.user_id in people_map:
-                p2_idx = people_map[blocking_profile.user_id]
-                blocked_pairs.add(tuple(sorted((p1_idx, p2_idx))))
-
-    if num_people < 2 or num_slots == 0 or num_rooms == 0:
+def build_score_matrix(interest_indptr, interest_indices, roles, ratings):
+    """
+    Batched version of `calculate_interest_score` for every pair of attendees,
+    computed from ScheduleData's arrays: the CSR person -> skill index lists, the
+    Profile.Role of each person and the average rating each has received.
+
+    Interests are expanded into a skill x person incidence matrix, so shared-interest
+    counts for all pairs come from a single matrix product; the role and feedback
+    bonuses are computed from the per-person arrays. Returns a num_people x num_people
+    float array whose upper triangle (p1_idx < p2_idx) holds the pair scores and
+    is zero elsewhere. The values are identical to `calculate_interest_score`,
+    which remains the reference implementation.
+    """
+    num_people = len(interest_indptr) - 1
+    people = np.repeat(np.arange(num_people), np.diff(interest_indptr))
+    num_skills = int(interest_indices.max()) + 1 if len(interest_indices) else 0
+    # Floating point so the product below runs through BLAS; the counts stay exact.
+    incidence = np.zeros((num_skills, num_people), dtype=np.float64)
+    incidence[interest_indices, people] = 1
+
+    # Base score from shared interests
+    base_score = incidence.T @ incidence
+
+    # Role-based bonus score
+    roles = np.asarray(roles)
+    is_mentor = roles == Profile.Role.MENTOR.value
+    is_mentee = roles == Profile.Role.MENTEE.value
+    role_bonus = 50 * (np.outer(is_mentor, is_mentee) | np.outer(is_mentee, is_mentor))
+
+    # Feedback-based bonus: the average of both attendees' received ratings
+    ratings = np.asarray(ratings, dtype=np.float64)
+    feedback_bonus = (ratings[:, np.newaxis] + ratings[np.newaxis, :]) / 2
+
+    return np.triu(base_score + role_bonus + feedback_bonus, k=1)
+
+def solve_meeting_schedule(two_stage=False, warm_start=True, keep_stable=False, decompose=False, max_workers=None,
+                           engine='cpsat', max_time_in_seconds=None, num_search_workers=None,
+                           relative_gap_limit=None, random_seed=None, on_solution=None, top_k=None, stats=None,
+                           profile_path=None, on_progress=None):
+    """
+    Creates and solves the meeting scheduling model using data from the database.
+
+    `engine` selects the backend (see `scheduler_engines`): "cpsat" for the exact
+    CP-SAT model, "matching" for the fast greedy heuristic that needs no OR-Tools,
+    "auto" to seed CP-SAT with the heuristic and fall back to the heuristic alone
+    on problems too large for CP-SAT, or "tiered" to schedule the mentor-mentee
+    pairs first and fill the remaining capacity with everyone else in a second
+    CP-SAT pass. A SchedulingEngine instance is also accepted.
+
+    With `two_stage=True` the solver only decides which pairs meet in which slot,
+    subject to a per-slot room capacity, and rooms are assigned afterwards. Rooms
+    are interchangeable, so this gives the same schedule quality with far fewer
+    variables and no room symmetry to search through.
+
+    With `warm_start=True` the currently persisted meetings are passed to the solver
+    as hints, so re-runs after small edits start from the previous schedule. With
+    `keep_stable=True` each persisted meeting also earns KEEP_STABLE_BONUS when it
+    is kept, so attendees' schedules only change when it is worth it.
+
+    With `decompose=True` the problem is split into the connected components of the
+    feasible-pair graph, with each slot's rooms divided between them up front, and
+    the components are solved in parallel across up to `max_workers` processes
+    using the two-stage formulation. A per-component report is logged.
+
+    `max_time_in_seconds`, `num_search_workers`, `relative_gap_limit` and
+    `random_seed` are passed to CP-SAT (see SolverOptions); without a time limit a
+    large event can keep the solver busy for a very long time.
+
+    `on_solution`, if given, is called with a dict for every improving schedule found
+    during the search: 'meetings' (in the same format as the return value),
+    'objective' and 'best_bound' (in the solver's x10 score units; the bound is None
+    for the heuristic) and 'elapsed' seconds. Use it to persist the best schedule
+    so far during long solves; returning a truthy value stops the search early.
+    `on_progress` is the same without 'meetings', for callers that only track the
+    objective: the schedule is then never built until the search ends.
+
+    With `top_k` set, only each attendee's top_k partners by score (plus every
+    mentor-mentee pair) are modelled, see `find_top_k_candidates`. This keeps very
+    large events tractable at the cost of possibly missing a slightly better schedule.
+
+    The two_stage, decompose, max_workers and solver options only apply to CP-SAT.
+
+    Every run is instrumented: pass a ScheduleStats as `stats` to get the phase
+    timings, problem and model sizes, solver statistics and peak memory back (see
+    `scheduler_stats`); they are also logged. With `profile_path`, or the
+    SCHEDULER_PROFILE environment variable, set to a path prefix the run is
+    profiled with cProfile and tracemalloc and the dumps are written next to it.
+    """
+    solver_options = SolverOptions(
+        max_time_in_seconds=max_time_in_seconds,
+        num_search_workers=num_search_workers,
+        relative_gap_limit=relative_gap_limit,
+        random_seed=random_seed,
+    )
+    engine = get_engine(
+        engine, two_stage=two_stage, decompose=decompose, max_workers=max_workers, solver_options=solver_options
+    )
+    stats = ScheduleStats() if stats is None else stats
+    profile_path = profile_path or os.environ.get(PROFILE_ENV_VAR)
+
+    with profiled(profile_path, stats) if profile_path else contextlib.nullcontext():
+        result = _solve(engine, stats, warm_start, keep_stable, top_k, on_solution, on_progress)
+
+    stats.num_meetings = len(result)
+    stats.peak_rss_kb = peak_rss_kb()
+    stats.children_peak_rss_kb = children_peak_rss_kb()
+    logger.info("Scheduler run: %s", stats.as_dict())
+    return result
+
+def _solve(engine, stats, warm_start, keep_stable, top_k, on_solution, on_progress):
+    """The phases of `solve_meeting_schedule`, each timed into `stats`."""
+    # 1. Load the event from the database.
+    with stats.phase('load'):
+        data = load_schedule_data(load_previous=warm_start or keep_stable)
+    stats.num_people, stats.num_slots, stats.num_rooms = data.num_people, data.num_slots, data.num_rooms
+    if data.num_people < 2 or data.num_slots == 0 or data.num_rooms == 0:
+        return []
+
+    # 2. Find the candidate pairs.
+    with stats.phase('candidates'):
+        problem = build_scheduling_problem(data, warm_start=warm_start, keep_stable=keep_stable, top_k=top_k)
+    stats.num_candidates = len(problem.candidates)
+
+    # 3. Build and solve the model with the selected engine
+    # Users, slots and rooms already fetched for the meeting dicts, shared by every call.
+    instances = {}
+    report_solution = None
+    if on_solution is not None:
+        def report_solution(selected, objective, best_bound, elapsed):
+            return on_solution({
+                'meetings': to_meeting_info(data, problem, selected, instances),
+                'objective': objective,
+                'best_bound': best_bound,
+                'elapsed': elapsed,
+            })
+
+    report_progress = None
+    if on_progress is not None:
+        def report_progress(objective, best_bound, elapsed):
+            return on_progress({'objective': objective, 'best_bound': best_bound, 'elapsed': elapsed})
+
+    with stats.phase('solve'):
+        selected = engine.schedule(problem, on_solution=report_solution, on_progress=report_progress)
+    stats.record_engine(engine.last_stats)
+    if selected is None:
         return []
-    
-    # 2. Create the CP-SAT model
-    model = cp_model.CpModel()
-
-    # 3. Create the variables
-    # meet[p1, p2, t, r] is true if p1 and p2 meet at time t in room r.
-    meet = {}
-    for p1_idx in range(num_people):
-        for p2_idx in range(p1_idx + 1, num_people):
-            for t_idx in range(num_slots):
-                for r_idx in range(num_rooms):
-                    meet[p1_idx, p2_idx, t_idx, r_idx] = model.NewBoolVar(
-                        f'meet_{p1_idx}_{p2_idx}_{t_idx}_{r_idx}'
-                    )
-
-    # 4. Add Constraints
-    # Constraint: A person can have at most one meeting per time slot.
+
+    # 4. Process and return the solution as a list of dictionaries
+    with stats.phase('extract'):
+        return to_meeting_info(data, problem, selected, instances)
+
+def load_schedule_data(load_previous=True, user_ids=None):
+    """
+    Phase 1 of the scheduler: fetches the event from the database as flat arrays in
+    solver indices (see ScheduleData). Every table is read with values_list and
+    streamed with iterator(), so no model instances are built. With `load_previous`
+    the persisted schedule is loaded too.
+
+    The attendees are the users with a profile who have marked availability,
+    ordered by user id. `user_ids` restricts them to the given users, e.g. the
+    neighbourhood of a local repair, and only their rows are read.
+    """
+    slots = list(TimeSlot.objects.values_list('id', 'start_time', 'end_time'))
+    slot_ids = np.array([slot_id for slot_id, _, _ in slots], dtype=np.int64)
+    slot_overlaps = SlotOverlapIndex((t_idx, start, end) for t_idx, (_, start, end) in enumerate(slots))
+    room_ids = np.fromiter(Room.objects.values_list('id', flat=True), dtype=np.int64)
+
+    profiles = Profile.objects.filter(user__available_slots__isnull=False)
+    if user_ids is not None:
+        profiles = profiles.filter(user_id__in=user_ids)
+    people = list(profiles.values_list('user_id', 'id', 'role').distinct().order_by('user_id'))
+    person_ids = np.array([user_id for user_id, _, _ in people], dtype=np.int64)
+    profile_ids = np.array([profile_id for _, profile_id, _ in people], dtype=np.int64)
+    roles = np.array([role for _, _, role in people], dtype=str)
+    num_people = len(people)
+
+    avg_ratings_received = calculate_average_ratings_for_users(profiles.values_list('user_id', flat=True))
+    ratings = np.array([avg_ratings_received.get(user_id, 3.0) for user_id in person_ids.tolist()], dtype=np.float64)
+
+    # Interests, with skill ids renumbered 0..num_skills-1
+    interest_rows = Profile.interests.through.objects.all()
+    if user_ids is not None:
+        interest_rows = interest_rows.filter(profile_id__in=profile_ids.tolist())
+    profile_col, skill_col = _fetch_columns(interest_rows.values_list('profile_id', 'skill_id'), 2)
+    p_idx, found = _lookup(profile_ids, profile_col)
+    skill_idx = np.unique(skill_col[found], return_inverse=True)[1].reshape(-1)
+    interest_indptr, interest_indices = _csr(p_idx[found], skill_idx, num_people)
+
+    # Availability
+    availability_rows = UserAvailability.objects.all()
+    if user_ids is not None:
+        availability_rows = availability_rows.filter(user_id__in=person_ids.tolist())
+    user_col, slot_col = _fetch_columns(availability_rows.values_list('user_id', 'time_slot_id'), 2)
+    p_idx, person_found = _lookup(person_ids, user_col)
+    t_idx, slot_found = _lookup(slot_ids, slot_col)
+    found = person_found & slot_found
+    availability_indptr, availability_indices = _csr(p_idx[found], t_idx[found], num_people)
+
+    # Blocks in either direction, as unique (p1_idx, p2_idx) rows with p1_idx < p2_idx
+    block_rows = Profile.blocked_users.through.objects.all()
+    if user_ids is not None:
+        # Rows pointing outside the group are dropped below; one IN list is much cheaper than two.
+        block_rows = block_rows.filter(from_profile_id__in=profile_ids.tolist())
+    from_col, to_col = _fetch_columns(block_rows.values_list('from_profile_id', 'to_profile_id'), 2)
+    p1_idx, p1_found = _lookup(profile_ids, from_col)
+    p2_idx, p2_found = _lookup(profile_ids, to_col)
+    found = p1_found & p2_found & (p1_idx != p2_idx)
+    blocked_pairs = np.unique(
+        np.sort(np.stack([p1_idx[found], p2_idx[found]], axis=1), axis=1), axis=0
+    ).astype(np.int32).reshape(-1, 2)
+
+    # Load the persisted schedule as solver keys, skipping meetings whose people,
+    # slot or room are no longer part of the problem.
+    previous_meetings = {}
+    if load_previous:
+        a1_col, a2_col, slot_col, room_col = _fetch_columns(
+            Meeting.objects.values_list('attendee1_id', 'attendee2_id', 'time_slot_id', 'room_id'), 4
+        )
+        p1_idx, p1_found = _lookup(person_ids, a1_col)
+        p2_idx, p2_found = _lookup(person_ids, a2_col)
+        t_idx, slot_found = _lookup(slot_ids, slot_col)
+        r_idx, room_found = _lookup(room_ids, room_col)
+        found = p1_found & p2_found & slot_found & room_found
+        for p1, p2, t, r in zip(*(column[found].tolist() for column in (p1_idx, p2_idx, t_idx, r_idx))):
+            previous_meetings[min(p1, p2), max(p1, p2), t] = r
+
+    return ScheduleData(
+        person_ids=person_ids,
+        slot_ids=slot_ids,
+        room_ids=room_ids,
+        roles=roles,
+        ratings=ratings,
+        interest_indptr=interest_indptr,
+        interest_indices=interest_indices,
+        availability_indptr=availability_indptr,
+        availability_indices=availability_indices,
+        blocked_pairs=blocked_pairs,
+        previous_meetings=previous_meetings,
+        slot_overlaps=slot_overlaps,
+    )
+
+def _fetch_columns(queryset, num_columns):
+    """
+    Streams an integer values_list queryset into int64 arrays, one per column,
+    without building a list of row tuples.
+    """
+    values = np.fromiter(
+        itertools.chain.from_iterable(queryset.iterator(chunk_size=ITERATOR_CHUNK_SIZE)), dtype=np.int64
+    )
+    return values.reshape(-1, num_columns).T
+
+def _lookup(ids, values):
+    """
+    Maps database ids to solver indices: returns the position of each of `values`
+    in `ids` and a boolean array telling which values were found at all.
+    """
+    if len(ids) == 0:
+        return np.zeros(len(values), dtype=np.int32), np.zeros(len(values), dtype=bool)
+    order = np.argsort(ids, kind='stable')
+    positions = np.minimum(np.searchsorted(ids[order], values), len(ids) - 1)
+    return order[positions].astype(np.int32), ids[order][positions] == values
+
+def _csr(rows, cols, num_rows):
+    """Packs (row, col) pairs into CSR (indptr, indices) arrays, with each row's columns sorted."""
+    order = np.lexsort((cols, rows))
+    indptr = np.zeros(num_rows + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=num_rows), out=indptr[1:])
+    return indptr, np.asarray(cols)[order].astype(np.int32)
+
+def build_scheduling_problem(data, warm_start=True, keep_stable=False, top_k=None):
+    """
+    Scores every pair and keeps the candidates the engines can schedule: pairs that
+    share availability, are not blocked and have a positive score. Variables are
+    only ever created for these, instead of for every (p1, p2, t, r).
+
+    With `top_k` the candidates come from `find_top_k_candidates` instead, which
+    never scores the full pair space. Mentor-mentee candidates are marked as the
+    problem's priority pairs, for the tiered engine.
+    """
+    if top_k is not None:
+        candidates, scores = find_top_k_candidates(data, top_k)
+    else:
+        scores = build_score_matrix(data.interest_indptr, data.interest_indices, data.roles, data.ratings)
+        candidates = find_candidate_pairs(
+            data.availability_masks(),
+            set(map(tuple, data.blocked_pairs.tolist())),
+            scores,
+        )
+    is_mentor = data.roles == Profile.Role.MENTOR.value
+    is_mentee = data.roles == Profile.Role.MENTEE.value
+    priority_pairs = {
+        (p1_idx, p2_idx) for p1_idx, p2_idx, _, _ in candidates
+        if (is_mentor[p1_idx] and is_mentee[p2_idx]) or (is_mentee[p1_idx] and is_mentor[p2_idx])
+    }
+    return SchedulingProblem(
+        candidates=candidates,
+        num_rooms=data.num_rooms,
+        previous_meetings=data.previous_meetings,
+        warm_start=warm_start,
+        stability_bonus=KEEP_STABLE_BONUS if keep_stable else 0,
+        scores=scores,
+        slot_overlaps=data.slot_overlaps,
+        priority_pairs=priority_pairs,
+    )
+
+def find_top_k_candidates(data, k):
+    """
+    Candidate generation for very large events. Each attendee's potential partners
+    are found through an inverted skill -> people index, so only pairs sharing at
+    least one interest are ever looked at, and of those only each attendee's `k`
+    best-scoring feasible partners are kept. Every feasible mentor-mentee pair is
+    kept as well, whatever its rank.
+
+    Pairs with no shared interest score little more than the feedback bonus and are
+    dropped, apart from mentor-mentee pairs. Returns a (candidates, scores) tuple in
+    the same formats as `find_candidate_pairs` and `build_score_matrix`, except that
+    scores is a {(p1_idx, p2_idx): score} dict holding only the kept pairs.
+    """
+    if k < 1:
+        raise ValueError("top_k must be at least 1.")
+    num_people = data.num_people
+    is_mentor = data.roles == Profile.Role.MENTOR.value
+    is_mentee = data.roles == Profile.Role.MENTEE.value
+    available = np.zeros((num_people, data.num_slots), dtype=bool)
+    available[np.repeat(np.arange(num_people), np.diff(data.availability_indptr)), data.availability_indices] = True
+    blocked_with = collections.defaultdict(list)
+    for p1_idx, p2_idx in data.blocked_pairs.tolist():
+        blocked_with[p1_idx].append(p2_idx)
+        blocked_with[p2_idx].append(p1_idx)
+
+    def feasible_partners(p_idx, partners):
+        """Mask of partners who share a slot with p_idx and are not blocked either way."""
+        feasible = (partners != p_idx) & (available[partners] & available[p_idx]).any(axis=1)
+        if p_idx in blocked_with:
+            feasible &= ~np.isin(partners, blocked_with[p_idx])
+        return feasible
+
+    # Inverted index: the people interested in each skill, in CSR form
+    interest_people = np.repeat(np.arange(num_people, dtype=np.int32), np.diff(data.interest_indptr))
+    num_skills = int(data.interest_indices.max()) + 1 if len(data.interest_indices) else 0
+    skill_indptr, skill_people = _csr(data.interest_indices, interest_people, num_skills)
+
+    def interests(p_idx):
+        return data.interest_indices[data.interest_indptr[p_idx]:data.interest_indptr[p_idx + 1]]
+
+    kept = set()
     for p_idx in range(num_people):
-        for t_idx in range(num_slots):
-            meetings_at_t = []
-            for r_idx in range(num_rooms):
-                # Meetings where p_idx is the first person
-                for p2_idx in range(p_idx + 1, num_people):
-                    meetings_at_t.append(meet[p_idx, p2_idx, t_idx, r_idx])
-                # Meetings where p_idx is the second person
-                for p1_idx in range(p_idx):
-                    meetings_at_t.append(meet[p1_idx, p_idx, t_idx, r_idx])
-            model.AddAtMostOne(meetings_at_t)
-
-    # NEW Constraint: A room can host at most one meeting per time slot.
-    for r_idx in range(num_rooms):
-        for t_idx in range(num_slots):
-            meetings_in_room_at_t = []
-            for p1_idx in range(num_people):
-                for p2_idx in range(p1_idx + 1, num_people):
-                    meetings_in_room_at_t.append(meet[p1_idx, p2_idx, t_idx, r_idx])
-            model.AddAtMostOne(meetings_in_room_at_t)
-
-    # Constraint: Do not schedule meetings between blocked pairs.
-    for p1_idx, p2_idx in blocked_pairs:
-        for t_idx in range(num_slots):
-            for r_idx in range(num_rooms):
-                model.Add(meet[p1_idx, p2_idx, t_idx, r_idx] == 0)
-
-    # Constraint: A meeting can only happen if both people are available.
-    for p1_idx in range(num_people):
-        for p2_idx in range(p1_idx + 1, num_people):
-            for t_idx in range(num_slots):
-                # Check if this time slot index is in both persons' availability list
-                if t_idx not in attendees_data[p1_idx]['availability'] or t_idx not in attendees_data[p2_idx]['availability']:
-                    for r_idx in range(num_rooms):
-                        model.Add(meet[p1_idx, p2_idx, t_idx, r_idx] == 0)
-
-    # 5. Define the Objective Function
-    # We want to maximize the total interest score of all scheduled meetings.
-    total_interest_score = 0
-    for p1_idx in range(num_people):
-        for p2_idx in range(p1_idx + 1, num_people):
-            score = calculate_interest_score(
-                attendees_data[p1_idx],
-                attendees_data[p2_idx]
-            )
-            # Scale score by 10 and convert to integer for the CP-SAT solver, which prefers integers.
-            integer_score = int(score * 10)
-            if integer_score > 0:
-                for t_idx in range(num_slots):
-                    for r_idx in range(num_rooms):
-                        total_interest_score += meet[p1_idx, p2_idx, t_idx, r_idx] * integer_score
-    
-    model.Maximize(total_interest_score)
-
-    # 6. Solve the model
-    solver = cp_model.CpSolver()
-    status = solver.Solve(model)
-
-    # 7. Process and return the solution as a list of dictionaries
-    if status == cp_model.OPTIMAL or status == cp_model.FEASIBLE:
-        # Create reverse maps to get model objects from solver indices
-        people_rev_map = {i: person for person, i in people_map.items()}
-        slot_rev_map = {i: slot for slot, i in slot_map.items()}
-        room_rev_map = {i: room for room, i in room_map.items()}
-
-        scheduled_meetings = []
-        for t_idx in range(num_slots):
-            for r_idx in range(num_rooms):
-                for p1_idx in range(num_people):
-                    for p2_idx in range(p1_idx + 1, num_people):
-                        if solver.Value(meet[p1_idx, p2_idx, t_idx, r_idx]) == 1:
-                            p1_obj = people_rev_map[p1_idx]
-                            p2_obj = people_rev_map[p2_idx]
-                            slot_obj = slot_rev_map[t_idx]
-                            room_obj = room_rev_map[r_idx]
-                            
-                            score = calculate_interest_score(
-                                attendees_data[p1_idx],
-                                attendees_data[p2_idx]
-                            )
-                            
-                            meeting_info = {
-                                'attendee1': p1_obj, 'attendee2': p2_obj,
-                                'time_slot': slot_obj, 'room': room_obj, 'score': score
-                            }
-                            scheduled_meetings.append(meeting_info)
-        return scheduled_meetings
+        skills = interests(p_idx)
+        if len(skills) == 0:
+            continue
+        partners, shared = np.unique(
+            np.concatenate([skill_people[skill_indptr[s_idx]:skill_indptr[s_idx + 1]] for s_idx in skills]),
+            return_counts=True,
+        )
+        feasible = feasible_partners(p_idx, partners)
+        partners, shared = partners[feasible], shared[feasible]
+        if len(partners) > k:
+            role_bonus = 50 * ((is_mentor[p_idx] & is_mentee[partners]) | (is_mentee[p_idx] & is_mentor[partners]))
+            scores = shared + role_bonus + (data.ratings[p_idx] + data.ratings[partners]) / 2
+            partners = partners[np.argpartition(-scores, k - 1)[:k]]
+        kept.update((min(p_idx, q_idx), max(p_idx, q_idx)) for q_idx in partners.tolist())
+
+    mentees = np.flatnonzero(is_mentee)
+    for p_idx in np.flatnonzero(is_mentor).tolist():
+        partners = mentees[feasible_partners(p_idx, mentees)]
+        kept.update((min(p_idx, q_idx), max(p_idx, q_idx)) for q_idx in partners.tolist())
+
+    masks = data.availability_masks()
+    candidates, scores = [], {}
+    for p1_idx, p2_idx in sorted(kept):
+        role_bonus = 50 if (is_mentor[p1_idx] and is_mentee[p2_idx]) or (is_mentee[p1_idx] and is_mentor[p2_idx]) else 0
+        score = (
+            len(np.intersect1d(interests(p1_idx), interests(p2_idx), assume_unique=True)) + role_bonus
+            + (data.ratings[p1_idx] + data.ratings[p2_idx]) / 2
+        )
+        # Scale score by 10 and convert to integer for the CP-SAT solver, which prefers integers.
+        integer_score = int(score * 10)
+        if integer_score > 0:
+            scores[p1_idx, p2_idx] = float(score)
+            candidates.append((p1_idx, p2_idx, integer_score, mask_to_slots(masks[p1_idx] & masks[p2_idx])))
+
+    logger.info(
+        "Top-%d candidate pruning kept %d of %d possible pairs for %d people.",
+        k, len(candidates), num_people * (num_people - 1) // 2, num_people,
+    )
+    return candidates, scores
+
+def to_meeting_info(data, problem, selected, instances=None):
+    """
+    Turns (p1_idx, p2_idx, t_idx, r_idx) keys back into meeting dicts holding the
+    User, TimeSlot and Room instances and the pair's score, ordered by slot, room
+    and attendees. Only the rows the schedule uses are fetched, with one in_bulk
+    query per model; pass the same `instances` dict to every call of a run to
+    fetch each row at most once.
+    """
+    instances = {} if instances is None else instances
+    selected = sorted(selected, key=lambda m: (m[2], m[3], m[0], m[1]))
+    users = _fetch(User, instances, {data.person_ids[p_idx] for m in selected for p_idx in m[:2]})
+    slots = _fetch(TimeSlot, instances, {data.slot_ids[t_idx] for _, _, t_idx, _ in selected})
+    rooms = _fetch(Room, instances, {data.room_ids[r_idx] for _, _, _, r_idx in selected})
+    scheduled_meetings = []
+    for p1_idx, p2_idx, t_idx, r_idx in selected:
+        meeting_info = {
+            'attendee1': users[data.person_ids[p1_idx]], 'attendee2': users[data.person_ids[p2_idx]],
+            'time_slot': slots[data.slot_ids[t_idx]], 'room': rooms[data.room_ids[r_idx]],
+            'score': float(problem.scores[p1_idx, p2_idx]),
+        }
+        scheduled_meetings.append(meeting_info)
+    return scheduled_meetings
+
+def _fetch(model, instances, ids):
+    """Returns {id: instance} of `model` with at least `ids`, fetching the ones not yet in `instances`."""
+    fetched = instances.setdefault(model, {})
+    missing = {int(pk) for pk in ids} - fetched.keys()
+    if missing:
+        fetched.update(model.objects.in_bulk(missing))
+    return fetched
+
+def persist_schedule(result, batch_size=1000):
+    """
+    Writes a schedule returned by `solve_meeting_schedule` to the Meeting table.
+
+    The new schedule is diffed against the existing meetings by attendee pair, so
+    a meeting row always stays between the same two people and keeps its feedback
+    and reschedule proposals: pairs that still meet keep their row, moved to the
+    new (time_slot, room) if it changed and with the score refreshed, pairs that
+    no longer meet are deleted and new pairs are inserted. Everything runs in one
+    transaction with bulk queries, so a failure leaves the previous schedule
+    intact. Only attendees whose meetings actually changed are notified.
+
+    Meetings that already took place, i.e. that have feedback or whose slot has
+    ended, are history: they are never moved or deleted, whatever the new
+    schedule says. New meetings that would clash with them (same pair, same cell,
+    or an attendee or room busy at an overlapping time) are skipped and counted
+    as conflicts.
+
+    Meeting dicts may hold model instances or primary keys. Returns a dict of
+    'created', 'updated' (moved), 'deleted', 'unchanged', 'kept' (held meetings
+    the schedule dropped), 'conflicts' and 'changed_attendees' counts.
+    """
+    with transaction.atomic():
+        existing = collections.defaultdict(list)
+        for meeting in Meeting.objects.select_for_update().only(
+            'id', 'attendee1_id', 'attendee2_id', 'time_slot_id', 'room_id', 'score'
+        ):
+            existing[frozenset((meeting.attendee1_id, meeting.attendee2_id))].append(meeting)
+        occupied = {(meeting.time_slot_id, meeting.room_id) for meetings in existing.values() for meeting in meetings}
+        held_ids = set(
+            Meeting.objects.filter(Q(feedback__isnull=False) | Q(time_slot__end_time__lte=timezone.now()))
+            .values_list('id', flat=True)
+        )
+        # Cells and (attendee, slot)s the held meetings take up, counting overlapping slots.
+        held_cells, held_busy = set(), set()
+        if held_ids:
+            slot_overlaps = load_slot_overlaps()
+            for meetings in existing.values():
+                for meeting in meetings:
+                    if meeting.id in held_ids:
+                        for slot_id in slot_overlaps.overlapping(meeting.time_slot_id):
+                            held_cells.add((slot_id, meeting.room_id))
+                            held_busy.update(((meeting.attendee1_id, slot_id), (meeting.attendee2_id, slot_id)))
+
+        changed_user_ids = set()
+        to_create, to_move, to_rescore = [], [], []
+        num_unchanged = num_conflicts = 0
+        for meeting_info in result:
+            attendee1_id, attendee2_id = _pk(meeting_info['attendee1']), _pk(meeting_info['attendee2'])
+            cell = (_pk(meeting_info['time_slot']), _pk(meeting_info['room']))
+            candidates = existing.get(frozenset((attendee1_id, attendee2_id)), [])
+            # Prefer the pair's meeting that is already in this cell, then one that may move.
+            meeting = next((m for m in candidates if (m.time_slot_id, m.room_id) == cell), None)
+            if meeting is None:
+                clashes = cell in held_cells or (attendee1_id, cell[0]) in held_busy or (
+                    attendee2_id, cell[0]) in held_busy
+                movable = [m for m in candidates if m.id not in held_ids]
+                if clashes or (candidates and not movable):
+                    num_conflicts += 1
+                    continue
+                meeting = movable[0] if movable else None
+            if meeting is None:
+                to_create.append(Meeting(
+                    attendee1_id=attendee1_id, attendee2_id=attendee2_id,
+                    time_slot_id=cell[0], room_id=cell[1], score=meeting_info['score'],
+                ))
+                changed_user_ids.update((attendee1_id, attendee2_id))
+                continue
+            candidates.remove(meeting)
+            old_cell = (meeting.time_slot_id, meeting.room_id)
+            if old_cell != cell:
+                meeting.time_slot_id, meeting.room_id = cell
+                meeting.score = meeting_info['score']
+                to_move.append((meeting, old_cell))
+                changed_user_ids.update((attendee1_id, attendee2_id))
+                continue
+            num_unchanged += 1
+            if meeting.score != meeting_info['score'] and meeting.id not in held_ids:
+                meeting.score = meeting_info['score']
+                to_rescore.append(meeting)
+        leftover = [meeting for meetings in existing.values() for meeting in meetings]
+        to_delete = [meeting for meeting in leftover if meeting.id not in held_ids]
+        for meeting in to_delete:
+            changed_user_ids.update((meeting.attendee1_id, meeting.attendee2_id))
+            occupied.discard((meeting.time_slot_id, meeting.room_id))
+
+        # Delete first so freed (time_slot, room) cells can be reused by the moves and inserts.
+        # QuerySet.delete() sends the signals that keep UserRatingStats in step with the cascaded feedback.
+        delete_ids = [meeting.id for meeting in to_delete]
+        for start in range(0, len(delete_ids), batch_size):
+            Meeting.objects.filter(id__in=delete_ids[start:start + batch_size]).delete()
+        recreated = _move_meetings(to_move, occupied, batch_size)
+        # bulk_update skips auto_now, so bump updated_at by hand for the conditional GETs.
+        now = timezone.now()
+        for meeting in to_rescore:
+            meeting.updated_at = now
+        Meeting.objects.bulk_update(to_rescore, ['score', 'updated_at'], batch_size=batch_size)
+        Meeting.objects.bulk_create(to_create + recreated, batch_size=batch_size)
+
+        notify_many(changed_user_ids, Notification.EventType.SCHEDULE_UPDATED, "Your meeting schedule has been updated.")
+
+    if num_conflicts:
+        logger.warning("persist_schedule skipped %d meetings that clash with meetings already held.", num_conflicts)
+    return {
+        'created': len(to_create),
+        'updated': len(to_move),
+        'deleted': len(to_delete),
+        'unchanged': num_unchanged,
+        'kept': len(leftover) - len(to_delete),
+        'conflicts': num_conflicts,
+        'changed_attendees': len(changed_user_ids),
+    }
+
+def _move_meetings(moves, occupied, batch_size):
+    """
+    Moves meetings to their new (time_slot, room) without two ever sharing a cell,
+    which the unique constraint rejects row by row, even within one UPDATE. Each
+    round bulk-updates the meetings whose new cell is free; when only a cycle of
+    meetings swapping cells is left, one of them is parked in an unused cell first.
+    If every cell is in use, that meeting is deleted instead and returned, unsaved,
+    to be inserted again once the others have moved.
+
+    `moves` holds (meeting, old_cell) with the new cell set on the meeting, and
+    `occupied` the cells in use, which is updated as meetings move.
+    """
+    pending, recreated, all_cells = list(moves), [], None
+    while pending:
+        ready = [(meeting, old_cell) for meeting, old_cell in pending
+                 if (meeting.time_slot_id, meeting.room_id) not in occupied]
+        if not ready:
+            if all_cells is None:
+                room_ids = list(Room.objects.values_list('id', flat=True))
+                all_cells = [(slot_id, room_id) for slot_id in TimeSlot.objects.values_list('id', flat=True)
+                             for room_id in room_ids]
+            meeting, old_cell = pending[0]
+            parking = next((cell for cell in all_cells if cell not in occupied), None)
+            occupied.discard(old_cell)
+            if parking is None:
+                Meeting.objects.filter(pk=meeting.pk).delete()
+                recreated.append(Meeting(
+                    attendee1_id=meeting.attendee1_id, attendee2_id=meeting.attendee2_id,
+                    time_slot_id=meeting.time_slot_id, room_id=meeting.room_id, score=meeting.score,
+                ))
+                pending.pop(0)
+            else:
+                Meeting.objects.filter(pk=meeting.pk).update(time_slot_id=parking[0], room_id=parking[1])
+                occupied.add(parking)
+                pending[0] = (meeting, parking)
+            continue
+
+        now = timezone.now()
+        for meeting, _ in ready:
+            meeting.updated_at = now
+        Meeting.objects.bulk_update(
+            [meeting for meeting, _ in ready], ['time_slot', 'room', 'score', 'updated_at'], batch_size=batch_size
+        )
+        for meeting, old_cell in ready:
+            occupied.discard(old_cell)
+            occupied.add((meeting.time_slot_id, meeting.room_id))
+        ready_ids = {meeting.pk for meeting, _ in ready}
+        pending = [(meeting, old_cell) for meeting, old_cell in pending if meeting.pk not in ready_ids]
+    return recreated
+
+def repair_schedule(freed_cells, exclude_user_ids=(), max_time_in_seconds=REPAIR_TIME_LIMIT):
+    """
+    Fills freed (time_slot, room) cells, e.g. after a meeting is cancelled or moved,
+    while every other meeting stays as it is. Meant to run inside API requests, so
+    only a small neighbourhood is modelled instead of re-solving the whole event:
+
+    - the users available in a freed slot who have no meeting in it or in any slot
+      overlapping it, apart from `exclude_user_ids` (typically the users whose
+      meeting was just cancelled or moved, who shouldn't be booked straight back in);
+    - the pairs among them that are not blocked and don't already meet, scored as
+      in `solve_meeting_schedule`, keeping only the REPAIR_PAIRS_PER_ROOM best per
+      freed room of each slot.
+
+    The pair x slot model is solved with each slot's capacity set to its number of
+    freed rooms, within `max_time_in_seconds`; without OR-Tools the best-scoring pairs
+    are picked greedily. The new meetings are created and their attendees notified.
+    Cells and users may be given as model instances or primary keys. Returns the new
+    meetings as dicts in the format of `solve_meeting_schedule`.
+    """
+    rooms_by_slot = collections.defaultdict(list)
+    for slot, room in freed_cells:
+        rooms_by_slot[_pk(slot)].append(_pk(room))
+    excluded = {_pk(user) for user in exclude_user_ids}
+
+    # A user is busy in a freed slot if they meet in any slot overlapping it.
+    slot_overlaps = load_slot_overlaps()
+    conflicting_slots = {slot_id: slot_overlaps.overlapping(slot_id) for slot_id in rooms_by_slot}
+    meetings_by_slot = collections.defaultdict(set)
+    for attendee1_id, attendee2_id, slot_id in Meeting.objects.filter(
+        time_slot_id__in=set().union(*conflicting_slots.values())
+    ).values_list('attendee1_id', 'attendee2_id', 'time_slot_id'):
+        meetings_by_slot[slot_id].update((attendee1_id, attendee2_id))
+    booked = {
+        slot_id: set().union(*(meetings_by_slot[other] for other in others))
+        for slot_id, others in conflicting_slots.items()
+    }
+    free = collections.defaultdict(set)
+    for user_id, slot_id in UserAvailability.objects.filter(time_slot_id__in=rooms_by_slot).values_list(
+        'user_id', 'time_slot_id'
+    ):
+        if user_id not in excluded and user_id not in booked[slot_id]:
+            free[slot_id].add(user_id)
+    neighbourhood = set().union(*free.values())
+    if len(neighbourhood) < 2:
+        return []
+
+    data = load_schedule_data(load_previous=False, user_ids=neighbourhood)
+    person_index = {user_id: p_idx for p_idx, user_id in enumerate(data.person_ids.tolist())}
+    slot_index = {slot_id: t_idx for t_idx, slot_id in enumerate(data.slot_ids.tolist())}
+    excluded_pairs = set(map(tuple, data.blocked_pairs.tolist()))
+    for attendee1_id, attendee2_id in Meeting.objects.filter(
+        attendee1_id__in=neighbourhood, attendee2_id__in=neighbourhood
+    ).values_list('attendee1_id', 'attendee2_id'):
+        excluded_pairs.add(tuple(sorted((person_index[attendee1_id], person_index[attendee2_id]))))
+
+    # Only the best REPAIR_PAIRS_PER_ROOM pairs per freed room of each slot are
+    # modelled, which keeps the model tiny even when many people are free.
+    scores = build_score_matrix(data.interest_indptr, data.interest_indices, data.roles, data.ratings)
+    common_slots = collections.defaultdict(list)
+    slot_capacity = {}
+    for slot_id, user_ids in free.items():
+        t_idx = slot_index[slot_id]
+        slot_capacity[t_idx] = len(rooms_by_slot[slot_id])
+        people = np.array(sorted(person_index[user_id] for user_id in user_ids if user_id in person_index), dtype=int)
+        slot_scores = scores[np.ix_(people, people)]
+        for p1_idx, p2_idx in excluded_pairs:
+            i, j = np.searchsorted(people, (p1_idx, p2_idx))
+            if i < len(people) and j < len(people) and people[i] == p1_idx and people[j] == p2_idx:
+                slot_scores[i, j] = 0
+        flat = np.flatnonzero(slot_scores * 10 >= 1)
+        limit = REPAIR_PAIRS_PER_ROOM * slot_capacity[t_idx]
+        if len(flat) > limit:
+            flat = flat[np.argpartition(-slot_scores.ravel()[flat], limit - 1)[:limit]]
+        for i, j in zip(*np.unravel_index(flat, slot_scores.shape)):
+            common_slots[int(people[i]), int(people[j])].append(t_idx)
+    candidates = [
+        (p1_idx, p2_idx, int(scores[p1_idx, p2_idx] * 10), sorted(slots))
+        for (p1_idx, p2_idx), slots in sorted(common_slots.items())
+    ]
+    if cp_model is not None:
+        # The freed cells are rooms known to be free, so only the per-slot capacities bind.
+        selected = solve_component(
+            candidates, sum(slot_capacity.values()), slot_capacity,
+            solver_options=SolverOptions(max_time_in_seconds=max_time_in_seconds), slot_overlaps=data.slot_overlaps,
+        )['selected']
     else:
-        return []
\ No newline at end of file
+        selected = _fill_greedily(candidates, slot_capacity, data.slot_overlaps)
+
+    # Best pairs get the lowest-numbered rooms, so repairs are deterministic.
+    new_meetings = []
+    for t_idx in sorted({t_idx for _, _, t_idx in selected}):
+        pairs = sorted(
+            ((p1_idx, p2_idx) for p1_idx, p2_idx, selected_t in selected if selected_t == t_idx),
+            key=lambda pair: (-scores[pair], pair),
+        )
+        slot_id = int(data.slot_ids[t_idx])
+        for (p1_idx, p2_idx), room_id in zip(pairs, sorted(rooms_by_slot[slot_id])):
+            new_meetings.append({
+                'attendee1': int(data.person_ids[p1_idx]), 'attendee2': int(data.person_ids[p2_idx]),
+                'time_slot': slot_id, 'room': room_id, 'score': float(scores[p1_idx, p2_idx]),
+            })
+    if not new_meetings:
+        return []
+
+    try:
+        with transaction.atomic():
+            Meeting.objects.bulk_create([
+                Meeting(
+                    attendee1_id=meeting_info['attendee1'], attendee2_id=meeting_info['attendee2'],
+                    time_slot_id=meeting_info['time_slot'], room_id=meeting_info['room'], score=meeting_info['score'],
+                )
+                for meeting_info in new_meetings
+            ])
+            new_attendee_ids = {
+                meeting_info[key] for meeting_info in new_meetings for key in ('attendee1', 'attendee2')
+            }
+            notify_many(
+                new_attendee_ids, Notification.EventType.SCHEDULE_UPDATED, "A new meeting has been added to your schedule."
+            )
+    except IntegrityError:
+        # A freed cell was taken in the meantime; the repair is best effort.
+        logger.warning("Schedule repair skipped: the freed cells changed while it ran.")
+        return []
+    return new_meetings
+
+def _fill_greedily(candidates, slot_capacity, slot_overlaps=None):
+    """Picks (p1_idx, p2_idx, t_idx) meetings by descending score while people and rooms are free."""
+    options = sorted(
+        ((integer_score, p1_idx, p2_idx, t_idx) for p1_idx, p2_idx, integer_score, common_slots in candidates
+         for t_idx in common_slots),
+        key=lambda option: (-option[0], option[1:]),
+    )
+    remaining = dict(slot_capacity)
+    booked, selected = set(), []
+    for _, p1_idx, p2_idx, t_idx in options:
+        groups = conflict_groups(slot_overlaps, t_idx)
+        if remaining[t_idx] and not any((p_idx, group) in booked for p_idx in (p1_idx, p2_idx) for group in groups):
+            selected.append((p1_idx, p2_idx, t_idx))
+            booked.update((p_idx, group) for p_idx in (p1_idx, p2_idx) for group in groups)
+            remaining[t_idx] -= 1
+    return selected
+
+def _pk(value):
+    """Returns the primary key of a model instance, or the value itself if it already is one."""
+    return getattr(value, 'pk', value)
@@ -0,0 +1,152 @@
+"""
+Background execution of the meeting scheduler.
+
+Organizers submit a ScheduleJob through the API and the `run_schedule_jobs`
+management command claims and runs it outside the web process, so a long solve
+isn't cut off by gunicorn's worker timeout. While a job runs, its worker
+refreshes the job's heartbeat; a RUNNING job whose heartbeat is older than
+JOB_LEASE belongs to a worker that crashed or was killed, and is failed so the
+queue doesn't stay blocked behind it.
+"""
+
+import contextlib
+import threading
+import time
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from .intelligent_scheduler import persist_schedule, solve_meeting_schedule
+from .models import ScheduleJob
+from .scheduler_stats import ScheduleStats
+
+# The solve_meeting_schedule keyword arguments a job may set in its options.
+JOB_OPTIONS = {
+    'engine', 'two_stage', 'warm_start', 'keep_stable', 'decompose', 'max_workers',
+    'max_time_in_seconds', 'num_search_workers', 'relative_gap_limit', 'random_seed', 'top_k',
+}
+
+# Minimum number of seconds between progress writes to the job row during a solve.
+PROGRESS_INTERVAL = 5
+
+# Seconds between heartbeats of a running job, and without one after which the job is failed.
+HEARTBEAT_INTERVAL = 30
+JOB_LEASE = 5 * 60
+
+
+def fail_stale_jobs():
+    """
+    Marks RUNNING jobs whose worker stopped sending heartbeats, e.g. after a crash
+    or an OOM kill, as FAILED. Returns the number of jobs failed.
+    """
+    now = timezone.now()
+    expired = now - timezone.timedelta(seconds=JOB_LEASE)
+    return ScheduleJob.objects.filter(
+        # A job that never sent a heartbeat is judged by when it started.
+        Q(heartbeat_at__lt=expired) | Q(heartbeat_at__isnull=True, started_at__lt=expired),
+        status=ScheduleJob.Status.RUNNING,
+    ).update(
+        status=ScheduleJob.Status.FAILED, finished_at=now,
+        error="The worker running this job stopped responding; the schedule may not have been saved.",
+    )
+
+
+def claim_next_job():
+    """
+    Claims the oldest queued job and marks it as running. Returns None when there is
+    nothing to do, or when another job is already running: only one may run at a time.
+
+    Queued rows are locked with select_for_update(skip_locked=True), so concurrent
+    workers never claim the same job or wait on each other. A running job whose
+    lease has expired is failed first (see `fail_stale_jobs`).
+    """
+    fail_stale_jobs()
+    with transaction.atomic():
+        if ScheduleJob.objects.filter(status=ScheduleJob.Status.RUNNING).exists():
+            return None
+        job = (
+            ScheduleJob.objects.select_for_update(skip_locked=True)
+            .filter(status=ScheduleJob.Status.QUEUED)
+            .order_by('created_at', 'id')
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = ScheduleJob.Status.RUNNING
+        job.started_at = job.heartbeat_at = timezone.now()
+        try:
+            with transaction.atomic():
+                job.save(update_fields=['status', 'started_at', 'heartbeat_at'])
+        except IntegrityError:
+            # Another worker started a job in the meantime.
+            return None
+    return job
+
+
+def run_job(job):
+    """
+    Runs a claimed job: solves the schedule, recording the best objective as the
+    search progresses, then persists it with `persist_schedule`. The job ends up
+    SUCCEEDED or FAILED with the wall and CPU time of each phase (see
+    ScheduleStats); an empty result is treated as a failure so the existing
+    schedule is never wiped by a solve that found nothing.
+    """
+    stats = ScheduleStats()
+
+    def record_progress(progress):
+        # Called from the solver's thread: only buffer it, the heartbeat thread writes it.
+        job.best_objective = progress['objective']
+
+    try:
+        with _heartbeat(job):
+            options = {key: value for key, value in job.options.items() if key in JOB_OPTIONS}
+            result = solve_meeting_schedule(on_progress=record_progress, stats=stats, **options)
+            if not result:
+                raise RuntimeError("The scheduler did not find a schedule; the existing meetings were left unchanged.")
+
+            with stats.phase('persist'):
+                job.result = persist_schedule(result)
+        job.num_meetings = len(result)
+        job.status = ScheduleJob.Status.SUCCEEDED
+    except Exception as exc:
+        job.status = ScheduleJob.Status.FAILED
+        job.error = f"{type(exc).__name__}: {exc}"
+
+    job.phase_timings = stats.phases
+    job.finished_at = timezone.now()
+    job.save()
+    return job
+
+
+@contextlib.contextmanager
+def _heartbeat(job):
+    """
+    Runs a thread while the block runs that refreshes the job's heartbeat_at every
+    HEARTBEAT_INTERVAL seconds and writes job.best_objective, as set in memory by
+    the progress callback, at most every PROGRESS_INTERVAL seconds when it changed.
+    The job row is only written from this one thread and its one connection.
+    """
+    stopped = threading.Event()
+
+    def beat():
+        written, last_beat = job.best_objective, time.monotonic()
+        try:
+            while not stopped.wait(PROGRESS_INTERVAL):
+                changes = {}
+                if job.best_objective != written:
+                    changes['best_objective'] = written = job.best_objective
+                if time.monotonic() - last_beat >= HEARTBEAT_INTERVAL:
+                    changes['heartbeat_at'] = timezone.now()
+                    last_beat = time.monotonic()
+                if changes:
+                    ScheduleJob.objects.filter(pk=job.pk, status=ScheduleJob.Status.RUNNING).update(**changes)
+        finally:
+            # The thread has its own database connection.
+            connection.close()
+
+    thread = threading.Thread(target=beat, name=f'schedule-job-{job.pk}-heartbeat', daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stopped.set()
+        thread.join()
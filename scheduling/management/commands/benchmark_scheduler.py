@@ -0,0 +1,91 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from scheduling.benchmarks.runner import DEFAULT_ENGINES, run_benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmarks the meeting scheduler on synthetic events of increasing size and writes the results as JSON. '
+        'Needs an empty database; the generated events are rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', help='Comma-separated PEOPLExSLOTSxROOMS event sizes, e.g. "50x4x5,200x8x10".'
+        )
+        parser.add_argument(
+            '--engines', help='Comma-separated engine configurations to run. Default: all of '
+            + ', '.join(config['name'] for config in DEFAULT_ENGINES) + '.'
+        )
+        parser.add_argument('--max-time', type=float, default=60.0, help='Time limit in seconds for each CP-SAT solve.')
+        parser.add_argument(
+            '--top-k', type=int, help="Only model each attendee's K best partners (plus all mentor-mentee pairs)."
+        )
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for the generated events.')
+        parser.add_argument('--num-skills', type=int, default=50)
+        parser.add_argument('--interests-per-person', type=int, default=3)
+        parser.add_argument('--zipf-exponent', type=float, default=1.1, help='Skew of the interest distribution.')
+        parser.add_argument(
+            '--availability-density', type=float, default=0.5, help='Probability a person is free in a slot.'
+        )
+        parser.add_argument('--block-rate', type=float, default=0.001, help='Probability a person blocks another.')
+        parser.add_argument('--label', help='Free-form label stored with the results, e.g. a git revision.')
+        parser.add_argument('--output', help='File to write the JSON results to. Default: standard output.')
+
+    def handle(self, *args, **options):
+        sizes = None
+        if options['sizes']:
+            try:
+                sizes = [_parse_size(size) for size in options['sizes'].split(',')]
+            except ValueError:
+                raise CommandError(f"Invalid --sizes {options['sizes']!r}; expected e.g. \"50x4x5,200x8x10\".")
+
+        engines = None
+        if options['engines']:
+            configs = {config['name']: config for config in DEFAULT_ENGINES}
+            names = options['engines'].split(',')
+            unknown = [name for name in names if name not in configs]
+            if unknown:
+                raise CommandError(f"Unknown engine configuration(s): {', '.join(unknown)}.")
+            engines = [configs[name] for name in names]
+
+        generator_options = {
+            'seed': options['seed'],
+            'num_skills': options['num_skills'],
+            'interests_per_person': options['interests_per_person'],
+            'zipf_exponent': options['zipf_exponent'],
+            'availability_density': options['availability_density'],
+            'block_rate': options['block_rate'],
+        }
+
+        def report(result):
+            self.stderr.write(
+                f"{result['size']['num_people']} people / {result['engine']}: "
+                f"{result.get('status', result.get('skipped'))}, {result.get('num_meetings', 0)} meetings, "
+                f"solve {result.get('solve_time', 0):.2f}s"
+            )
+
+        try:
+            results = run_benchmarks(
+                sizes=sizes, engines=engines, generator_options=generator_options,
+                max_time_in_seconds=options['max_time'], top_k=options['top_k'], label=options['label'],
+                progress=report,
+            )
+        except RuntimeError as exc:
+            raise CommandError(str(exc))
+
+        output = json.dumps(results, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+            self.stdout.write(self.style.SUCCESS(f"Wrote {len(results['results'])} results to {options['output']}."))
+        else:
+            self.stdout.write(output)
+
+
+def _parse_size(size):
+    """Parses "PEOPLExSLOTSxROOMS" into generate_event's size arguments."""
+    values = [int(value) for value in size.strip().split('x')]
+    if len(values) != 3:
+        raise ValueError(size)
+    return dict(zip(('num_people', 'num_slots', 'num_rooms'), values))
@@ -1,42 +1,128 @@
-from django.core.management.base import BaseCommand
-from django.contrib.auth import get_user_model
-from django.db.models import Q
+import collections
 from itertools import combinations
-from scheduling.models import Meeting, TimeSlot
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from scheduling.models import Meeting, Profile, Room, TimeSlot
+from scheduling.scheduler_model import conflict_groups, mask_to_slots
+from scheduling.utils import load_availability_masks, load_slot_overlaps
 
-User = get_user_model()
 
 class Command(BaseCommand):
-    help = 'Generates meetings for users with shared interests who do not already have a meeting scheduled.'
+    help = (
+        'Generates meetings for users with shared interests who do not already have a meeting together '
+        'and have not blocked each other, each in a time slot both are available in and a free room.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Meetings inserted per query.')
+        parser.add_argument(
+            '--progress-every', type=int, default=10000,
+            help='Report progress after every N candidate pairs; 0 turns progress reports off.'
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Plan the meetings without saving them.')
 
     def handle(self, *args, **options):
+        if options['progress_every'] < 0:
+            raise CommandError("--progress-every must be 0 or more.")
         self.stdout.write("Starting meeting generation...")
 
-        # Find all users with at least one interest
-        users_with_interests = User.objects.filter(profile__interests__isnull=False).distinct().prefetch_related('profile__interests')
-
-        # Get the first available time slot as a placeholder
-        try:
-            available_time_slot = TimeSlot.objects.first()
-            if not available_time_slot:
-                self.stdout.write(self.style.ERROR("No available time slots found. Cannot create meetings."))
-                return
-        except TimeSlot.DoesNotExist:
-            self.stdout.write(self.style.ERROR("TimeSlot model not found or no slots exist."))
+        # Inverted index: skill -> users interested in it, so only pairs sharing an interest are ever looked at.
+        users_by_skill = collections.defaultdict(list)
+        for user_id, skill_id in Profile.interests.through.objects.values_list('profile__user_id', 'skill_id'):
+            users_by_skill[skill_id].append(user_id)
+        shared_interests = collections.Counter()
+        for user_ids in users_by_skill.values():
+            shared_interests.update(combinations(sorted(user_ids), 2))
+        # Like the scheduler, never pair users where either has blocked the other.
+        for from_user_id, to_user_id in Profile.blocked_users.through.objects.values_list(
+            'from_profile__user_id', 'to_profile__user_id'
+        ):
+            shared_interests.pop((min(from_user_id, to_user_id), max(from_user_id, to_user_id)), None)
+        # Pairs with the most shared interests get the first pick of the slots.
+        pairs = sorted(shared_interests, key=lambda pair: (-shared_interests[pair], pair))
+        if not pairs:
+            self.stdout.write("No users share an interest.")
+            return
+
+        slot_ids = list(TimeSlot.objects.order_by('start_time', 'id').values_list('id', flat=True))
+        room_ids = list(Room.objects.order_by('id').values_list('id', flat=True))
+        if not slot_ids or not room_ids:
+            self.stdout.write(self.style.ERROR("No time slots or rooms found. Cannot create meetings."))
             return
 
-        # Iterate through all unique pairs of users
-        for user1, user2 in combinations(users_with_interests, 2):
-            user1_interests = set(user1.profile.interests.all())
-            user2_interests = set(user2.profile.interests.all())
-
-            # Check for shared interests
-            if user1_interests.intersection(user2_interests):
-                # Check if a meeting already exists between these two users
-                if not Meeting.objects.filter(Q(attendee1=user1, attendee2=user2) | Q(attendee1=user2, attendee2=user1)).exists():
-                    Meeting.objects.create(attendee1=user1, attendee2=user2, time_slot=available_time_slot)
-                    self.stdout.write(self.style.SUCCESS(f"Created meeting for {user1.username} and {user2.username}"))
+        # Current schedule: pairs that already meet, free rooms per slot and who is busy when.
+        # A room in use is taken in every slot overlapping the meeting's.
+        slot_overlaps = load_slot_overlaps()
+        existing_pairs = set()
+        free_rooms = {slot_id: set(room_ids) for slot_id in slot_ids}
+        busy = set()
+        for attendee1_id, attendee2_id, slot_id, room_id in Meeting.objects.values_list(
+            'attendee1_id', 'attendee2_id', 'time_slot_id', 'room_id'
+        ):
+            existing_pairs.add((min(attendee1_id, attendee2_id), max(attendee1_id, attendee2_id)))
+            for other_id in slot_overlaps.overlapping(slot_id):
+                free_rooms[other_id].discard(room_id)
+            busy.update((user_id, group) for user_id in (attendee1_id, attendee2_id)
+                        for group in conflict_groups(slot_overlaps, slot_id))
+        free_rooms = {slot_id: sorted(rooms, reverse=True) for slot_id, rooms in free_rooms.items()}
+
+        # Users who haven't marked any availability are treated as available in every slot.
+        masks = load_availability_masks({user_id for pair in pairs for user_id in pair}, slot_ids)
+        all_slots = (1 << len(slot_ids)) - 1
+        masks = {user_id: mask or all_slots for user_id, mask in masks.items()}
+
+        batch, num_created, num_existing, num_unplaced = [], 0, 0, 0
+        with transaction.atomic():
+            for num_processed, (user1_id, user2_id) in enumerate(pairs, start=1):
+                if (user1_id, user2_id) in existing_pairs:
+                    num_existing += 1
                 else:
-                    self.stdout.write(self.style.WARNING(f"Meeting already exists for {user1.username} and {user2.username}"))
+                    cell = self._find_cell(
+                        user1_id, user2_id, masks[user1_id] & masks[user2_id], slot_ids, free_rooms, busy, slot_overlaps
+                    )
+                    if cell is None:
+                        num_unplaced += 1
+                    else:
+                        slot_id, room_id = cell
+                        batch.append(Meeting(
+                            attendee1_id=user1_id, attendee2_id=user2_id, time_slot_id=slot_id, room_id=room_id,
+                            score=float(shared_interests[user1_id, user2_id]),
+                        ))
+                        num_created += 1
+                        if len(batch) >= options['batch_size']:
+                            self._save(batch, options['dry_run'])
+                            batch = []
+                if options['progress_every'] and num_processed % options['progress_every'] == 0:
+                    self.stdout.write(f"Processed {num_processed}/{len(pairs)} pairs, {num_created} meetings planned.")
+            self._save(batch, options['dry_run'])
+
+        verb = "Would create" if options['dry_run'] else "Created"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {num_created} meetings; {num_existing} pairs already had one and {num_unplaced} could not be "
+            "placed in a free slot and room."
+        ))
+        self.stdout.write("Meeting generation complete.")
+
+    def _find_cell(self, user1_id, user2_id, common_mask, slot_ids, free_rooms, busy, slot_overlaps):
+        """
+        Books the earliest slot both users are available and free in that still has a
+        room, and returns its (slot_id, room_id), or None if there is none. The room
+        is taken in the overlapping slots too.
+        """
+        for i in mask_to_slots(common_mask):
+            slot_id = slot_ids[i]
+            groups = conflict_groups(slot_overlaps, slot_id)
+            if not free_rooms[slot_id] or any((user_id, group) in busy
+                                              for user_id in (user1_id, user2_id) for group in groups):
+                continue
+            busy.update((user_id, group) for user_id in (user1_id, user2_id) for group in groups)
+            room_id = free_rooms[slot_id].pop()
+            for other_id in slot_overlaps.overlapping(slot_id) - {slot_id}:
+                if room_id in free_rooms[other_id]:
+                    free_rooms[other_id].remove(room_id)
+            return slot_id, room_id
+        return None
 
-        self.stdout.write("Meeting generation complete.")
\ No newline at end of file
+    def _save(self, batch, dry_run):
+        if batch and not dry_run:
+            Meeting.objects.bulk_create(batch)
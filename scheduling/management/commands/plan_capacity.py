@@ -0,0 +1,83 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from scheduling.scenarios import Scenario, run_scenarios
+from scheduling.scheduler_engines import ENGINES
+
+# Scenario changes given as counts in a --scenario spec.
+COUNT_CHANGES = ('add_rooms', 'remove_rooms', 'add_slots', 'remove_slots')
+
+# Columns of the comparison table: (heading, row key, format).
+COLUMNS = [
+    ('Scenario', 'scenario', '{}'),
+    ('People', 'num_people', '{}'),
+    ('Slots', 'num_slots', '{}'),
+    ('Rooms', 'num_rooms', '{}'),
+    ('Status', 'status', '{}'),
+    ('Objective', 'objective', '{:.1f}'),
+    ('Delta', 'delta', '{:+.1f}'),
+    ('Meetings', 'num_meetings', '{}'),
+    ('Solve (s)', 'solve_time', '{:.2f}'),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares what-if scenarios for the current event, e.g. more rooms or slots, by solving each one on an '
+        'in-memory copy of the event. The database is not changed.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scenario', action='append', default=[], dest='scenarios',
+            help='A scenario as NAME:CHANGE=VALUE[,CHANGE=VALUE...], with changes among '
+            + ', '.join(COUNT_CHANGES) + ' and drop_users (user ids joined with "+"), '
+            'e.g. "more-rooms:add_rooms=10". May be given several times.'
+        )
+        parser.add_argument('--engine', choices=sorted(ENGINES), default='cpsat')
+        parser.add_argument('--max-time', type=float, default=60.0, help='Time limit in seconds for each scenario.')
+        parser.add_argument('--workers', type=int, help='Scenarios solved at once. Default: the number of CPUs.')
+        parser.add_argument(
+            '--top-k', type=int, help="Only model each attendee's K best partners (plus all mentor-mentee pairs)."
+        )
+        parser.add_argument('--json', action='store_true', help='Print the comparison as JSON instead of a table.')
+
+    def handle(self, *args, **options):
+        if not options['scenarios']:
+            raise CommandError('Give at least one --scenario.')
+        try:
+            scenarios = [_parse_scenario(spec) for spec in options['scenarios']]
+            rows = run_scenarios(
+                scenarios, engine=options['engine'], max_time_in_seconds=options['max_time'],
+                max_workers=options['workers'], top_k=options['top_k'],
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        if options['json']:
+            self.stdout.write(json.dumps(rows, indent=2))
+            return
+        table = [[heading for heading, _, _ in COLUMNS]]
+        table += [[fmt.format(row[key]) for _, key, fmt in COLUMNS] for row in rows]
+        widths = [max(len(line[i]) for line in table) for i in range(len(COLUMNS))]
+        for line in table:
+            self.stdout.write('  '.join(cell.ljust(width) for cell, width in zip(line, widths)).rstrip())
+
+
+def _parse_scenario(spec):
+    """Parses a --scenario spec into a Scenario."""
+    name, _, changes = spec.partition(':')
+    if not name:
+        raise ValueError(f"Invalid --scenario {spec!r}: it needs a name.")
+    options = {}
+    for change in filter(None, changes.split(',')):
+        key, _, value = change.partition('=')
+        try:
+            if key == 'drop_users':
+                options['drop_user_ids'] = [int(user_id) for user_id in value.split('+')]
+            elif key in COUNT_CHANGES:
+                options[key] = int(value)
+            else:
+                raise ValueError
+        except ValueError:
+            raise ValueError(f"Invalid change {change!r} in --scenario {spec!r}.")
+    return Scenario(name, **options)
@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from scheduling.models import UserRatingStats
+from scheduling.utils import compute_rating_stats
+
+# The UserRatingStats fields compared when verifying.
+STATS_FIELDS = ('count', 'rating_sum', 'stars_1', 'stars_2', 'stars_3', 'stars_4', 'stars_5')
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuilds the UserRatingStats table from scratch from the meeting feedback, then verifies it. '
+        'With --verify-only, just reports users whose stats disagree with the feedback.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify-only', action='store_true', help='Check the stats against the feedback without changing them.'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows inserted per query when rebuilding.')
+
+    def handle(self, *args, **options):
+        if not options['verify_only']:
+            with transaction.atomic():
+                UserRatingStats.objects.all().delete()
+                stats = UserRatingStats.objects.bulk_create(compute_rating_stats(), batch_size=options['batch_size'])
+            self.stdout.write(f"Rebuilt rating stats for {len(stats)} users.")
+
+        mismatches = _find_mismatches()
+        if mismatches:
+            for user_id, stored, expected in mismatches[:20]:
+                self.stderr.write(f"User {user_id}: stored {stored}, expected {expected}")
+            raise CommandError(f"Rating stats are inconsistent for {len(mismatches)} users.")
+        self.stdout.write(self.style.SUCCESS("Rating stats match the feedback."))
+
+
+def _find_mismatches():
+    """Returns (user_id, stored, expected) for every user whose stored stats differ from the feedback."""
+    expected = {stats.user_id: tuple(getattr(stats, field) for field in STATS_FIELDS) for stats in compute_rating_stats()}
+    stored = {
+        user_id: tuple(values)
+        for user_id, *values in UserRatingStats.objects.values_list('user_id', *STATS_FIELDS)
+        # Users whose ratings were all removed keep an empty row; that is consistent.
+        if any(values) or user_id in expected
+    }
+    empty = (0,) * len(STATS_FIELDS)
+    return [
+        (user_id, stored.get(user_id, empty), expected.get(user_id, empty))
+        for user_id in sorted(stored.keys() | expected.keys())
+        if stored.get(user_id, empty) != expected.get(user_id, empty)
+    ]
@@ -0,0 +1,30 @@
+import time
+from django.core.management.base import BaseCommand
+from scheduling.jobs import claim_next_job, run_job
+
+
+class Command(BaseCommand):
+    help = 'Runs queued scheduling jobs. Keeps polling for new jobs unless --once is given.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run at most one job, then exit.')
+        parser.add_argument(
+            '--poll-interval', type=float, default=5.0, help='Seconds to wait between checks for queued jobs.'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            job = claim_next_job()
+            if job is not None:
+                self.stdout.write(f"Running schedule job {job.pk}...")
+                job = run_job(job)
+                if job.status == job.Status.SUCCEEDED:
+                    self.stdout.write(self.style.SUCCESS(
+                        f"Schedule job {job.pk} finished with {job.num_meetings} meetings."
+                    ))
+                else:
+                    self.stdout.write(self.style.ERROR(f"Schedule job {job.pk} failed: {job.error}"))
+            if options['once']:
+                return
+            if job is None:
+                time.sleep(options['poll_interval'])
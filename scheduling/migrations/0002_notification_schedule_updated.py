@@ -0,0 +1,18 @@
+# Generated by Django 4.2.14 on 2026-10-17 06:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scheduling', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='notification',
+            name='event_type',
+            field=models.CharField(choices=[('MTG_CNL', 'Meeting Cancelled'), ('PRP_RCV', 'Proposal Received'), ('PRP_ACC', 'Proposal Accepted'), ('PRP_REJ', 'Proposal Rejected'), ('SCH_UPD', 'Schedule Updated')], max_length=7),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.14 on 2026-10-17 06:53
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('scheduling', '0002_notification_schedule_updated'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScheduleJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('QUE', 'Queued'), ('RUN', 'Running'), ('SUC', 'Succeeded'), ('FAIL', 'Failed')], default='QUE', max_length=4)),
+                ('options', models.JSONField(blank=True, default=dict, help_text='Keyword arguments for solve_meeting_schedule')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('heartbeat_at', models.DateTimeField(blank=True, help_text='Last sign of life from the worker running the job', null=True)),
+                ('phase_timings', models.JSONField(blank=True, default=dict, help_text='Wall and CPU seconds spent in each phase of the run')),
+                ('best_objective', models.FloatField(blank=True, help_text='Best solver objective found so far', null=True)),
+                ('num_meetings', models.PositiveIntegerField(blank=True, null=True)),
+                ('result', models.JSONField(blank=True, default=dict, help_text='Summary of the changes written to the schedule')),
+                ('error', models.TextField(blank=True)),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='schedule_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='schedulejob',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'RUN')), fields=('status',), name='one_running_schedule_job'),
+        ),
+    ]
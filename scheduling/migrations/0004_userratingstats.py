@@ -0,0 +1,53 @@
+# Generated by Django 4.2.14 on 2026-10-17 07:24
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def populate_rating_stats(apps, schema_editor):
+    """Aggregates the existing feedback, as the rebuild_rating_stats command does."""
+    MeetingFeedback = apps.get_model('scheduling', 'MeetingFeedback')
+    UserRatingStats = apps.get_model('scheduling', 'UserRatingStats')
+    reviewed_user = models.Case(
+        models.When(reviewer_id=models.F('meeting__attendee1_id'), then=models.F('meeting__attendee2_id')),
+        default=models.F('meeting__attendee1_id'),
+    )
+    histogram = {f'stars_{stars}': models.Count('id', filter=models.Q(rating=stars)) for stars in range(1, 6)}
+    rows = (
+        MeetingFeedback.objects.annotate(reviewed_user_id=reviewed_user)
+        .values('reviewed_user_id')
+        .annotate(count=models.Count('id'), rating_sum=models.Sum('rating'), **histogram)
+        .order_by('reviewed_user_id')
+    )
+    UserRatingStats.objects.bulk_create(
+        [UserRatingStats(user_id=row.pop('reviewed_user_id'), **row) for row in rows], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('scheduling', '0003_schedulejob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserRatingStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rating_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('rating_sum', models.PositiveIntegerField(default=0)),
+                ('stars_1', models.PositiveIntegerField(default=0)),
+                ('stars_2', models.PositiveIntegerField(default=0)),
+                ('stars_3', models.PositiveIntegerField(default=0)),
+                ('stars_4', models.PositiveIntegerField(default=0)),
+                ('stars_5', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'user rating stats',
+            },
+        ),
+        migrations.RunPython(populate_rating_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.14 on 2026-10-17 07:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scheduling', '0004_userratingstats'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', '-created_at', 'id'], name='notification_user_feed_idx'),
+        ),
+    ]
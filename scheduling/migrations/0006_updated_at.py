@@ -0,0 +1,34 @@
+# Generated by Django 4.2.14 on 2026-10-17 07:52
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scheduling', '0005_cursor_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='meeting',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='timeslot',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.14 on 2026-10-17 08:02
+
+from django.db import migrations
+import django.db.models.manager
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scheduling', '0006_updated_at'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='meetingfeedback',
+            options={'base_manager_name': 'with_meeting'},
+        ),
+        migrations.AlterModelManagers(
+            name='meetingfeedback',
+            managers=[
+                ('objects', django.db.models.manager.Manager()),
+                ('with_meeting', django.db.models.manager.Manager()),
+            ],
+        ),
+    ]
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from django.db.models.signals import post_save
 from django.dispatch import receiver
@@ -26,6 +26,7 @@ class Profile(models.Model):
     blocked_users = models.ManyToManyField(
         'self', symmetrical=False, blank=True, related_name='blocked_by'
     )
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.user.username
@@ -42,6 +43,7 @@ class TimeSlot(models.Model):
     start_time = models.DateTimeField()
     end_time = models.DateTimeField()
     description = models.CharField(max_length=255, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
     available_users = models.ManyToManyField(
         User, through='UserAvailability', related_name='available_slots'
     )
@@ -72,6 +74,7 @@ class Meeting(models.Model):
     time_slot = models.ForeignKey(TimeSlot, on_delete=models.CASCADE, related_name='meetings')
     room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='meetings')
     score = models.FloatField(default=0.0, help_text="Interest score for this match")
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ('time_slot', 'room') # A room can only have one meeting at a time
@@ -89,6 +92,11 @@ class MeetingRescheduleProposal(models.Model):
     status = models.CharField(max_length=4, choices=Status.choices, default=Status.PENDING)
     created_at = models.DateTimeField(auto_now_add=True)
 
+class MeetingFeedbackManager(models.Manager):
+    """Loads each feedback's meeting along with it, so its reviewed user is known without another query."""
+    def get_queryset(self):
+        return super().get_queryset().select_related('meeting')
+
 class MeetingFeedback(models.Model):
     """Represents feedback submitted by an attendee for a meeting."""
     meeting = models.ForeignKey(Meeting, on_delete=models.CASCADE, related_name='feedback')
@@ -97,8 +105,55 @@ class MeetingFeedback(models.Model):
     comments = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = models.Manager()
+    with_meeting = MeetingFeedbackManager()
+
     class Meta:
         unique_together = ('meeting', 'reviewer')
+        # Deleting meetings collects their feedback through the base manager, so the
+        # rating stats handlers get each feedback's meeting without a query per row.
+        base_manager_name = 'with_meeting'
+
+    @property
+    def reviewed_user_id(self):
+        """The attendee being rated: whichever one of the meeting's attendees is not the reviewer."""
+        if self.reviewer_id == self.meeting.attendee1_id:
+            return self.meeting.attendee2_id
+        return self.meeting.attendee1_id
+
+    def save(self, *args, **kwargs):
+        # UserRatingStats is updated by signal handlers; keep them in the same transaction.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+class UserRatingStats(models.Model):
+    """
+    The ratings a user has RECEIVED, aggregated from MeetingFeedback so averages can
+    be read per user instead of per feedback row. Kept up to date by the signal
+    handlers in signals.py; bulk operations bypass them, and so does changing the
+    attendees of a meeting that already has feedback (the scheduler never does:
+    see persist_schedule), so run the rebuild_rating_stats command after those.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='rating_stats')
+    count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    # Histogram: number of ratings received with each number of stars
+    stars_1 = models.PositiveIntegerField(default=0)
+    stars_2 = models.PositiveIntegerField(default=0)
+    stars_3 = models.PositiveIntegerField(default=0)
+    stars_4 = models.PositiveIntegerField(default=0)
+    stars_5 = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = 'user rating stats'
+
+    @property
+    def average(self):
+        """The average rating received, or None if the user hasn't been rated."""
+        return self.rating_sum / self.count if self.count else None
+
+    def __str__(self):
+        return f"{self.user} ({self.count} ratings)"
 
 class Notification(models.Model):
     """Represents a notification for a user."""
@@ -107,12 +162,57 @@ class Notification(models.Model):
         PROPOSAL_RECEIVED = 'PRP_RCV', 'Proposal Received'
         PROPOSAL_ACCEPTED = 'PRP_ACC', 'Proposal Accepted'
         PROPOSAL_REJECTED = 'PRP_REJ', 'Proposal Rejected'
+        SCHEDULE_UPDATED = 'SCH_UPD', 'Schedule Updated'
 
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
     event_type = models.CharField(max_length=7, choices=EventType.choices)
     message = models.TextField()
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # A user's notifications, newest first (NotificationCursorPagination)
+            models.Index(fields=['user', '-created_at', 'id'], name='notification_user_feed_idx'),
+        ]
+
+class ScheduleJob(models.Model):
+    """A background run of the meeting scheduler, executed by the run_schedule_jobs worker."""
+    class Status(models.TextChoices):
+        QUEUED = 'QUE', 'Queued'
+        RUNNING = 'RUN', 'Running'
+        SUCCEEDED = 'SUC', 'Succeeded'
+        FAILED = 'FAIL', 'Failed'
+
+    status = models.CharField(max_length=4, choices=Status.choices, default=Status.QUEUED)
+    options = models.JSONField(default=dict, blank=True, help_text="Keyword arguments for solve_meeting_schedule")
+    requested_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name='schedule_jobs'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(
+        null=True, blank=True, help_text="Last sign of life from the worker running the job"
+    )
+    phase_timings = models.JSONField(
+        default=dict, blank=True, help_text="Wall and CPU seconds spent in each phase of the run"
+    )
+    best_objective = models.FloatField(null=True, blank=True, help_text="Best solver objective found so far")
+    num_meetings = models.PositiveIntegerField(null=True, blank=True)
+    result = models.JSONField(default=dict, blank=True, help_text="Summary of the changes written to the schedule")
+    error = models.TextField(blank=True)
 
     class Meta:
-        ordering = ['-created_at']
\ No newline at end of file
+        ordering = ['-created_at']
+        constraints = [
+            # The event has a single schedule, so only one job may run at a time.
+            models.UniqueConstraint(
+                fields=['status'], condition=models.Q(status='RUN'), name='one_running_schedule_job'
+            ),
+        ]
+
+    def __str__(self):
+        return f"Schedule job {self.pk} ({self.get_status_display()})"
@@ -1,6 +1,142 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import json
+from functools import reduce
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 class StandardResultsSetPagination(PageNumberPagination):
     page_size = 25
     page_size_query_param = 'page_size'
-    max_page_size = 100
\ No newline at end of file
+    max_page_size = 100
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination on a keyset: each page continues after the last row of the
+    previous one with a WHERE on the `ordering` columns rather than an OFFSET, and
+    no COUNT(*) is run, so fetching page 1000 costs the same as fetching page 1.
+
+    `ordering` must identify a row uniquely (end it with 'id') and should be
+    backed by an index. Pages only go forwards: the response holds 'next', the
+    link to the following page or None, and 'results'. With `optional` set, the
+    view returns a plain list unless the client passes ?cursor= or ?page_size=.
+    """
+    ordering = None
+    page_size = 25
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    optional = False
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.optional and not {self.cursor_query_param, self.page_size_query_param} & set(request.query_params):
+            return None
+        self.request = request
+        page_size = self.get_page_size(request)
+        queryset = queryset.order_by(*self.ordering)
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            queryset = queryset.filter(self._after(self.decode_cursor(cursor, queryset.model)))
+
+        # One extra row tells whether there is a next page.
+        page = list(queryset[:page_size + 1])
+        self.next_position = self._position(page[page_size - 1]) if len(page) > page_size else None
+        return page[:page_size]
+
+    def get_page_size(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param], strict=True, cutoff=self.max_page_size
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(), self.cursor_query_param, self.encode_cursor(self.next_position)
+        )
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'results': data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def encode_cursor(self, position):
+        data = json.dumps([value.isoformat() if hasattr(value, 'isoformat') else value for value in position])
+        return base64.urlsafe_b64encode(data.encode()).decode()
+
+    def decode_cursor(self, cursor, model):
+        """
+        Returns the position encoded in `cursor`, each value parsed by its ordering
+        field of `model`. Raises NotFound for anything that isn't a valid position.
+        """
+        try:
+            position = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        try:
+            values = [_ordering_field(model, field).to_python(value) for field, value in zip(self.ordering, position)]
+        except (ValidationError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if any(value is None for value in values):
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    def _position(self, obj):
+        """The values of the ordering columns for `obj`, following relations through select_related."""
+        return [reduce(getattr, field.lstrip('-').split('__'), obj) for field in self.ordering]
+
+    def _after(self, position):
+        """
+        Rows that come after `position` in `ordering`: for some column, every
+        earlier column equals the cursor and that one is strictly past it.
+
+        The OR alone can't bound an index scan, so the leading column is also
+        given a plain range (e.g. created_at <= X) that the index seeks to.
+        """
+        first = self.ordering[0]
+        condition = Q()
+        for i, field in enumerate(self.ordering):
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            term = Q(**{f'{field.lstrip("-")}__{lookup}': position[i]})
+            for previous, value in zip(self.ordering[:i], position):
+                term &= Q(**{previous.lstrip('-'): value})
+            condition |= term
+        bound = 'lte' if first.startswith('-') else 'gte'
+        return Q(**{f'{first.lstrip("-")}__{bound}': position[0]}) & condition
+
+class MeetingCursorPagination(KeysetPagination):
+    """
+    Meetings in start order. The ordering spans two tables, so no index can serve
+    it; a user's meetings are found through the attendee foreign key indexes and
+    there are at most two per time slot, so the sort stays small.
+    """
+    ordering = ('time_slot__start_time', 'id')
+    optional = True
+
+class NotificationCursorPagination(KeysetPagination):
+    """Newest notifications first; served by the Notification (user, -created_at, id) index."""
+    ordering = ('-created_at', 'id')
+
+def _ordering_field(model, ordering):
+    """The model field an ordering like '-time_slot__start_time' sorts on, following relations."""
+    *relations, name = ordering.lstrip('-').split('__')
+    for relation in relations:
+        model = model._meta.get_field(relation).related_model
+    return model._meta.get_field(name)
@@ -0,0 +1,191 @@
+"""
+What-if capacity planning for the meeting scheduler.
+
+Organizers can ask how the schedule would change with more rooms or slots, or
+with people dropping out, without touching the database. The event is loaded
+once with `load_schedule_data`, each `Scenario` is applied to an in-memory copy,
+and the scenarios are solved concurrently in a process pool, each with its own
+time limit. `run_scenarios` returns a comparison table with one row per
+scenario, the unchanged event first.
+"""
+
+import dataclasses
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+import django
+import numpy as np
+from .intelligent_scheduler import _csr, build_scheduling_problem, load_schedule_data
+from .scheduler_engines import get_engine
+from .scheduler_model import SlotOverlapIndex, SolverOptions
+
+# Name of the scenario that leaves the event unchanged; every table starts with it.
+BASELINE = 'baseline'
+
+
+@dataclass
+class Scenario:
+    """
+    A set of changes to the loaded event. Rooms and slots are removed highest id
+    first. Each added slot copies an existing slot in turn, i.e. the same people
+    are free in it, and overlaps no other slot.
+    """
+    name: str
+    add_rooms: int = 0
+    remove_rooms: int = 0
+    add_slots: int = 0
+    remove_slots: int = 0
+    # User ids of the people who drop out
+    drop_user_ids: list = field(default_factory=list)
+
+    def __post_init__(self):
+        for key in ('add_rooms', 'remove_rooms', 'add_slots', 'remove_slots'):
+            if getattr(self, key) < 0:
+                raise ValueError(f"Scenario {self.name!r}: {key} must not be negative.")
+
+
+def apply_scenario(data, scenario):
+    """
+    Returns a copy of `data` (a ScheduleData) with the scenario's changes applied.
+    Added rooms and slots get negative placeholder ids. The persisted schedule is
+    dropped, since scenarios are always solved from scratch.
+    """
+    # Rooms
+    num_kept_rooms = max(data.num_rooms - scenario.remove_rooms, 0)
+    room_ids = np.concatenate([
+        np.sort(data.room_ids)[:num_kept_rooms], -np.arange(1, scenario.add_rooms + 1, dtype=np.int64)
+    ])
+
+    # Slots: new_slot[t_idx] is the slot's new index, or -1 if it is removed.
+    num_kept_slots = max(data.num_slots - scenario.remove_slots, 0)
+    kept_slots = np.sort(np.argsort(data.slot_ids, kind='stable')[:num_kept_slots])
+    new_slot = np.full(data.num_slots, -1, dtype=np.int32)
+    new_slot[kept_slots] = np.arange(num_kept_slots)
+    templates = kept_slots[np.arange(scenario.add_slots) % num_kept_slots] if num_kept_slots else []
+    slot_ids = np.concatenate([
+        data.slot_ids[kept_slots], -np.arange(1, len(templates) + 1, dtype=np.int64)
+    ])
+
+    # People: new_person[p_idx] is the person's new index, or -1 if they drop out.
+    kept_people = np.flatnonzero(~np.isin(data.person_ids, scenario.drop_user_ids))
+    new_person = np.full(data.num_people, -1, dtype=np.int32)
+    new_person[kept_people] = np.arange(len(kept_people))
+
+    rows, skills = _csr_rows(data.interest_indptr), data.interest_indices
+    kept = new_person[rows] >= 0
+    interest_indptr, interest_indices = _csr(new_person[rows][kept], skills[kept], len(kept_people))
+
+    rows, slots = _csr_rows(data.availability_indptr), data.availability_indices
+    people = new_person[rows]
+    kept = (people >= 0) & (new_slot[slots] >= 0)
+    availability_rows, availability_cols = [people[kept]], [new_slot[slots][kept]]
+    for i, template in enumerate(templates):
+        copied = (people >= 0) & (slots == template)
+        availability_rows.append(people[copied])
+        availability_cols.append(np.full(copied.sum(), num_kept_slots + i, dtype=np.int32))
+    availability_indptr, availability_indices = _csr(
+        np.concatenate(availability_rows), np.concatenate(availability_cols), len(kept_people)
+    )
+
+    # Renumbering keeps the order of the people, so blocked pairs stay sorted.
+    blocked_pairs = new_person[data.blocked_pairs]
+    blocked_pairs = blocked_pairs[(blocked_pairs >= 0).all(axis=1)].reshape(-1, 2)
+
+    slot_overlaps = None
+    if data.slot_overlaps is not None:
+        groups = [tuple(int(new_slot[t_idx]) for t_idx in group if new_slot[t_idx] >= 0)
+                  for group in data.slot_overlaps.groups]
+        groups += [(num_kept_slots + i,) for i in range(len(templates))]
+        slot_overlaps = SlotOverlapIndex.from_groups(group for group in groups if group)
+
+    return dataclasses.replace(
+        data,
+        person_ids=data.person_ids[kept_people],
+        slot_ids=slot_ids,
+        room_ids=room_ids,
+        roles=data.roles[kept_people],
+        ratings=data.ratings[kept_people],
+        interest_indptr=interest_indptr,
+        interest_indices=interest_indices,
+        availability_indptr=availability_indptr,
+        availability_indices=availability_indices,
+        blocked_pairs=blocked_pairs,
+        previous_meetings={},
+        slot_overlaps=slot_overlaps,
+    )
+
+
+def _csr_rows(indptr):
+    """The row of every entry of a CSR matrix with the given indptr."""
+    return np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+
+
+def evaluate_scenario(data, scenario, engine='cpsat', solver_options=None, top_k=None, **engine_options):
+    """
+    Applies a scenario to `data`, solves it and returns its row of the comparison
+    table. The 'objective' is the total score of the scheduled meetings, as in the
+    'score' of `solve_meeting_schedule`'s meetings.
+    """
+    started = time.perf_counter()
+    scenario_data = apply_scenario(data, scenario)
+    problem = build_scheduling_problem(scenario_data, warm_start=False, top_k=top_k)
+    scheduler = get_engine(engine, solver_options=solver_options, **engine_options)
+    selected = scheduler.schedule(problem) or []
+    return {
+        'scenario': scenario.name,
+        'num_people': scenario_data.num_people,
+        'num_slots': scenario_data.num_slots,
+        'num_rooms': scenario_data.num_rooms,
+        'num_candidates': len(problem.candidates),
+        'status': scheduler.last_stats['status'],
+        'objective': sum(float(problem.scores[p1_idx, p2_idx]) for p1_idx, p2_idx, _, _ in selected),
+        'num_meetings': len(selected),
+        'solve_time': scheduler.last_stats['solve_time'],
+        'total_time': time.perf_counter() - started,
+    }
+
+
+def run_scenarios(scenarios, data=None, engine='cpsat', max_time_in_seconds=60, max_workers=None,
+                  num_search_workers=None, top_k=None, **engine_options):
+    """
+    Evaluates the unchanged event and every scenario, in a ProcessPoolExecutor when
+    `max_workers` allows more than one at a time, and returns the comparison table:
+    one dict per scenario (see `evaluate_scenario`), baseline first, with 'delta'
+    the change in objective from the baseline.
+
+    `data` defaults to the event in the database. Each CP-SAT solve stops after
+    `max_time_in_seconds`; unless `num_search_workers` is given, the cores are
+    shared between the concurrent solves instead of each solve using them all.
+    The remaining options are passed to `get_engine`.
+    """
+    scenarios = [Scenario(BASELINE)] + list(scenarios)
+    names = [scenario.name for scenario in scenarios]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Scenario names must be unique and not {BASELINE!r}.")
+    if data is None:
+        data = load_schedule_data(load_previous=False)
+
+    max_workers = min(max_workers or os.cpu_count() or 1, len(scenarios))
+    if num_search_workers is None:
+        num_search_workers = max((os.cpu_count() or 1) // max_workers, 1)
+    solver_options = SolverOptions(max_time_in_seconds=max_time_in_seconds, num_search_workers=num_search_workers)
+    if engine_options.get('decompose'):
+        # The scenarios already fill the processes; don't start a pool per scenario.
+        engine_options['max_workers'] = 1
+
+    if max_workers == 1:
+        rows = [evaluate_scenario(data, scenario, engine, solver_options, top_k, **engine_options)
+                for scenario in scenarios]
+    else:
+        # Workers only solve, but django.setup() makes the scheduler importable under spawn too.
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=django.setup) as executor:
+            futures = [
+                executor.submit(evaluate_scenario, data, scenario, engine, solver_options, top_k, **engine_options)
+                for scenario in scenarios
+            ]
+            rows = [future.result() for future in futures]
+
+    for row in rows:
+        row['delta'] = row['objective'] - rows[0]['objective']
+    return rows
@@ -0,0 +1,425 @@
+"""
+Pluggable scheduling engines.
+
+An engine turns a `SchedulingProblem` (candidate pairs in solver indices, the number
+of rooms and the persisted schedule) into a list of (p1_idx, p2_idx, t_idx, r_idx)
+meetings. `intelligent_scheduler.solve_meeting_schedule` loads the problem from the
+database and picks the engine by name:
+
+- "cpsat": the exact OR-Tools CP-SAT model (optionally two-stage or decomposed).
+- "matching": a fast greedy heuristic that needs no OR-Tools.
+- "auto": CP-SAT seeded with the heuristic's schedule, or the heuristic alone when
+  the problem is too large for CP-SAT or OR-Tools isn't installed.
+- "tiered": CP-SAT in two passes, mentor-mentee pairs first and then everyone else
+  in the capacity left over.
+"""
+
+import collections
+import logging
+import time
+from dataclasses import dataclass, field
+
+from .scheduler_model import (SolutionStreamer, SolverOptions, assign_rooms, build_pair_slot_model, build_sparse_model,
+                              conflict_groups, cp_model, greedy_matching, solve_component, solve_decomposed)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SchedulingProblem:
+    """The solver-index view of a scheduling run that every engine works from."""
+    candidates: list
+    num_rooms: int
+    # The persisted schedule as {(p1_idx, p2_idx, t_idx): r_idx}.
+    previous_meetings: dict = field(default_factory=dict)
+    warm_start: bool = True
+    stability_bonus: int = 0
+    # Pair scores indexable as scores[p1_idx, p2_idx], e.g. the scheduler's score matrix.
+    scores: object = None
+    # A SlotOverlapIndex over slot indices when slots overlap; None means a person's slots never conflict.
+    slot_overlaps: object = None
+    # The (p1_idx, p2_idx) candidate pairs the tiered engine schedules first, i.e. mentor-mentee pairs.
+    priority_pairs: set = field(default_factory=set)
+
+    @property
+    def previous_keys(self):
+        """The persisted schedule as a set of (p1_idx, p2_idx, t_idx, r_idx) keys."""
+        return {key + (r_idx,) for key, r_idx in self.previous_meetings.items()}
+
+    @property
+    def num_variables(self):
+        """Number of pair x slot decisions, i.e. variables in the two-stage model."""
+        return sum(len(common_slots) for _, _, _, common_slots in self.candidates)
+
+
+class SchedulingEngine:
+    """
+    Base class for scheduling backends. Subclasses implement `schedule`, which
+    returns a list of (p1_idx, p2_idx, t_idx, r_idx) meetings, or None when the
+    engine could not find a schedule.
+
+    After each call, `last_stats` holds a dict describing the run: 'engine',
+    'build_time' and 'solve_time' in seconds, 'num_variables', 'num_constraints',
+    'status', 'objective', 'best_bound', and CP-SAT's 'num_conflicts' and
+    'num_branches' (None where they don't apply).
+    """
+    name = None
+    last_stats = None
+
+    def schedule(self, problem, hint=None, on_solution=None, on_progress=None):
+        """
+        `hint` is an optional set of (p1_idx, p2_idx, t_idx, r_idx) keys to start from.
+        `on_solution(selected, objective, best_bound, elapsed)` is called with each
+        improving schedule found (in the same format as the return value), and
+        `on_progress(objective, best_bound, elapsed)` likewise but without building
+        the schedule. A truthy return value from either asks the engine to stop and
+        return the best schedule so far.
+        """
+        raise NotImplementedError
+
+    @staticmethod
+    def _report(on_solution, on_progress, selected, objective, best_bound, elapsed):
+        """Calls whichever callbacks are set and returns whether one of them asked to stop."""
+        stop = on_progress is not None and bool(on_progress(objective, best_bound, elapsed))
+        if on_solution is not None:
+            stop = bool(on_solution(selected, objective, best_bound, elapsed)) or stop
+        return stop
+
+
+class CpSatEngine(SchedulingEngine):
+    """
+    Exact engine using OR-Tools CP-SAT. See `solve_meeting_schedule` for the
+    two_stage, decompose and max_workers options; `solver_options` is a
+    SolverOptions with the search parameters.
+
+    Decomposed solves run in other processes, so `on_solution` and `on_progress`
+    are only called once, with the merged schedule.
+    """
+    name = 'cpsat'
+
+    def __init__(self, two_stage=False, decompose=False, max_workers=None, solver_options=None):
+        if cp_model is None:
+            raise RuntimeError("The 'cpsat' scheduling engine requires OR-Tools: pip install ortools")
+        self.two_stage = two_stage
+        self.decompose = decompose
+        self.max_workers = max_workers
+        self.solver_options = solver_options or SolverOptions()
+
+    def schedule(self, problem, hint=None, on_solution=None, on_progress=None):
+        started = time.perf_counter()
+        if hint is None and problem.warm_start:
+            hint = problem.previous_keys
+        previous = problem.previous_keys if problem.stability_bonus else None
+        previous_rooms = problem.previous_meetings if problem.stability_bonus else None
+
+        if self.decompose:
+            selected, report = solve_decomposed(
+                problem.candidates, problem.num_rooms, _without_rooms(hint), _without_rooms(previous),
+                problem.stability_bonus, self.max_workers, self.solver_options, problem.slot_overlaps,
+            )
+            for component in report:
+                logger.info(
+                    "Component %(component)d: %(num_people)d people, %(num_pairs)d pairs, %(num_variables)d variables, "
+                    "%(num_constraints)d constraints, %(status)s, objective %(objective)s, "
+                    "build %(build_time).3fs, solve %(solve_time).3fs", component
+                )
+                if component['fallback']:
+                    logger.warning(
+                        "Component %(component)d: CP-SAT found no solution in time (%(status)s); "
+                        "using the matching heuristic's schedule.", component
+                    )
+            selected = assign_rooms(selected, problem.num_rooms, previous_rooms, problem.slot_overlaps)
+            objectives = [component['objective'] for component in report if component['objective'] is not None]
+            self.last_stats = _stats(
+                self.name,
+                build_time=sum(component['build_time'] for component in report),
+                solve_time=sum(component['solve_time'] for component in report),
+                num_variables=sum(component['num_variables'] for component in report),
+                num_constraints=sum(component['num_constraints'] for component in report),
+                status=_combined_status(component['status'] for component in report),
+                objective=sum(objectives),
+                num_conflicts=sum(component['num_conflicts'] for component in report),
+                num_branches=sum(component['num_branches'] for component in report),
+                components=report,
+            )
+            self._report(on_solution, on_progress, selected, sum(objectives), None, time.perf_counter() - started)
+            return selected
+
+        if self.two_stage:
+            model, meet = build_pair_slot_model(
+                problem.candidates, problem.num_rooms, _without_rooms(hint), _without_rooms(previous),
+                problem.stability_bonus, slot_overlaps=problem.slot_overlaps,
+            )
+        else:
+            model, meet = build_sparse_model(
+                problem.candidates, problem.num_rooms, hint, previous, problem.stability_bonus,
+                slot_overlaps=problem.slot_overlaps,
+            )
+
+        built = time.perf_counter()
+        solver = self.solver_options.apply(cp_model.CpSolver())
+        streamer = report_solution = None
+        if on_solution is not None:
+            def report_solution(selected, objective, best_bound, elapsed):
+                if self.two_stage:
+                    selected = assign_rooms(selected, problem.num_rooms, previous_rooms, problem.slot_overlaps)
+                return on_solution(selected, objective, best_bound, elapsed)
+        if on_solution is not None or on_progress is not None:
+            streamer = SolutionStreamer(meet, report_solution, on_progress)
+        status = solver.Solve(model, streamer)
+        found = status == cp_model.OPTIMAL or status == cp_model.FEASIBLE
+        self.last_stats = _stats(
+            self.name,
+            build_time=built - started,
+            solve_time=time.perf_counter() - built,
+            num_variables=len(meet),
+            num_constraints=len(model.Proto().constraints),
+            status=solver.StatusName(status),
+            objective=solver.ObjectiveValue() if found else None,
+            best_bound=solver.BestObjectiveBound() if found else None,
+            num_conflicts=solver.NumConflicts(),
+            num_branches=solver.NumBranches(),
+        )
+        if not found:
+            return None
+
+        selected = [key for key, var in meet.items() if solver.Value(var) == 1]
+        if self.two_stage:
+            selected = assign_rooms(selected, problem.num_rooms, previous_rooms, problem.slot_overlaps)
+        return selected
+
+
+class MatchingEngine(SchedulingEngine):
+    """
+    Fast heuristic engine that needs no OR-Tools. Each slot is scheduled on its own
+    as a matching on the score graph of the people available in it: edges are taken
+    greedily in order of decreasing score while both people are free, until the
+    slot's rooms run out. Greedy matching is at least half as good as a maximum
+    weight matching and runs in O(E log E) for E candidate (pair, slot) edges.
+
+    With overlapping slots, a person booked in one slot is also busy in every slot
+    that overlaps it, and a group of overlapping slots shares its rooms.
+    """
+    name = 'matching'
+
+    def schedule(self, problem, hint=None, on_solution=None, on_progress=None):
+        started = time.perf_counter()
+        previous = set(problem.previous_meetings) if problem.stability_bonus else set()
+        selected, objective = greedy_matching(
+            problem.candidates, problem.num_rooms, previous, problem.stability_bonus,
+            slot_overlaps=problem.slot_overlaps,
+        )
+        previous_rooms = problem.previous_meetings if problem.stability_bonus else None
+        selected = assign_rooms(selected, problem.num_rooms, previous_rooms, problem.slot_overlaps)
+        self.last_stats = _stats(
+            self.name,
+            solve_time=time.perf_counter() - started,
+            num_variables=problem.num_variables,
+            status='FEASIBLE',
+            objective=objective,
+        )
+        self._report(on_solution, on_progress, selected, objective, None, time.perf_counter() - started)
+        return selected
+
+
+class AutoEngine(SchedulingEngine):
+    """
+    Runs the matching heuristic first. If OR-Tools is available and the CP-SAT model
+    would have at most `max_cpsat_variables` variables, CP-SAT is then run with the
+    heuristic's schedule as its hint; otherwise, or if CP-SAT finds nothing, the
+    heuristic's schedule is returned. The model has one variable per pair x slot
+    decision with `two_stage` or `decompose`, and num_rooms times as many otherwise.
+    """
+    name = 'auto'
+
+    # Above this many CP-SAT variables CP-SAT is skipped and the heuristic is used.
+    MAX_CPSAT_VARIABLES = 200_000
+
+    def __init__(self, max_cpsat_variables=None, **cpsat_options):
+        self.max_cpsat_variables = max_cpsat_variables or self.MAX_CPSAT_VARIABLES
+        self.cpsat_options = cpsat_options
+
+    def schedule(self, problem, hint=None, on_solution=None, on_progress=None):
+        stopped = False
+
+        def report_heuristic(*solution):
+            nonlocal stopped
+            stopped = self._report(on_solution, on_progress, *solution)
+            return stopped
+
+        matching = MatchingEngine()
+        heuristic = matching.schedule(
+            problem, on_solution=report_heuristic if on_solution or on_progress else None
+        )
+        self.last_stats = dict(matching.last_stats, engine=self.name, heuristic=matching.last_stats)
+        num_variables = problem.num_variables
+        if not (self.cpsat_options.get('two_stage') or self.cpsat_options.get('decompose')):
+            # The pair x slot x room model
+            num_variables *= problem.num_rooms
+        if stopped or cp_model is None or num_variables > self.max_cpsat_variables:
+            logger.info("Using the matching heuristic; CP-SAT would need %d variables.", num_variables)
+            return heuristic
+        cpsat = CpSatEngine(**self.cpsat_options)
+        exact = cpsat.schedule(problem, hint=set(heuristic), on_solution=on_solution, on_progress=on_progress)
+        if exact is None:
+            return heuristic
+        self.last_stats = dict(
+            cpsat.last_stats, engine=self.name, heuristic=matching.last_stats,
+            solve_time=cpsat.last_stats['solve_time'] + matching.last_stats['solve_time'],
+        )
+        return exact
+
+
+class TieredEngine(SchedulingEngine):
+    """
+    Lexicographic CP-SAT engine. The first tier solves only the problem's
+    `priority_pairs`, a tiny model. The second tier keeps those meetings fixed and
+    fills the rooms and people left free with all the other candidates. Mixing the
+    mentor-mentee bonus with small interest scores in one model leaves CP-SAT
+    proving optimality among many near-equal low-value pairs. Solving the
+    high-value tier on its own is fast and gets at least as much score out of it.
+
+    Both tiers use the pair x slot formulation and share the time limit of
+    `solver_options`. `last_stats` has a 'tiers' list with each tier's sizes,
+    status, objective and timings. `on_solution` and `on_progress` are called once
+    per tier.
+    """
+    name = 'tiered'
+    TIERS = ('priority', 'general')
+
+    def __init__(self, solver_options=None):
+        if cp_model is None:
+            raise RuntimeError("The 'tiered' scheduling engine requires OR-Tools: pip install ortools")
+        self.solver_options = solver_options or SolverOptions()
+
+    def schedule(self, problem, hint=None, on_solution=None, on_progress=None):
+        started = time.perf_counter()
+        if hint is None and problem.warm_start:
+            hint = problem.previous_keys
+        hint = _without_rooms(hint)
+        previous = _without_rooms(problem.previous_keys) if problem.stability_bonus else None
+        previous_rooms = problem.previous_meetings if problem.stability_bonus else None
+        deadline = None
+        if self.solver_options.max_time_in_seconds is not None:
+            deadline = time.time() + self.solver_options.max_time_in_seconds
+
+        def solve_tier(candidates, room_capacity=None):
+            # `room_capacity` is keyed by conflict group, which is the slot when slots don't overlap.
+            slot_capacity, group_capacity = (
+                (room_capacity, None) if problem.slot_overlaps is None else (None, room_capacity)
+            )
+            return solve_component(
+                candidates, problem.num_rooms, slot_capacity, hint, previous, problem.stability_bonus,
+                self.solver_options, deadline, problem.slot_overlaps, group_capacity,
+            )
+
+        reports = []
+        priority = [candidate for candidate in problem.candidates if candidate[:2] in problem.priority_pairs]
+        reports.append(solve_tier(priority))
+        fixed = reports[0]['selected']
+        stopped = self._report(
+            on_solution, on_progress,
+            assign_rooms(fixed, problem.num_rooms, previous_rooms, problem.slot_overlaps)
+            if on_solution is not None else None,
+            reports[0]['objective'] or 0, None, time.perf_counter() - started,
+        )
+
+        if not stopped:
+            # Only the rooms and people the first tier left free are offered to the second.
+            # Rooms are counted per conflict group, since overlapping slots share them.
+            used_rooms = collections.Counter(
+                group for _, _, t_idx in fixed for group in conflict_groups(problem.slot_overlaps, t_idx)
+            )
+            busy = {
+                (p_idx, group) for p1_idx, p2_idx, t_idx in fixed for p_idx in (p1_idx, p2_idx)
+                for group in conflict_groups(problem.slot_overlaps, t_idx)
+            }
+            general = []
+            for p1_idx, p2_idx, integer_score, common_slots in problem.candidates:
+                free_slots = [
+                    t_idx for t_idx in common_slots
+                    if not any(
+                        used_rooms[group] >= problem.num_rooms or (p1_idx, group) in busy or (p2_idx, group) in busy
+                        for group in conflict_groups(problem.slot_overlaps, t_idx)
+                    )
+                ]
+                if free_slots:
+                    general.append((p1_idx, p2_idx, integer_score, free_slots))
+            reports.append(solve_tier(general, {group: problem.num_rooms - n for group, n in used_rooms.items()}))
+
+        selected = assign_rooms(
+            fixed + [key for report in reports[1:] for key in report['selected']], problem.num_rooms, previous_rooms,
+            problem.slot_overlaps,
+        )
+        tiers = []
+        for tier, report in zip(self.TIERS, reports):
+            report = dict(report, tier=tier, num_meetings=len(report.pop('selected')))
+            tiers.append(report)
+            logger.info(
+                "Tier %(tier)s: %(num_pairs)d pairs, %(num_variables)d variables, %(status)s, "
+                "objective %(objective)s, %(num_meetings)d meetings, build %(build_time).3fs, "
+                "solve %(solve_time).3fs", report
+            )
+        objective = sum(tier['objective'] for tier in tiers if tier['objective'] is not None)
+        self.last_stats = _stats(
+            self.name,
+            build_time=sum(tier['build_time'] for tier in tiers),
+            solve_time=sum(tier['solve_time'] for tier in tiers),
+            num_variables=sum(tier['num_variables'] for tier in tiers),
+            num_constraints=sum(tier['num_constraints'] for tier in tiers),
+            status=_combined_status(tier['status'] for tier in tiers),
+            objective=objective,
+            num_conflicts=sum(tier['num_conflicts'] for tier in tiers),
+            num_branches=sum(tier['num_branches'] for tier in tiers),
+            tiers=tiers,
+        )
+        if not stopped:
+            self._report(on_solution, on_progress, selected, objective, None, time.perf_counter() - started)
+        return selected
+
+
+ENGINES = {engine.name: engine for engine in (CpSatEngine, MatchingEngine, AutoEngine, TieredEngine)}
+
+
+def get_engine(engine, **options):
+    """
+    Returns a SchedulingEngine. `engine` is either an instance, which is returned
+    as-is, or one of the names in ENGINES, instantiated with the options it accepts
+    (`two_stage`, `decompose` and `max_workers` only apply to CP-SAT, and the
+    tiered engine only takes `solver_options`).
+    """
+    if isinstance(engine, SchedulingEngine):
+        return engine
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown scheduling engine {engine!r}; choose from {', '.join(ENGINES)}.")
+    if engine == MatchingEngine.name:
+        return MatchingEngine()
+    if engine == TieredEngine.name:
+        return TieredEngine(solver_options=options.get('solver_options'))
+    return ENGINES[engine](**options)
+
+
+def _stats(engine, build_time=0.0, solve_time=0.0, num_variables=0, num_constraints=None, status=None,
+           objective=None, best_bound=None, num_conflicts=None, num_branches=None, **extra):
+    """Builds a `last_stats` dict with every documented key present."""
+    return dict(
+        engine=engine, build_time=build_time, solve_time=solve_time, num_variables=num_variables,
+        num_constraints=num_constraints, status=status, objective=objective, best_bound=best_bound,
+        num_conflicts=num_conflicts, num_branches=num_branches, **extra,
+    )
+
+
+def _combined_status(statuses):
+    """OPTIMAL if every component was solved to optimality, otherwise the weakest status."""
+    statuses = set(statuses)
+    for status in ('MODEL_INVALID', 'UNKNOWN', 'FEASIBLE'):
+        if status in statuses:
+            return status
+    return 'OPTIMAL' if statuses else 'UNKNOWN'
+
+
+def _without_rooms(keys):
+    """Projects (p1_idx, p2_idx, t_idx, r_idx) keys onto the pair x slot model's keys."""
+    if keys is None:
+        return None
+    return {key[:3] for key in keys}
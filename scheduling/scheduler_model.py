@@ -0,0 +1,665 @@
+"""
+CP-SAT model builders for the meeting scheduler.
+
+These functions work on plain solver data (person/slot/room indices, availability
+lists and pair scores) rather than Django model instances, so they can be reused
+and tested without touching the database. `intelligent_scheduler` is responsible
+for loading the data and turning solver indices back into model objects.
+"""
+
+import collections
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+
+try:
+    from ortools.sat.python import cp_model
+except ImportError:  # Only the CP-SAT builders need OR-Tools; the matching engine runs without it.
+    cp_model = None
+
+
+# The least time a decomposed component gets, however much of the limit is used up.
+MIN_COMPONENT_SECONDS = 0.1
+
+
+@dataclass
+class SolverOptions:
+    """
+    CP-SAT search parameters. Fields left as None keep the solver's defaults, which
+    means no time limit: set `max_time_in_seconds` for anything but small events.
+    """
+    max_time_in_seconds: float = None
+    num_search_workers: int = None
+    # Stop once the objective is within this fraction of the best bound, e.g. 0.01.
+    relative_gap_limit: float = None
+    random_seed: int = None
+
+    def apply(self, solver, deadline=None):
+        """
+        Sets the parameters on a CpSolver. `deadline` is an optional time.time()
+        value the time limit is capped to.
+        """
+        max_time = self.max_time_in_seconds
+        if deadline is not None:
+            remaining = max(deadline - time.time(), 0.0)
+            max_time = remaining if max_time is None else min(max_time, remaining)
+        if max_time is not None:
+            solver.parameters.max_time_in_seconds = max_time
+        if self.num_search_workers is not None:
+            solver.parameters.num_search_workers = self.num_search_workers
+        if self.relative_gap_limit is not None:
+            solver.parameters.relative_gap_limit = self.relative_gap_limit
+        if self.random_seed is not None:
+            solver.parameters.random_seed = self.random_seed
+        return solver
+
+
+class SolutionStreamer(cp_model.CpSolverSolutionCallback if cp_model is not None else object):
+    """
+    CP-SAT solution callback that reports every improving solution to
+    `on_solution(selected, objective, best_bound, elapsed)`, where `selected` is the
+    list of `meet` keys set to 1, `objective` and `best_bound` are in the solver's
+    x10 score units and `elapsed` is wall time in seconds. `on_progress(objective,
+    best_bound, elapsed)` gets the same without the selection, which saves scanning
+    every variable. If either returns a truthy value the search stops and keeps
+    the current best solution.
+    """
+
+    def __init__(self, meet, on_solution=None, on_progress=None):
+        super().__init__()
+        self._meet = meet
+        self._on_solution = on_solution
+        self._on_progress = on_progress
+        self.num_solutions = 0
+
+    def OnSolutionCallback(self):
+        self.num_solutions += 1
+        objective, best_bound, elapsed = self.ObjectiveValue(), self.BestObjectiveBound(), self.WallTime()
+        stop = self._on_progress is not None and self._on_progress(objective, best_bound, elapsed)
+        if self._on_solution is not None:
+            selected = [key for key, var in self._meet.items() if self.BooleanValue(var)]
+            stop = self._on_solution(selected, objective, best_bound, elapsed) or stop
+        if stop:
+            self.StopSearch()
+
+
+class SlotOverlapIndex:
+    """
+    Which time slots overlap, for slots with arbitrary start and end times.
+
+    A sweep line over the sorted interval endpoints yields the maximal groups of
+    mutually overlapping slots (the maximal cliques of the interval graph) in
+    O(n log n) plus the size of the output. A person can attend at most one meeting
+    per group. Slots are identified by any hashable key: solver indices in the
+    scheduler, database ids in the API (see `utils.load_slot_overlaps`).
+    """
+
+    def __init__(self, intervals):
+        """`intervals` is an iterable of (slot, start, end) tuples. Slots that merely touch don't overlap."""
+        self.groups = []
+        events = []
+        for slot, start, end in intervals:
+            if end > start:
+                events.append((start, 1, slot))
+                events.append((end, 0, slot))
+            else:
+                self.groups.append((slot,))
+        # At the same instant, slots end before others start.
+        events.sort(key=lambda event: event[:2])
+
+        active = {}
+        opened = False
+        for _, is_start, slot in events:
+            if is_start:
+                active[slot] = None
+                opened = True
+            else:
+                # The first end after a run of starts closes a maximal group.
+                if opened:
+                    self.groups.append(tuple(active))
+                    opened = False
+                del active[slot]
+
+        self._index_groups()
+
+    @classmethod
+    def from_groups(cls, groups):
+        """Builds an index from known conflict groups, e.g. after renumbering the slots."""
+        index = cls(())
+        index.groups = [tuple(group) for group in groups]
+        index._index_groups()
+        return index
+
+    def _index_groups(self):
+        self._groups_of_slot = collections.defaultdict(list)
+        for group_idx, group in enumerate(self.groups):
+            for slot in group:
+                self._groups_of_slot[slot].append(group_idx)
+        # Groups close in time order and list their slots in start order, so the
+        # order slots first appear in is their start order.
+        self._start_rank = {slot: rank for rank, slot in enumerate(self._groups_of_slot)}
+
+    def start_rank(self, slot):
+        """The position of `slot` when the slots are sorted by start time."""
+        return self._start_rank[slot]
+
+    def groups_of(self, slot):
+        """Indices into `groups` of the conflict groups containing `slot`."""
+        return self._groups_of_slot.get(slot, [])
+
+    def overlapping(self, slot):
+        """The set of slots that overlap `slot`, including itself."""
+        return {other for group_idx in self.groups_of(slot) for other in self.groups[group_idx]} | {slot}
+
+    @property
+    def has_overlaps(self):
+        return any(len(group) > 1 for group in self.groups)
+
+
+def conflict_groups(slot_overlaps, t_idx):
+    """The keys of the per-person at-most-one groups slot t_idx belongs to."""
+    return (t_idx,) if slot_overlaps is None else slot_overlaps.groups_of(t_idx)
+
+
+def slots_to_mask(slots):
+    """Packs slot indices into an availability bitmask: bit t is set if slot t is included."""
+    mask = 0
+    for t_idx in slots:
+        mask |= 1 << t_idx
+    return mask
+
+
+def mask_to_slots(mask):
+    """The slot indices set in an availability bitmask, lowest first."""
+    slots = []
+    while mask:
+        lowest = mask & -mask
+        slots.append(lowest.bit_length() - 1)
+        mask ^= lowest
+    return slots
+
+
+def find_candidate_pairs(availability, blocked_pairs, scores):
+    """
+    Returns the pairs that could actually be scheduled together.
+
+    `availability` is a list (indexed by person) of availability bitmasks (see
+    `slots_to_mask`), `blocked_pairs` a set of (p1_idx, p2_idx) tuples with
+    p1_idx < p2_idx, and `scores[p1_idx, p2_idx]` is the pair's interest score
+    (typically the upper-triangular score matrix from the scheduler).
+
+    Each candidate is a (p1_idx, p2_idx, integer_score, common_slots) tuple. Pairs are
+    skipped when they are blocked, share no available slot, or have no positive score.
+    A pair's shared availability is a single AND of the two bitmasks.
+    """
+    candidates = []
+    num_people = len(availability)
+    for p1_idx in range(num_people):
+        p1_mask = availability[p1_idx]
+        if not p1_mask:
+            continue
+        for p2_idx in range(p1_idx + 1, num_people):
+            common_mask = p1_mask & availability[p2_idx]
+            if not common_mask or (p1_idx, p2_idx) in blocked_pairs:
+                continue
+            # Scale score by 10 and convert to integer for the CP-SAT solver, which prefers integers.
+            integer_score = int(scores[p1_idx, p2_idx] * 10)
+            if integer_score > 0:
+                candidates.append((p1_idx, p2_idx, integer_score, mask_to_slots(common_mask)))
+    return candidates
+
+
+def build_sparse_model(candidates, num_rooms, hint=None, previous=None, stability_bonus=0, slot_overlaps=None):
+    """
+    Builds a CP-SAT model with a meet[p1, p2, t, r] variable only for feasible
+    candidate pairs (see `find_candidate_pairs`) in the slots they share.
+
+    The at-most-one constraints are built from per-(person, slot) and per-(slot, room)
+    adjacency lists collected while creating the variables, so the full
+    people x people x slots x rooms space is never enumerated.
+
+    `hint` and `previous` are optional sets of (p1_idx, p2_idx, t_idx, r_idx) keys:
+    a solution to start the search from, and an earlier schedule whose meetings earn
+    `stability_bonus` when kept (see `_add_hints` and `_add_stability_bonus`).
+
+    With a SlotOverlapIndex as `slot_overlaps`, a person has at most one meeting,
+    and a room hosts at most one, per group of overlapping slots instead of per slot.
+    Returns a (model, meet) tuple.
+    """
+    model = cp_model.CpModel()
+    meet = {}
+    meetings_by_person_group = collections.defaultdict(list)
+    meetings_by_group_room = collections.defaultdict(list)
+    objective_vars = []
+    objective_coeffs = []
+
+    for p1_idx, p2_idx, integer_score, common_slots in candidates:
+        for t_idx in common_slots:
+            for r_idx in range(num_rooms):
+                var = model.NewBoolVar(f'meet_{p1_idx}_{p2_idx}_{t_idx}_{r_idx}')
+                meet[p1_idx, p2_idx, t_idx, r_idx] = var
+                for group in conflict_groups(slot_overlaps, t_idx):
+                    meetings_by_person_group[p1_idx, group].append(var)
+                    meetings_by_person_group[p2_idx, group].append(var)
+                    meetings_by_group_room[group, r_idx].append(var)
+                objective_vars.append(var)
+                objective_coeffs.append(integer_score)
+
+    # Constraint: A person can have at most one meeting per time slot (or group of overlapping slots).
+    for meetings_at_t in meetings_by_person_group.values():
+        if len(meetings_at_t) > 1:
+            model.AddAtMostOne(meetings_at_t)
+
+    # Constraint: A room can host at most one meeting per time slot (or group of overlapping slots).
+    for meetings_in_room_at_t in meetings_by_group_room.values():
+        if len(meetings_in_room_at_t) > 1:
+            model.AddAtMostOne(meetings_in_room_at_t)
+
+    # Objective: maximize the total interest score of all scheduled meetings.
+    _add_hints(model, meet, hint)
+    _add_stability_bonus(meet, objective_coeffs, previous, stability_bonus)
+    model.Maximize(cp_model.LinearExpr.WeightedSum(objective_vars, objective_coeffs))
+    return model, meet
+
+
+def build_pair_slot_model(candidates, num_rooms, hint=None, previous=None, stability_bonus=0, slot_capacity=None,
+                          slot_overlaps=None, group_capacity=None):
+    """
+    Builds the first stage of the two-stage formulation: a meet[p1, p2, t] variable
+    for every candidate pair in the slots they share, with the room dimension
+    replaced by a per-slot capacity constraint (at most `num_rooms` meetings).
+
+    Rooms are interchangeable, so this removes the num_rooms! equivalent solutions
+    per slot that the 4-D model makes the solver explore. Use `assign_rooms`
+    on the selected meetings afterwards.
+
+    `hint` and `previous` work as in `build_sparse_model`, with (p1_idx, p2_idx, t_idx)
+    keys. `slot_capacity` optionally maps a slot
+    index to a smaller number of rooms to use in that slot, e.g. when the rooms are
+    divided between independently solved components. `slot_overlaps` works as in
+    `build_sparse_model`; a room can only host one meeting per group of
+    overlapping slots, so each group holds at most `num_rooms` meetings, or
+    `group_capacity[group]` where given. Returns a (model, meet) tuple.
+    """
+    slot_capacity = slot_capacity or {}
+    group_capacity = group_capacity or {}
+    model = cp_model.CpModel()
+    meet = {}
+    meetings_by_person_group = collections.defaultdict(list)
+    meetings_by_slot = collections.defaultdict(list)
+    meetings_by_group = collections.defaultdict(list)
+    objective_vars = []
+    objective_coeffs = []
+
+    for p1_idx, p2_idx, integer_score, common_slots in candidates:
+        for t_idx in common_slots:
+            var = model.NewBoolVar(f'meet_{p1_idx}_{p2_idx}_{t_idx}')
+            meet[p1_idx, p2_idx, t_idx] = var
+            for group in conflict_groups(slot_overlaps, t_idx):
+                meetings_by_person_group[p1_idx, group].append(var)
+                meetings_by_person_group[p2_idx, group].append(var)
+                meetings_by_group[group].append(var)
+            meetings_by_slot[t_idx].append(var)
+            objective_vars.append(var)
+            objective_coeffs.append(integer_score)
+
+    # Constraint: A person can have at most one meeting per time slot (or group of overlapping slots).
+    for meetings_at_t in meetings_by_person_group.values():
+        if len(meetings_at_t) > 1:
+            model.AddAtMostOne(meetings_at_t)
+
+    # Constraint: No more meetings in a time slot than there are rooms.
+    for t_idx, meetings_at_t in meetings_by_slot.items():
+        capacity = slot_capacity.get(t_idx, num_rooms)
+        if len(meetings_at_t) > capacity:
+            model.Add(cp_model.LinearExpr.Sum(meetings_at_t) <= capacity)
+
+    # Constraint: Overlapping slots share the rooms, so they can't hold more meetings together.
+    if slot_overlaps is not None:
+        for group, meetings_in_group in meetings_by_group.items():
+            capacity = group_capacity.get(group, num_rooms)
+            if len(meetings_in_group) > capacity:
+                model.Add(cp_model.LinearExpr.Sum(meetings_in_group) <= capacity)
+
+    _add_hints(model, meet, hint)
+    _add_stability_bonus(meet, objective_coeffs, previous, stability_bonus)
+    model.Maximize(cp_model.LinearExpr.WeightedSum(objective_vars, objective_coeffs))
+    return model, meet
+
+
+def greedy_matching(candidates, num_rooms, previous=None, stability_bonus=0, slot_capacity=None,
+                    slot_overlaps=None, group_capacity=None):
+    """
+    Schedules each slot on its own as a greedy matching: the slot's (pair, slot)
+    candidates are taken in order of decreasing score while both people are free,
+    until its rooms run out. This is the heuristic of the matching engine and the
+    fallback for components CP-SAT finds no solution for in time.
+
+    The arguments work as in `build_pair_slot_model`. Returns a (selected, objective)
+    tuple with the selected (p1_idx, p2_idx, t_idx) keys and their total score.
+    """
+    previous = previous or set()
+    slot_capacity = slot_capacity or {}
+    group_capacity = group_capacity or {}
+    edges_by_slot = collections.defaultdict(list)
+    for p1_idx, p2_idx, integer_score, common_slots in candidates:
+        for t_idx in common_slots:
+            weight = integer_score
+            if (p1_idx, p2_idx, t_idx) in previous:
+                weight += stability_bonus
+            edges_by_slot[t_idx].append((-weight, p1_idx, p2_idx))
+
+    selected = []
+    objective = 0
+    # (p_idx, conflict group) pairs already taken; a group is a slot unless slots overlap.
+    busy = set()
+    meetings_by_group = collections.Counter()
+    for t_idx in sorted(edges_by_slot):
+        groups = conflict_groups(slot_overlaps, t_idx)
+        slot_limit = slot_capacity.get(t_idx, num_rooms)
+        # Overlapping slots share their rooms, so meetings are also counted per group.
+        group_limits = [] if slot_overlaps is None else [
+            (group, group_capacity.get(group, num_rooms)) for group in groups
+        ]
+        num_meetings = 0
+        for negative_weight, p1_idx, p2_idx in sorted(edges_by_slot[t_idx]):
+            if num_meetings == slot_limit or any(meetings_by_group[group] >= limit for group, limit in group_limits):
+                break
+            if any((p_idx, group) in busy for p_idx in (p1_idx, p2_idx) for group in groups):
+                continue
+            busy.update((p_idx, group) for p_idx in (p1_idx, p2_idx) for group in groups)
+            meetings_by_group.update(groups)
+            selected.append((p1_idx, p2_idx, t_idx))
+            objective -= negative_weight
+            num_meetings += 1
+    return selected, objective
+
+
+def assign_rooms(selected, num_rooms, previous_rooms=None, slot_overlaps=None):
+    """
+    Second stage of the two-stage formulation: deterministically gives each selected
+    (p1_idx, p2_idx, t_idx) meeting a room. Within a slot, meetings are ordered by
+    attendee indices and take the free rooms in index order.
+
+    `previous_rooms` optionally maps (p1_idx, p2_idx, t_idx) to the room the meeting
+    had in an earlier schedule; those meetings keep their room.
+
+    With a SlotOverlapIndex as `slot_overlaps`, rooms taken in an overlapping slot
+    aren't free either. Slots are then handled in order of start time: handing out
+    rooms that way (greedy interval colouring) needs no more rooms than the largest
+    group of overlapping slots has meetings.
+
+    Returns a list of (p1_idx, p2_idx, t_idx, r_idx) tuples. Raises ValueError if a
+    slot has more meetings than free rooms.
+    """
+    previous_rooms = previous_rooms or {}
+    meetings_by_slot = collections.defaultdict(list)
+    for p1_idx, p2_idx, t_idx in selected:
+        meetings_by_slot[t_idx].append((p1_idx, p2_idx))
+
+    assignments = []
+    rooms_by_slot = collections.defaultdict(set)
+    by_start = slot_overlaps.start_rank if slot_overlaps is not None else None
+    for t_idx in sorted(meetings_by_slot, key=by_start):
+        pairs = sorted(meetings_by_slot[t_idx])
+        others = slot_overlaps.overlapping(t_idx) - {t_idx} if slot_overlaps is not None else ()
+        used_rooms = set().union(*(rooms_by_slot[other] for other in others))
+        if len(pairs) > num_rooms - len(used_rooms):
+            raise ValueError(
+                f"Slot {t_idx} has {len(pairs)} meetings but only {num_rooms - len(used_rooms)} free rooms."
+            )
+        unassigned = []
+        slot_rooms = rooms_by_slot[t_idx]
+        for p1_idx, p2_idx in pairs:
+            r_idx = previous_rooms.get((p1_idx, p2_idx, t_idx))
+            if r_idx is not None and r_idx < num_rooms and r_idx not in used_rooms | slot_rooms:
+                slot_rooms.add(r_idx)
+                assignments.append((p1_idx, p2_idx, t_idx, r_idx))
+            else:
+                unassigned.append((p1_idx, p2_idx))
+        free_rooms = [r_idx for r_idx in range(num_rooms) if r_idx not in used_rooms | slot_rooms]
+        for (p1_idx, p2_idx), r_idx in zip(unassigned, free_rooms):
+            slot_rooms.add(r_idx)
+            assignments.append((p1_idx, p2_idx, t_idx, r_idx))
+    return assignments
+
+
+def _add_hints(model, meet, hint):
+    """
+    Warm-starts `model` from a known solution: every variable is hinted with
+    whether its key is in `hint`, so the hint is complete.
+    """
+    if hint is None:
+        return
+    for key, var in meet.items():
+        model.AddHint(var, key in hint)
+
+
+def _add_stability_bonus(meet, objective_coeffs, previous, stability_bonus):
+    """
+    Makes each meeting of an earlier schedule worth `stability_bonus` extra when it
+    is kept, which is the same as a penalty for moving or dropping it.
+    `objective_coeffs` must be in the same order as `meet` and is updated in place.
+    """
+    if not previous or not stability_bonus:
+        return
+    for i, key in enumerate(meet):
+        if key in previous:
+            objective_coeffs[i] += stability_bonus
+
+
+def find_components(candidates):
+    """
+    Splits the candidate pairs into the connected components of the feasible-pair
+    graph (people are nodes, candidate pairs are edges). People in different
+    components never compete for each other's time, so the components only
+    interact through the rooms. Returns a list of candidate lists, largest first.
+    """
+    parent = {}
+
+    def find(p_idx):
+        parent.setdefault(p_idx, p_idx)
+        while parent[p_idx] != p_idx:
+            parent[p_idx] = parent[parent[p_idx]]
+            p_idx = parent[p_idx]
+        return p_idx
+
+    for p1_idx, p2_idx, _, _ in candidates:
+        root1, root2 = find(p1_idx), find(p2_idx)
+        if root1 != root2:
+            parent[max(root1, root2)] = min(root1, root2)
+
+    components = collections.defaultdict(list)
+    for candidate in candidates:
+        components[find(candidate[0])].append(candidate)
+    return sorted(components.values(), key=len, reverse=True)
+
+
+def divide_slot_capacity(components, num_rooms, slot_overlaps=None):
+    """
+    Divides the rooms of every slot between independently solved components.
+
+    A component can use at most half of its people available in a slot. When the
+    components together can't fill the rooms, each gets its maximum; otherwise the
+    rooms are split in proportion to those maxima (largest remainder first).
+    Returns a list with one {t_idx: num_rooms} dict per component.
+
+    With a SlotOverlapIndex as `slot_overlaps`, the rooms of each group of
+    overlapping slots are divided instead, and the dicts are keyed by group (see
+    the `group_capacity` of `build_pair_slot_model`).
+    """
+    max_meetings = []
+    for component in components:
+        people_by_slot = collections.defaultdict(set)
+        for p1_idx, p2_idx, _, common_slots in component:
+            for t_idx in common_slots:
+                for key in (t_idx,) if slot_overlaps is None else slot_overlaps.groups_of(t_idx):
+                    people_by_slot[key].update((p1_idx, p2_idx))
+        max_meetings.append({t_idx: min(len(people) // 2, num_rooms) for t_idx, people in people_by_slot.items()})
+
+    capacities = [{} for _ in components]
+    all_slots = sorted({t_idx for slot_maxima in max_meetings for t_idx in slot_maxima})
+    for t_idx in all_slots:
+        demand = [(i, slot_maxima[t_idx]) for i, slot_maxima in enumerate(max_meetings) if t_idx in slot_maxima]
+        total_demand = sum(wanted for _, wanted in demand)
+        if total_demand <= num_rooms:
+            for i, wanted in demand:
+                capacities[i][t_idx] = wanted
+            continue
+        shares = [(i, wanted * num_rooms / total_demand) for i, wanted in demand]
+        for i, share in shares:
+            capacities[i][t_idx] = int(share)
+        leftover = num_rooms - sum(int(share) for _, share in shares)
+        by_remainder = sorted(shares, key=lambda item: (int(item[1]) - item[1], item[0]))
+        for i, _ in by_remainder[:leftover]:
+            capacities[i][t_idx] += 1
+    return capacities
+
+
+def solve_component(candidates, num_rooms, slot_capacity=None, hint=None, previous=None, stability_bonus=0,
+                    solver_options=None, deadline=None, slot_overlaps=None, group_capacity=None):
+    """
+    Builds and solves the pair x slot model for one component. Runs in a worker
+    process, so it only takes and returns plain, picklable data: the selected
+    (p1_idx, p2_idx, t_idx) keys plus the component's sizes and timings.
+    `deadline` caps the time limit so a batch of components can share one.
+
+    If CP-SAT finds no solution in time, the component is scheduled with
+    `greedy_matching` instead and its report has 'fallback' set.
+    """
+    started = time.perf_counter()
+    model, meet = build_pair_slot_model(
+        candidates, num_rooms, hint, previous, stability_bonus, slot_capacity, slot_overlaps, group_capacity
+    )
+    built = time.perf_counter()
+    solver = (solver_options or SolverOptions()).apply(cp_model.CpSolver(), deadline)
+    status = solver.Solve(model)
+    solved = time.perf_counter()
+
+    fallback = status != cp_model.OPTIMAL and status != cp_model.FEASIBLE
+    if not fallback:
+        selected = [key for key, var in meet.items() if solver.Value(var) == 1]
+        objective = solver.ObjectiveValue()
+    else:
+        # Out of time without a solution: the greedy schedule beats leaving the component empty.
+        selected, objective = greedy_matching(
+            candidates, num_rooms, previous, stability_bonus, slot_capacity, slot_overlaps, group_capacity
+        )
+    return {
+        'selected': selected,
+        'num_people': len({p_idx for candidate in candidates for p_idx in candidate[:2]}),
+        'num_pairs': len(candidates),
+        'num_variables': len(meet),
+        'num_constraints': len(model.Proto().constraints),
+        'status': solver.StatusName(status),
+        'fallback': fallback,
+        'objective': objective,
+        'num_conflicts': solver.NumConflicts(),
+        'num_branches': solver.NumBranches(),
+        'build_time': built - started,
+        'solve_time': solved - built,
+    }
+
+
+def _solve_component_batch(jobs):
+    """
+    Worker entry point: solves a batch of components one after the other. Each gets
+    a share of the time left before the batch's deadline in proportion to its size,
+    and at least MIN_COMPONENT_SECONDS, so a large component can't starve the rest.
+    """
+    results = []
+    sizes = [_component_size(kwargs['candidates']) for _, kwargs in jobs]
+    remaining_size = sum(sizes)
+    for (component_idx, kwargs), size in zip(jobs, sizes):
+        if kwargs['deadline'] is not None:
+            now = time.time()
+            share = max(kwargs['deadline'] - now, 0.0) * size / max(remaining_size, 1)
+            # The share replaces the overall limit, which the deadline already accounts for.
+            kwargs = dict(
+                kwargs, deadline=now + max(share, MIN_COMPONENT_SECONDS),
+                solver_options=replace(kwargs['solver_options'], max_time_in_seconds=None),
+            )
+        remaining_size -= size
+        results.append((component_idx, solve_component(**kwargs)))
+    return results
+
+
+def _component_size(candidates):
+    """Number of pair x slot decisions in a component."""
+    return sum(len(common_slots) for _, _, _, common_slots in candidates)
+
+
+def solve_decomposed(candidates, num_rooms, hint=None, previous=None, stability_bonus=0, max_workers=None,
+                     solver_options=None, slot_overlaps=None):
+    """
+    Solves the pair x slot problem as independent components (see `find_components`)
+    with the rooms of each slot divided between them up front, using a
+    ProcessPoolExecutor when there is more than one component. Unless
+    `solver_options` sets `num_search_workers`, the cores are divided between the
+    worker processes, as in `scenarios.run_scenarios`.
+
+    Returns a (selected, report) tuple: the merged (p1_idx, p2_idx, t_idx) keys, and
+    one dict per component with its sizes, solver status, objective and timings.
+    Rooms still need to be assigned with `assign_rooms`.
+
+    `solver_options.max_time_in_seconds` is a wall-clock limit for the whole call,
+    shared out between the components of a worker's batch by size (see
+    `_solve_component_batch`); components without a solution in their share get
+    the greedy schedule (see `solve_component`), so every component is scheduled.
+    """
+    components = find_components(candidates)
+    capacities = divide_slot_capacity(components, num_rooms)
+    group_capacities = [None] * len(components)
+    if slot_overlaps is not None:
+        group_capacities = divide_slot_capacity(components, num_rooms, slot_overlaps)
+    previous = previous or set()
+    solver_options = solver_options or SolverOptions()
+    deadline = None
+    if solver_options.max_time_in_seconds is not None:
+        deadline = time.time() + solver_options.max_time_in_seconds
+
+    jobs = []
+    for component_idx, (component, slot_capacity, group_capacity) in enumerate(
+        zip(components, capacities, group_capacities)
+    ):
+        people = {p_idx for candidate in component for p_idx in candidate[:2]}
+        jobs.append((component_idx, {
+            'candidates': component,
+            'num_rooms': num_rooms,
+            'slot_capacity': slot_capacity,
+            'hint': None if hint is None else {key for key in hint if key[0] in people},
+            'previous': {key for key in previous if key[0] in people},
+            'stability_bonus': stability_bonus,
+            'solver_options': solver_options,
+            'deadline': deadline,
+            'slot_overlaps': slot_overlaps,
+            'group_capacity': group_capacity,
+        }))
+
+    max_workers = max_workers or os.cpu_count() or 1
+    if len(jobs) <= 1 or max_workers == 1:
+        results = _solve_component_batch(jobs)
+    else:
+        # Spread the components over one batch per worker, biggest first, so a large
+        # number of tiny components doesn't turn into a large number of tasks.
+        num_batches = min(max_workers, len(jobs))
+        if solver_options.num_search_workers is None:
+            # Each process would otherwise search with every core; share the cores out instead.
+            batch_options = replace(solver_options, num_search_workers=max((os.cpu_count() or 1) // num_batches, 1))
+            jobs = [(component_idx, dict(kwargs, solver_options=batch_options)) for component_idx, kwargs in jobs]
+        batches = [[] for _ in range(num_batches)]
+        batch_sizes = [0] * num_batches
+        for job in jobs:
+            lightest = batch_sizes.index(min(batch_sizes))
+            batches[lightest].append(job)
+            batch_sizes[lightest] += _component_size(job[1]['candidates'])
+        with ProcessPoolExecutor(max_workers=num_batches) as executor:
+            results = [result for batch in executor.map(_solve_component_batch, batches) for result in batch]
+
+    selected = []
+    report = []
+    for component_idx, result in sorted(results, key=lambda item: item[0]):
+        selected.extend(result.pop('selected'))
+        report.append(dict(result, component=component_idx))
+    return selected, report
@@ -0,0 +1,131 @@
+"""
+Instrumentation for the meeting scheduler.
+
+`ScheduleStats` collects what a single `solve_meeting_schedule` call did: the wall
+and CPU time of each phase, the problem and model sizes, the solver's outcome and
+the peak memory. `profiled` runs a block under cProfile and tracemalloc and writes
+both dumps to disk; the scheduler turns it on when asked to via the
+SCHEDULER_PROFILE environment variable or its `profile_path` argument.
+"""
+
+import contextlib
+import cProfile
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+# Environment variable holding a path prefix; when set, every scheduler run is profiled.
+PROFILE_ENV_VAR = 'SCHEDULER_PROFILE'
+
+
+@dataclass
+class ScheduleStats:
+    """Statistics for one scheduler run. Fields that don't apply to the engine used stay None."""
+    # {phase: {'wall': seconds, 'cpu': seconds}}, in the order the phases ran
+    phases: dict = field(default_factory=dict)
+    num_people: int = 0
+    num_slots: int = 0
+    num_rooms: int = 0
+    num_candidates: int = 0
+    num_meetings: int = 0
+    # Reported by the engine (see SchedulingEngine.last_stats)
+    engine: str = None
+    num_variables: int = 0
+    num_constraints: int = None
+    model_build_time: float = None
+    search_time: float = None
+    status: str = None
+    objective: float = None
+    best_bound: float = None
+    num_conflicts: int = None
+    num_branches: int = None
+    # Per-tier statistics of the tiered engine
+    tiers: list = None
+    # Peak resident set size of the process so far, and the largest of its finished child
+    # processes' (e.g. decomposed solves), in KiB
+    peak_rss_kb: int = None
+    children_peak_rss_kb: int = None
+    # Only filled in when the run was profiled
+    traced_peak_bytes: int = None
+    profile_files: list = field(default_factory=list)
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Times the enclosed block as phase `name`, in wall-clock and process CPU time."""
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            self.phases[name] = {'wall': time.perf_counter() - wall, 'cpu': time.process_time() - cpu}
+
+    def record_engine(self, engine_stats):
+        """Copies an engine's `last_stats` into these statistics."""
+        if not engine_stats:
+            return
+        self.engine = engine_stats['engine']
+        self.num_variables = engine_stats['num_variables']
+        self.num_constraints = engine_stats['num_constraints']
+        self.model_build_time = engine_stats['build_time']
+        self.search_time = engine_stats['solve_time']
+        for key in ('status', 'objective', 'best_bound', 'num_conflicts', 'num_branches'):
+            setattr(self, key, engine_stats[key])
+        self.tiers = engine_stats.get('tiers')
+
+    def as_dict(self):
+        return asdict(self)
+
+
+def peak_rss_kb():
+    """Peak resident set size of this process, in KiB (None if unknown)."""
+    return _max_rss_kb(resource.RUSAGE_SELF) if resource is not None else None
+
+
+def children_peak_rss_kb():
+    """
+    Largest peak resident set size among this process's finished, waited-for
+    children, in KiB (None if unknown). This is a maximum, not a total: it can't
+    be added to `peak_rss_kb`.
+    """
+    return _max_rss_kb(resource.RUSAGE_CHILDREN) if resource is not None else None
+
+
+def _max_rss_kb(who):
+    peak = resource.getrusage(who).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KiB elsewhere.
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+@contextlib.contextmanager
+def profiled(path, stats=None):
+    """
+    Runs the enclosed block under cProfile and tracemalloc, then writes the
+    profile to `<path>.prof` (load it with pstats or snakeviz) and the allocation
+    snapshot to `<path>.tracemalloc` (load it with tracemalloc.Snapshot.load).
+    If `stats` is given, the files and the traced peak memory are recorded on it.
+
+    Both tools slow the run down considerably, so only use this when investigating.
+    """
+    already_tracing = tracemalloc.is_tracing()
+    if not already_tracing:
+        tracemalloc.start()
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        snapshot = tracemalloc.take_snapshot()
+        _, traced_peak = tracemalloc.get_traced_memory()
+        if not already_tracing:
+            tracemalloc.stop()
+        profiler.dump_stats(f'{path}.prof')
+        snapshot.dump(f'{path}.tracemalloc')
+        if stats is not None:
+            stats.traced_peak_bytes = traced_peak
+            stats.profile_files = [f'{path}.prof', f'{path}.tracemalloc']
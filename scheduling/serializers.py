@@ -1,12 +1,17 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
-from .models import Profile, Meeting, Skill
+from .models import Profile, Meeting, Notification, ScheduleJob, Skill, TimeSlot
 
 class SkillSerializer(serializers.ModelSerializer):
     class Meta:
         model = Skill
         fields = ['name']
 
+class TimeSlotSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = TimeSlot
+        fields = ['id', 'start_time', 'end_time', 'description']
+
 class MeetingSerializer(serializers.ModelSerializer):
     """
     Serializer for the Meeting model, including the names of the participants.
@@ -20,6 +25,12 @@ class MeetingSerializer(serializers.ModelSerializer):
         model = Meeting
         fields = ['id', 'attendee1', 'attendee2', 'meeting_time', 'score']
 
+class NotificationSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Notification
+        fields = ['id', 'event_type', 'message', 'is_read', 'created_at']
+        read_only_fields = fields
+
 class ProfileSerializer(serializers.ModelSerializer):
     """
     Serializer for the user's profile, including their interests.
@@ -43,3 +54,29 @@ class ProfileSerializer(serializers.ModelSerializer):
             skill, _ = Skill.objects.get_or_create(name=name.strip())
             instance.interests.add(skill)
         return super().update(instance, validated_data)
+
+class ScheduleJobSerializer(serializers.ModelSerializer):
+    """
+    Serializer for submitting and polling background scheduling jobs.
+    Only the solver options can be set; everything else is filled in by the worker.
+    """
+    status = serializers.CharField(source='get_status_display', read_only=True)
+    requested_by = serializers.StringRelatedField()
+
+    class Meta:
+        model = ScheduleJob
+        fields = [
+            'id', 'status', 'options', 'requested_by', 'created_at', 'started_at', 'finished_at', 'heartbeat_at',
+            'phase_timings', 'best_objective', 'num_meetings', 'result', 'error',
+        ]
+        read_only_fields = [field for field in fields if field != 'options']
+
+    def validate_options(self, value):
+        # Imported here so the serializers don't pull in the solver stack at import time.
+        from .jobs import JOB_OPTIONS
+        if not isinstance(value, dict):
+            raise serializers.ValidationError("Options must be an object.")
+        unknown = set(value) - JOB_OPTIONS
+        if unknown:
+            raise serializers.ValidationError(f"Unknown options: {', '.join(sorted(unknown))}.")
+        return value
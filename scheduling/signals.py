@@ -0,0 +1,55 @@
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from .models import MeetingFeedback, UserRatingStats
+
+
+def add_rating(user_id, rating, delta=1):
+    """
+    Adds (delta=1) or removes (delta=-1) one rating received by a user in UserRatingStats.
+    Counts stop at zero: stats that drifted (see UserRatingStats) must never make
+    deleting real feedback fail.
+    """
+    changes = {
+        field: Greatest(F(field) + amount, 0)
+        for field, amount in [('count', delta), ('rating_sum', delta * rating), (f'stars_{rating}', delta)]
+    }
+    if not UserRatingStats.objects.filter(user_id=user_id).update(**changes) and delta > 0:
+        UserRatingStats.objects.get_or_create(user_id=user_id)
+        UserRatingStats.objects.filter(user_id=user_id).update(**changes)
+
+
+@receiver(pre_save, sender=MeetingFeedback)
+def remember_previous_rating(sender, instance, **kwargs):
+    """
+    Records the stored (reviewed user id, rating) of feedback that is about to be
+    updated, so it can be replaced. New feedback needs no query.
+    """
+    instance._previous_rating = None
+    if instance.pk is None:
+        return
+    stored = MeetingFeedback.objects.filter(pk=instance.pk).values_list(
+        'rating', 'reviewer_id', 'meeting__attendee1_id', 'meeting__attendee2_id'
+    ).first()
+    if stored is not None:
+        rating, reviewer_id, attendee1_id, attendee2_id = stored
+        instance._previous_rating = (attendee2_id if reviewer_id == attendee1_id else attendee1_id, rating)
+
+
+@receiver(post_save, sender=MeetingFeedback)
+def count_rating(sender, instance, created, **kwargs):
+    """Adds new feedback to the reviewed user's rating stats, or replaces the updated rating."""
+    previous = getattr(instance, '_previous_rating', None)
+    if not created and previous is not None:
+        add_rating(*previous, delta=-1)
+    add_rating(instance.reviewed_user_id, instance.rating)
+
+
+@receiver(post_delete, sender=MeetingFeedback)
+def discount_rating(sender, instance, **kwargs):
+    """
+    Removes deleted feedback from the reviewed user's rating stats. Feedback deleted
+    along with its meeting comes with the meeting loaded (see MeetingFeedbackManager).
+    """
+    add_rating(instance.reviewed_user_id, instance.rating, delta=-1)
@@ -0,0 +1,58 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from ..models import Room, Skill, TimeSlot, UserAvailability
+
+User = get_user_model()
+
+
+@pytest.fixture
+def make_event():
+    """
+    A fixture factory for small events. `make_event(num_rooms, interests, availability)`
+    creates two consecutive one-hour slots, `num_rooms` rooms and one user per
+    entry of `interests`, which maps usernames to the names of the skills they
+    like. `availability` maps usernames to the indices of the slots they marked;
+    users left out marked none. Returns the users (in the order given), slots and rooms.
+    """
+    def make(num_rooms, interests, availability):
+        now = timezone.now()
+        slots = [
+            TimeSlot.objects.create(start_time=now + timezone.timedelta(hours=i), end_time=now + timezone.timedelta(hours=i + 1))
+            for i in range(2)
+        ]
+        rooms = [Room.objects.create(name=f'Room {chr(ord("A") + i)}') for i in range(num_rooms)]
+        skills = {}
+        users = []
+        for username, skill_names in interests.items():
+            user = User.objects.create_user(username=username, password='password123')
+            for name in skill_names:
+                if name not in skills:
+                    skills[name] = Skill.objects.create(name=name)
+                user.profile.interests.add(skills[name])
+            users.append(user)
+        for user in users:
+            for t_idx in availability.get(user.username, ()):
+                UserAvailability.objects.create(user=user, time_slot=slots[t_idx])
+        return {'users': users, 'slots': slots, 'rooms': rooms}
+
+    return make
+
+
+@pytest.fixture
+def event_rooms():
+    """The number of rooms in `event_setup`; override it in a test module for a different event."""
+    return 2
+
+
+@pytest.fixture
+def event_setup(make_event, event_rooms):
+    """
+    A small event: two slots, `event_rooms` rooms and four attendees who all share
+    an interest. 'dana' is only available in the second slot.
+    """
+    return make_event(
+        event_rooms,
+        {username: ['Python'] for username in ['alice', 'bob', 'carol', 'dana']},
+        {'alice': [0, 1], 'bob': [0, 1], 'carol': [0, 1], 'dana': [1]},
+    )
@@ -1,3 +1,5 @@
+import base64
+import json
 import pytest
 from django.utils import timezone
 from django.urls import reverse
@@ -198,6 +200,130 @@ def test_get_meetings_returns_only_own_meetings(api_client, test_user, other_use
     assert {meeting1.id, meeting2.id} == response_meeting_ids
 
 
+@pytest.mark.parametrize('num_meetings', [1, 20])
+def test_meeting_list_runs_constant_queries(api_client, test_user, other_user, room, django_assert_num_queries, num_meetings):
+    """
+    GIVEN a user with one or many meetings
+    WHEN they list their meetings, with and without asking for a page
+    THEN the number of queries doesn't depend on the number of meetings.
+    """
+    for i in range(num_meetings):
+        ts = TimeSlot.objects.create(
+            start_time=timezone.now() + timezone.timedelta(hours=i),
+            end_time=timezone.now() + timezone.timedelta(hours=i + 1)
+        )
+        Meeting.objects.create(attendee1=test_user, attendee2=other_user, time_slot=ts, room=room)
+    api_client.force_authenticate(user=test_user)
+    url = reverse('meeting-list')
+
+    with django_assert_num_queries(2):  # The ETag validators and the meetings
+        response = api_client.get(url)
+    assert response.status_code == 200
+    assert len(response.data) == num_meetings
+    assert response.data[0]['attendee1'] == test_user.username
+
+    with django_assert_num_queries(2):  # Keyset pagination runs no COUNT(*)
+        response = api_client.get(url, {'page_size': 10})
+    assert len(response.data['results']) == min(num_meetings, 10)
+    assert (response.data['next'] is not None) == (num_meetings > 10)
+
+
+def test_meeting_list_cursor_pages_through_ties(api_client, test_user, other_user, room, django_assert_num_queries):
+    """
+    GIVEN meetings sharing a start time, across several time slots
+    WHEN the user follows the cursor from page to page
+    THEN every meeting is returned once, in (start time, id) order, each page in the same queries.
+    """
+    start = timezone.now()
+    meetings = []
+    for i in range(7):
+        ts = TimeSlot.objects.create(start_time=start + timezone.timedelta(hours=i % 3),
+                                     end_time=start + timezone.timedelta(hours=i % 3 + 1))
+        meetings.append(Meeting.objects.create(attendee1=test_user, attendee2=other_user, time_slot=ts, room=room))
+    expected = [m.id for m in sorted(meetings, key=lambda m: (m.time_slot.start_time, m.id))]
+    api_client.force_authenticate(user=test_user)
+
+    seen, url, params = [], reverse('meeting-list'), {'page_size': 3}
+    while url:
+        with django_assert_num_queries(2):  # The ETag validators and the page
+            response = api_client.get(url, params)
+        assert response.status_code == 200
+        seen += [meeting['id'] for meeting in response.data['results']]
+        url, params = response.data['next'], None
+    assert seen == expected
+
+    response = api_client.get(reverse('meeting-list'), {'cursor': 'not-a-cursor'})
+    assert response.status_code == 404
+    # Well-formed cursors holding values of the wrong type are rejected the same way.
+    for position in (['garbage', 'x'], [None, 1], [{}, 1]):
+        cursor = base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+        response = api_client.get(reverse('meeting-list'), {'cursor': cursor})
+        assert response.status_code == 404
+
+
+def test_meeting_list_conditional_get(api_client, test_user, other_user, room, django_assert_num_queries):
+    """
+    GIVEN a user who has fetched their meetings
+    WHEN they fetch them again with the ETag
+    THEN they get 304 from a single validator query until a meeting, its slot or an attendee's name changes.
+    """
+    ts = TimeSlot.objects.create(start_time=timezone.now(), end_time=timezone.now() + timezone.timedelta(hours=1))
+    meeting = Meeting.objects.create(attendee1=test_user, attendee2=other_user, time_slot=ts, room=room)
+    api_client.force_authenticate(user=test_user)
+    url = reverse('meeting-list')
+
+    response = api_client.get(url)
+    assert response.status_code == 200
+    etag = response['ETag']
+
+    with django_assert_num_queries(1):
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+    assert response['ETag'] == etag
+    assert not response.content
+
+    ts.end_time += timezone.timedelta(minutes=30)
+    ts.save()
+    response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    etag = response['ETag']
+
+    other_user.username = 'renamed'
+    other_user.save()
+    response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert 'renamed' in str(response.data)
+    etag = response['ETag']
+
+    meeting.delete()
+    response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response.data == []
+    # Another user's validators never match.
+    api_client.force_authenticate(user=other_user)
+    assert api_client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code == 200
+
+
+def test_profile_conditional_get(api_client, test_user):
+    """
+    GIVEN a user who has fetched their profile
+    WHEN they fetch it again with the ETag or Last-Modified
+    THEN they get 304 until the profile is updated.
+    """
+    api_client.force_authenticate(user=test_user)
+    url = reverse('profile')
+    response = api_client.get(url)
+    etag, last_modified = response['ETag'], response['Last-Modified']
+
+    assert api_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+    assert api_client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code == 304
+
+    api_client.patch(url, {'interest_names': ['Rust']}, format='json')
+    response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert [skill['name'] for skill in response.data['interests']] == ['Rust']
+
+
 def test_admin_can_create_skill(api_client, admin_user):
     """
     GIVEN an authenticated admin user
@@ -491,6 +617,33 @@ def test_email_sent_on_meeting_cancellation(api_client, test_user, other_user, t
     assert Notification.objects.filter(user=other_user, event_type=Notification.EventType.MEETING_CANCELLED).exists()
 
 
+def test_failed_repair_does_not_fail_cancellation(api_client, test_user, other_user, time_slot, room,
+                                                  monkeypatch, django_capture_on_commit_callbacks):
+    """
+    GIVEN a meeting between two users and a schedule repair that raises
+    WHEN one user cancels the meeting
+    THEN the repair runs after the cancel commits and the cancel still succeeds.
+    """
+    from .. import intelligent_scheduler
+
+    def broken_repair(*args, **kwargs):
+        raise RuntimeError("solver unavailable")
+
+    monkeypatch.setattr(intelligent_scheduler, 'repair_schedule', broken_repair)
+    meeting = Meeting.objects.create(
+        attendee1=test_user, attendee2=other_user, time_slot=time_slot, room=room
+    )
+
+    api_client.force_authenticate(user=test_user)
+    url = reverse('meeting-cancel', kwargs={'pk': meeting.pk})
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        response = api_client.post(url)
+
+    assert len(callbacks) == 1
+    assert response.status_code == 204
+    assert not Meeting.objects.filter(pk=meeting.pk).exists()
+
+
 def test_skill_merge_action_works(api_client, admin_user, test_user, other_user):
     """
     GIVEN an admin user, two skills, and users with one of those skills
@@ -654,6 +807,29 @@ def test_notification_sent_on_proposal_acceptance(api_client, test_user, other_u
     ).exists()
 
 
+def test_accept_proposal_refused_when_overlapping_meeting_exists(api_client, test_user, other_user, room):
+    """
+    GIVEN a proposal to move a meeting into a slot that overlaps another meeting of test_user
+    WHEN other_user accepts the proposal
+    THEN it is refused and the meeting stays where it was.
+    """
+    start = timezone.now() + timezone.timedelta(days=1)
+    original_slot = TimeSlot.objects.create(start_time=timezone.now(), end_time=timezone.now() + timezone.timedelta(hours=1))
+    proposed_slot = TimeSlot.objects.create(start_time=start, end_time=start + timezone.timedelta(hours=1))
+    overlapping_slot = TimeSlot.objects.create(start_time=start + timezone.timedelta(minutes=30), end_time=start + timezone.timedelta(minutes=60))
+    third_user = User.objects.create_user(username='thirduser', password='password123')
+    Meeting.objects.create(attendee1=test_user, attendee2=third_user, time_slot=overlapping_slot, room=room)
+    meeting = Meeting.objects.create(attendee1=test_user, attendee2=other_user, time_slot=original_slot, room=room)
+    proposal = MeetingRescheduleProposal.objects.create(meeting=meeting, proposer=test_user, proposed_time_slot=proposed_slot)
+
+    api_client.force_authenticate(user=other_user)
+    response = api_client.post(reverse('reschedule-proposal-accept', kwargs={'pk': proposal.pk}))
+
+    assert response.status_code == 400
+    meeting.refresh_from_db()
+    assert meeting.time_slot == original_slot
+
+
 def test_my_proposals_viewset_returns_sent_and_received(api_client, test_user, other_user, room):
     """
     GIVEN a user has sent one proposal and received another
@@ -1095,6 +1271,45 @@ def test_notification_viewset_workflow(api_client, test_user, other_user):
     assert test_user.notifications.filter(is_read=False).count() == 0
 
 
+def test_notification_list_cursor_is_newest_first(api_client, test_user):
+    """
+    GIVEN more notifications than fit on a page, some created at the same instant
+    WHEN the user pages through them
+    THEN they come newest first with ties broken by id, and no page is repeated.
+    """
+    notifications = Notification.objects.bulk_create([
+        Notification(user=test_user, event_type='SCH_UPD', message=f'Update {i}') for i in range(5)
+    ])
+    Notification.objects.filter(id__in=[n.id for n in notifications[:3]]).update(created_at=timezone.now())
+    expected = list(Notification.objects.filter(user=test_user).order_by('-created_at', 'id').values_list('id', flat=True))
+    api_client.force_authenticate(user=test_user)
+
+    seen, url, params = [], reverse('notification-list'), {'page_size': 2}
+    while url:
+        response = api_client.get(url, params)
+        seen += [notification['id'] for notification in response.data['results']]
+        url, params = response.data['next'], None
+    assert seen == expected
+
+
+def test_notification_list_conditional_get(api_client, test_user):
+    """
+    GIVEN a user who has fetched their notifications
+    WHEN they fetch them again with the ETag
+    THEN they get 304 until a notification arrives or is marked as read.
+    """
+    Notification.objects.create(user=test_user, event_type='SCH_UPD', message='Updated.')
+    api_client.force_authenticate(user=test_user)
+    url = reverse('notification-list')
+    etag = api_client.get(url)['ETag']
+    assert api_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+    api_client.post(reverse('notification-mark-all-as-read'))
+    response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response.data['results'][0]['is_read']
+
+
 def test_snooze_notifications_workflow(api_client, test_user, other_user, room):
     """
     Tests the full workflow for snoozing and unsnoozing notifications.
@@ -1151,4 +1366,48 @@ def test_blocked_users_list_in_profile(api_client, test_user, other_user):
     assert response.status_code == 200
     assert 'blocked_users' in response.data
     assert len(response.data['blocked_users']) == 1
-    assert response.data['blocked_users'][0]['username'] == other_user.username
\ No newline at end of file
+    assert response.data['blocked_users'][0]['username'] == other_user.username
+
+def test_common_availability_view(api_client, test_user, other_user):
+    """
+    GIVEN two users whose availability overlaps in some slots
+    WHEN one asks when they are both free
+    THEN only the shared slots are returned, in start time order.
+    """
+    now = timezone.now()
+    slots = [
+        TimeSlot.objects.create(start_time=now + timezone.timedelta(hours=i), end_time=now + timezone.timedelta(hours=i + 1))
+        for i in range(3)
+    ]
+    for slot in slots:
+        UserAvailability.objects.create(user=test_user, time_slot=slot)
+    for slot in [slots[2], slots[0]]:
+        UserAvailability.objects.create(user=other_user, time_slot=slot)
+
+    api_client.force_authenticate(user=test_user)
+    response = api_client.get(reverse('common-availability', kwargs={'user_id': other_user.id}))
+
+    assert response.status_code == 200
+    assert response.data['user'] == other_user.username
+    assert [slot['id'] for slot in response.data['time_slots']] == [slots[0].id, slots[2].id]
+
+    response = api_client.get(reverse('common-availability', kwargs={'user_id': 999999}))
+    assert response.status_code == 404
+
+
+@pytest.mark.parametrize('blocker', ['other', 'requester'])
+def test_common_availability_hidden_between_blocked_users(api_client, test_user, other_user, blocker):
+    """
+    GIVEN two users where one has blocked the other
+    WHEN either asks when they are both free
+    THEN the other user is not found, so their availability doesn't leak.
+    """
+    if blocker == 'other':
+        other_user.profile.blocked_users.add(test_user.profile)
+    else:
+        test_user.profile.blocked_users.add(other_user.profile)
+
+    api_client.force_authenticate(user=test_user)
+    response = api_client.get(reverse('common-availability', kwargs={'user_id': other_user.id}))
+
+    assert response.status_code == 404
@@ -0,0 +1,69 @@
+import json
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from ..models import Profile, Room, TimeSlot
+
+pytest.importorskip('ortools')
+
+from ..benchmarks.runner import run_benchmarks  # noqa: E402
+
+# Marks all tests in this file as needing database access
+pytestmark = pytest.mark.django_db
+
+
+def test_benchmark_command_writes_json_and_rolls_back(tmp_path):
+    """
+    GIVEN an empty database
+    WHEN the scheduler benchmarks run on two small sizes
+    THEN every (size, engine) result is written as JSON and the generated events are rolled back.
+    """
+    output = tmp_path / 'bench.json'
+
+    call_command(
+        'benchmark_scheduler', '--sizes', '12x2x2,20x3x3', '--engines', 'cpsat,matching',
+        '--max-time', '5', '--label', 'test', '--output', str(output),
+    )
+
+    report = json.loads(output.read_text())
+    assert report['metadata']['label'] == 'test'
+    results = report['results']
+    assert [(r['size']['num_people'], r['engine']) for r in results] == [
+        (12, 'cpsat'), (12, 'matching'), (20, 'cpsat'), (20, 'matching'),
+    ]
+    for result in results:
+        assert result['rows']['people'] == result['size']['num_people']
+        assert result['status'] in ('OPTIMAL', 'FEASIBLE')
+        assert result['num_variables'] > 0 and result['load_time'] >= 0 and result['solve_time'] >= 0
+    assert all(r['num_constraints'] > 0 for r in results if r['engine'] == 'cpsat')
+    assert not TimeSlot.objects.exists() and not Room.objects.exists() and not Profile.objects.exists()
+
+
+def test_benchmark_command_refuses_existing_event():
+    """
+    GIVEN a database that already holds an event
+    WHEN the benchmarks are run
+    THEN they refuse to mix the generated event with it.
+    """
+    Room.objects.create(name='Room A')
+
+    with pytest.raises(CommandError, match='empty database'):
+        call_command('benchmark_scheduler', '--sizes', '10x2x2')
+
+
+def test_benchmark_skips_configurations_above_their_size_cap():
+    """
+    GIVEN an engine configuration capped at fewer people than the event has
+    WHEN the benchmarks run
+    THEN that configuration is recorded as skipped instead of being solved.
+    """
+    report = run_benchmarks(
+        sizes=[{'num_people': 12, 'num_slots': 2, 'num_rooms': 2}],
+        engines=[{'name': 'capped', 'engine': 'cpsat', 'max_people': 10}, {'name': 'matching', 'engine': 'matching'}],
+        max_time_in_seconds=5,
+    )
+
+    capped, matching = report['results']
+    assert capped['skipped'] == 'more than 10 people' and 'status' not in capped
+    assert matching['status'] == 'FEASIBLE'
+    assert matching['peak_rss_kb'] > 0
@@ -0,0 +1,84 @@
+from io import StringIO
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.utils import timezone
+from ..models import Meeting, TimeSlot
+
+# Marks all tests in this file as needing database access
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def event_setup(make_event):
+    """
+    Two slots and two rooms. alice, bob and carol like Python; dana likes Go and
+    erin likes nothing. carol is only available in the second slot.
+    """
+    event = make_event(
+        2, {'alice': ['Python'], 'bob': ['Python'], 'carol': ['Python'], 'dana': ['Go'], 'erin': []}, {'carol': [1]}
+    )
+    return dict(event, users={user.username: user for user in event['users']})
+
+
+def test_generate_meetings_books_free_cells_for_pairs_sharing_interests(event_setup):
+    """
+    GIVEN users sharing an interest, one pair of whom already meets
+    WHEN meetings are generated
+    THEN other pairs get a meeting in a free room of a slot both are available and
+    free in, if there is one, and the existing meeting is left alone.
+    """
+    users, slots = event_setup['users'], event_setup['slots']
+    Meeting.objects.create(attendee1=users['bob'], attendee2=users['alice'], time_slot=slots[0], room=event_setup['rooms'][0])
+
+    out = StringIO()
+    call_command('generate_meetings', '--batch-size', '1', '--progress-every', '1', stdout=out)
+
+    meetings = {(m.attendee1.username, m.attendee2.username): m for m in Meeting.objects.select_related('attendee1', 'attendee2')}
+    # carol is only available in the second slot, where there is room for only one of her pairs.
+    assert set(meetings) == {('bob', 'alice'), ('alice', 'carol')}
+    assert meetings['alice', 'carol'].time_slot == slots[1]
+    assert meetings['alice', 'carol'].room == event_setup['rooms'][0]
+    assert "Processed 3/3 pairs" in out.getvalue()
+    assert "Created 1 meetings; 1 pairs already had one and 1 could not be placed" in out.getvalue()
+
+
+def test_generate_meetings_dry_run_saves_nothing(event_setup):
+    """
+    GIVEN users sharing an interest
+    WHEN meetings are generated with --dry-run
+    THEN the planned meetings are reported but not saved.
+    """
+    out = StringIO()
+    call_command('generate_meetings', '--dry-run', stdout=out)
+
+    assert "Would create" in out.getvalue()
+    assert not Meeting.objects.exists()
+
+
+def test_generate_meetings_skips_blocked_pairs_and_overlapping_rooms(event_setup):
+    """
+    GIVEN alice blocking bob, and room A in use in a slot overlapping the second one
+    WHEN meetings are generated with progress reports turned off
+    THEN alice and bob are never paired, carol's meeting avoids room A and no
+    progress is reported.
+    """
+    users, slots, rooms = event_setup['users'], event_setup['slots'], event_setup['rooms']
+    users['alice'].profile.blocked_users.add(users['bob'].profile)
+    inner = TimeSlot.objects.create(
+        start_time=slots[1].start_time + timezone.timedelta(minutes=15),
+        end_time=slots[1].start_time + timezone.timedelta(minutes=45),
+    )
+    Meeting.objects.create(attendee1=users['dana'], attendee2=users['erin'], time_slot=inner, room=rooms[0])
+
+    out = StringIO()
+    call_command('generate_meetings', '--progress-every', '0', stdout=out)
+
+    meetings = {(m.attendee1.username, m.attendee2.username): m for m in Meeting.objects.select_related('attendee1', 'attendee2')}
+    assert set(meetings) == {('dana', 'erin'), ('alice', 'carol')}
+    assert meetings['alice', 'carol'].time_slot == slots[1]
+    assert meetings['alice', 'carol'].room == rooms[1]
+    assert "Processed" not in out.getvalue()
+
+    with pytest.raises(CommandError):
+        call_command('generate_meetings', '--progress-every', '-1', stdout=StringIO())
@@ -0,0 +1,178 @@
+import time
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from ..models import Meeting, Room, ScheduleJob, Skill, TimeSlot, UserAvailability
+
+pytest.importorskip('ortools')
+
+from .. import jobs  # noqa: E402
+from ..jobs import JOB_LEASE, claim_next_job  # noqa: E402
+
+User = get_user_model()
+
+# Marks all tests in this file as needing database access
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def api_client():
+    """A fixture to provide an API client instance."""
+    return APIClient()
+
+
+@pytest.fixture
+def admin_user():
+    """A fixture to create a user with admin privileges."""
+    return User.objects.create_superuser(username='adminuser', password='password123', email='admin@example.com')
+
+
+@pytest.fixture
+def small_event():
+    """A fixture to create one slot, one room and two attendees who share an interest."""
+    now = timezone.now()
+    slot = TimeSlot.objects.create(start_time=now, end_time=now + timezone.timedelta(hours=1))
+    Room.objects.create(name='Room A')
+    python = Skill.objects.create(name='Python')
+    for username in ['alice', 'bob']:
+        user = User.objects.create_user(username=username, password='password123')
+        user.profile.interests.add(python)
+        UserAvailability.objects.create(user=user, time_slot=slot)
+
+
+def test_submit_and_poll_schedule_job(api_client, admin_user):
+    """
+    GIVEN an organizer
+    WHEN they submit a scheduling job and poll it
+    THEN the job is queued, a second submission is refused and the job can be polled.
+    """
+    api_client.force_authenticate(user=admin_user)
+    url = reverse('schedule-job-list')
+
+    response = api_client.post(url, {'options': {'engine': 'matching'}}, format='json')
+    assert response.status_code == 201
+    assert response.data['status'] == 'Queued'
+    job_id = response.data['id']
+
+    response = api_client.post(url, {'options': {}}, format='json')
+    assert response.status_code == 409
+    assert response.data['job'] == job_id
+
+    response = api_client.get(reverse('schedule-job-detail', kwargs={'pk': job_id}))
+    assert response.status_code == 200
+    assert response.data['options'] == {'engine': 'matching'}
+
+
+def test_submit_schedule_job_validation_and_permissions(api_client, admin_user):
+    """
+    GIVEN a non-admin user and an organizer
+    WHEN they submit jobs
+    THEN the non-admin is refused and unknown options are rejected.
+    """
+    url = reverse('schedule-job-list')
+    api_client.force_authenticate(user=User.objects.create_user(username='attendee', password='password123'))
+    assert api_client.post(url, {'options': {}}, format='json').status_code == 403
+
+    api_client.force_authenticate(user=admin_user)
+    response = api_client.post(url, {'options': {'delete_everything': True}}, format='json')
+    assert response.status_code == 400
+    assert not ScheduleJob.objects.exists()
+
+
+def test_worker_runs_queued_job(small_event):
+    """
+    GIVEN a queued job
+    WHEN the worker command runs once
+    THEN the schedule is persisted and the job records its outcome and timings.
+    """
+    job = ScheduleJob.objects.create(options={'max_time_in_seconds': 10})
+
+    call_command('run_schedule_jobs', '--once')
+
+    job.refresh_from_db()
+    assert job.status == ScheduleJob.Status.SUCCEEDED
+    assert job.num_meetings == Meeting.objects.count() == 1
+    assert job.best_objective is not None
+    assert set(job.phase_timings) == {'load', 'candidates', 'solve', 'extract', 'persist'}
+    assert set(job.phase_timings['solve']) == {'wall', 'cpu'}
+    assert job.result['created'] == 1
+    assert job.started_at and job.finished_at
+
+
+def test_only_one_job_runs_at_a_time():
+    """
+    GIVEN a running job and a queued job
+    WHEN a worker tries to claim a job
+    THEN nothing is claimed until the running job has finished.
+    """
+    running = ScheduleJob.objects.create(status=ScheduleJob.Status.RUNNING)
+    queued = ScheduleJob.objects.create()
+
+    assert claim_next_job() is None
+
+    running.status = ScheduleJob.Status.SUCCEEDED
+    running.save()
+    assert claim_next_job() == queued
+    queued.refresh_from_db()
+    assert queued.status == ScheduleJob.Status.RUNNING
+
+
+def test_job_of_dead_worker_is_failed_and_queue_moves_on(api_client, admin_user):
+    """
+    GIVEN a running job whose worker stopped sending heartbeats longer ago than the lease
+    WHEN a worker looks for a job, or an organizer submits one
+    THEN the stale job is failed and the queue is no longer blocked.
+    """
+    stale = timezone.now() - timezone.timedelta(seconds=JOB_LEASE + 1)
+    dead = ScheduleJob.objects.create(status=ScheduleJob.Status.RUNNING, started_at=stale, heartbeat_at=stale)
+    alive = timezone.now()
+    ScheduleJob.objects.create(status=ScheduleJob.Status.SUCCEEDED, started_at=stale, heartbeat_at=alive)
+
+    api_client.force_authenticate(user=admin_user)
+    response = api_client.post(reverse('schedule-job-list'), {'options': {}}, format='json')
+    assert response.status_code == 201
+    dead.refresh_from_db()
+    assert dead.status == ScheduleJob.Status.FAILED
+    assert "stopped responding" in dead.error
+
+    job = claim_next_job()
+    assert job.pk == response.data['id']
+    assert job.heartbeat_at is not None
+
+
+@pytest.mark.django_db(transaction=True)
+def test_heartbeat_thread_writes_buffered_progress(monkeypatch):
+    """
+    GIVEN a running job whose progress callback only updates it in memory
+    WHEN the heartbeat thread ticks
+    THEN it writes the best objective and the heartbeat to the job row.
+    """
+    monkeypatch.setattr(jobs, 'PROGRESS_INTERVAL', 0.01)
+    monkeypatch.setattr(jobs, 'HEARTBEAT_INTERVAL', 0)
+    job = ScheduleJob.objects.create(status=ScheduleJob.Status.RUNNING)
+
+    with jobs._heartbeat(job):
+        job.best_objective = 42.0
+        time.sleep(0.2)
+
+    job.refresh_from_db()
+    assert job.best_objective == 42.0
+    assert job.heartbeat_at is not None
+
+
+def test_failed_solve_leaves_schedule_untouched():
+    """
+    GIVEN a queued job for an event with no attendees
+    WHEN the worker runs it
+    THEN the job fails without touching the existing meetings.
+    """
+    job = ScheduleJob.objects.create()
+
+    call_command('run_schedule_jobs', '--once')
+
+    job.refresh_from_db()
+    assert job.status == ScheduleJob.Status.FAILED
+    assert "did not find a schedule" in job.error
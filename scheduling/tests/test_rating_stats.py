@@ -0,0 +1,118 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.utils import timezone
+from ..models import Meeting, MeetingFeedback, Room, TimeSlot, UserRatingStats
+
+User = get_user_model()
+
+# Marks all tests in this file as needing database access
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def meetings():
+    """Two meetings in different slots: alice with bob, and carol with alice."""
+    alice, bob, carol = (User.objects.create_user(username=name, password='password123') for name in ['alice', 'bob', 'carol'])
+    room = Room.objects.create(name='Room A')
+    now = timezone.now()
+    slots = [
+        TimeSlot.objects.create(start_time=now + timezone.timedelta(hours=i), end_time=now + timezone.timedelta(hours=i + 1))
+        for i in range(2)
+    ]
+    return {
+        'users': (alice, bob, carol),
+        'meetings': (
+            Meeting.objects.create(attendee1=alice, attendee2=bob, time_slot=slots[0], room=room),
+            Meeting.objects.create(attendee1=carol, attendee2=alice, time_slot=slots[1], room=room),
+        ),
+    }
+
+
+def _stats(user):
+    stats = UserRatingStats.objects.get(user=user)
+    return stats.count, stats.rating_sum, [stats.stars_1, stats.stars_2, stats.stars_3, stats.stars_4, stats.stars_5]
+
+
+def test_rating_stats_follow_feedback_changes(meetings):
+    """
+    GIVEN feedback that is created, changed and deleted
+    WHEN the rating stats are read after each change
+    THEN they always count the ratings the reviewed user received.
+    """
+    alice, bob, carol = meetings['users']
+    first, second = meetings['meetings']
+
+    by_bob = MeetingFeedback.objects.create(meeting=first, reviewer=bob, rating=5)
+    MeetingFeedback.objects.create(meeting=second, reviewer=carol, rating=2)
+    MeetingFeedback.objects.create(meeting=first, reviewer=alice, rating=4)
+    assert _stats(alice) == (2, 7, [0, 1, 0, 0, 1])
+    assert _stats(bob) == (1, 4, [0, 0, 0, 1, 0])
+
+    by_bob.rating = 3
+    by_bob.save()
+    assert _stats(alice) == (2, 5, [0, 1, 1, 0, 0])
+    assert UserRatingStats.objects.get(user=alice).average == 2.5
+
+    by_bob.delete()
+    second.delete()  # Cascades to carol's feedback
+    assert _stats(alice) == (0, 0, [0, 0, 0, 0, 0])
+    assert _stats(bob) == (1, 4, [0, 0, 0, 1, 0])
+
+
+def test_deleting_meetings_updates_rating_stats_without_refetching_meetings(meetings, django_assert_num_queries):
+    """
+    GIVEN two meetings with feedback from both attendees
+    WHEN the meetings are deleted together
+    THEN the stats lose every rating, and the feedback's meetings are not fetched one by one.
+    """
+    alice, bob, carol = meetings['users']
+    first, second = meetings['meetings']
+    for meeting, reviewers in [(first, (alice, bob)), (second, (carol, alice))]:
+        for reviewer in reviewers:
+            MeetingFeedback.objects.create(meeting=meeting, reviewer=reviewer, rating=4)
+
+    # Collect the meetings, then their feedback and proposals; one stats update per
+    # feedback; delete the feedback, then the meetings.
+    with django_assert_num_queries(3 + 4 + 2):
+        Meeting.objects.filter(pk__in=[first.pk, second.pk]).delete()
+
+    assert [_stats(user)[0] for user in (alice, bob, carol)] == [0, 0, 0]
+
+
+def test_drifted_rating_stats_never_block_deletes(meetings):
+    """
+    GIVEN feedback bulk-created past the signals, so the stats don't count it
+    WHEN the meeting is deleted along with its feedback
+    THEN the delete succeeds and the stats stop at zero.
+    """
+    alice, bob, carol = meetings['users']
+    first, second = meetings['meetings']
+    MeetingFeedback.objects.create(meeting=second, reviewer=carol, rating=2)
+    MeetingFeedback.objects.bulk_create([MeetingFeedback(meeting=first, reviewer=bob, rating=3)])
+
+    first.delete()
+
+    assert not Meeting.objects.filter(pk=first.pk).exists()
+    assert _stats(alice) == (0, 0, [0, 1, 0, 0, 0])
+
+
+def test_rebuild_rating_stats_command_repairs_and_verifies(meetings):
+    """
+    GIVEN rating stats that drifted from the feedback through a bulk update
+    WHEN the stats are verified, then rebuilt
+    THEN the drift is reported, and the rebuilt stats match the feedback.
+    """
+    alice, bob, _ = meetings['users']
+    first, _ = meetings['meetings']
+    MeetingFeedback.objects.create(meeting=first, reviewer=bob, rating=5)
+    MeetingFeedback.objects.filter(reviewer=bob).update(rating=1)  # Bypasses the signals
+
+    with pytest.raises(CommandError, match='inconsistent for 1 users'):
+        call_command('rebuild_rating_stats', '--verify-only')
+
+    call_command('rebuild_rating_stats')
+    assert _stats(alice) == (1, 1, [1, 0, 0, 0, 0])
+    assert not UserRatingStats.objects.filter(user=bob).exists()
+    call_command('rebuild_rating_stats', '--verify-only')
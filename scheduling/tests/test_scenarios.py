@@ -0,0 +1,65 @@
+import json
+from io import StringIO
+import pytest
+from django.core.management import call_command
+from ..models import Meeting, Room, TimeSlot
+
+pytest.importorskip('ortools')
+
+from ..intelligent_scheduler import load_schedule_data  # noqa: E402
+from ..scenarios import Scenario, apply_scenario  # noqa: E402
+
+# Marks all tests in this file as needing database access
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def event_rooms():
+    """The scenarios start from an event with a single room."""
+    return 1
+
+
+def test_apply_scenario_changes_the_loaded_event(event_setup):
+    """
+    GIVEN the loaded event
+    WHEN a scenario adds a room and a slot, removes a slot and drops a person
+    THEN only the in-memory copy changes, with the added slot copying the remaining one.
+    """
+    users, slots = event_setup['users'], event_setup['slots']
+    data = load_schedule_data(load_previous=False)
+
+    changed = apply_scenario(data, Scenario(
+        'what-if', add_rooms=1, add_slots=1, remove_slots=1, drop_user_ids=[users[0].id],
+    ))
+
+    assert changed.person_ids.tolist() == [user.id for user in users[1:]]
+    assert changed.slot_ids.tolist() == [slots[0].id, -1]
+    assert changed.num_rooms == 2
+    assert changed.availability_lists() == [[0, 1], [0, 1], []]
+    assert changed.interest_indptr.tolist() == [0, 1, 2, 3]
+    assert data.num_people == 4 and data.num_slots == 2 and data.num_rooms == 1
+
+
+def test_plan_capacity_command_compares_scenarios(event_setup):
+    """
+    GIVEN a small event
+    WHEN scenarios with more rooms, more slots and no rooms are run in a process pool
+    THEN each gets a row compared against the baseline and the database is untouched.
+    """
+    out = StringIO()
+    call_command(
+        'plan_capacity', '--scenario', 'more-rooms:add_rooms=1', '--scenario', 'more-slots:add_slots=2',
+        '--scenario', 'no-rooms:remove_rooms=1', '--workers', '2', '--max-time', '5', '--json', stdout=out,
+    )
+
+    rows = {row['scenario']: row for row in json.loads(out.getvalue())}
+    assert list(rows) == ['baseline', 'more-rooms', 'more-slots', 'no-rooms']
+    assert rows['baseline']['num_meetings'] == 2 and rows['baseline']['delta'] == 0
+    assert rows['more-rooms']['num_meetings'] == 3 and rows['more-rooms']['delta'] > 0
+    assert rows['more-slots']['num_slots'] == 4 and rows['more-slots']['num_meetings'] == 4
+    assert rows['no-rooms']['num_meetings'] == 0 and rows['no-rooms']['delta'] < 0
+    assert Room.objects.count() == 1 and TimeSlot.objects.count() == 2 and not Meeting.objects.exists()
+
+    table = StringIO()
+    call_command('plan_capacity', '--scenario', 'more-rooms:add_rooms=1', '--workers', '1', stdout=table)
+    assert table.getvalue().splitlines()[0].split()[:2] == ['Scenario', 'People']
@@ -0,0 +1,697 @@
+import time
+from string import Template
+import numpy as np
+import pytest
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+from ..models import (Meeting, MeetingFeedback, MeetingRescheduleProposal, Notification, Profile, Room, Skill,
+                      TimeSlot, UserAvailability, UserRatingStats)
+
+pytest.importorskip('ortools')
+
+from ..scheduler_engines import MatchingEngine, SchedulingProblem, get_engine  # noqa: E402
+from ..scheduler_stats import ScheduleStats  # noqa: E402
+from ..utils import calculate_average_ratings_for_users, notify_many  # noqa: E402
+from ..intelligent_scheduler import (build_score_matrix, build_scheduling_problem,  # noqa: E402
+                                     calculate_interest_score, find_top_k_candidates, load_schedule_data,
+                                     persist_schedule, repair_schedule, solve_meeting_schedule)
+from ..scheduler_model import (SlotOverlapIndex, SolverOptions, assign_rooms, build_pair_slot_model,  # noqa: E402
+                               build_sparse_model, divide_slot_capacity, find_candidate_pairs,
+                               find_components, mask_to_slots, slots_to_mask, solve_component, solve_decomposed)
+
+User = get_user_model()
+
+# Marks all tests in this file as needing database access
+pytestmark = pytest.mark.django_db
+
+
+def test_find_candidate_pairs_skips_infeasible_pairs():
+    """
+    GIVEN availability, a blocked pair and a scorer
+    WHEN candidate pairs are generated
+    THEN only unblocked pairs sharing a slot with a positive score are kept.
+    """
+    availability = [slots_to_mask(slots) for slots in [[0, 1], [1], [0], [0, 1]]]
+    blocked_pairs = {(0, 3)}
+    scores = {(0, 1): 2.0, (0, 2): 0.0, (0, 3): 5.0, (1, 2): 4.0, (1, 3): 1.5, (2, 3): 3.0}
+
+    candidates = find_candidate_pairs(availability, blocked_pairs, scores)
+
+    assert candidates == [(0, 1, 20, [1]), (1, 3, 15, [1]), (2, 3, 30, [0])]
+
+
+def test_availability_bitmasks_round_trip():
+    """
+    GIVEN slot indices, including ones beyond a 64-bit word
+    WHEN they are packed into bitmasks
+    THEN the shared slots of two people come back from a single AND, lowest first.
+    """
+    alice = slots_to_mask([0, 3, 70, 130])
+    bob = slots_to_mask([3, 5, 130])
+
+    assert mask_to_slots(alice) == [0, 3, 70, 130]
+    assert mask_to_slots(alice & bob) == [3, 130]
+    assert mask_to_slots(slots_to_mask([])) == []
+
+
+def test_slot_overlap_index_finds_maximal_conflict_groups():
+    """
+    GIVEN slots where an hour-long block overlaps two half-hour slots that only touch
+    WHEN the overlap index is built
+    THEN each maximal group of overlapping slots is found once and touching slots don't conflict.
+    """
+    index = SlotOverlapIndex([('block', 0, 60), ('first', 0, 30), ('second', 30, 60), ('later', 60, 90),
+                              ('empty', 45, 45)])
+
+    assert sorted(map(sorted, index.groups)) == [['block', 'first'], ['block', 'second'], ['empty'], ['later']]
+    assert index.overlapping('block') == {'block', 'first', 'second'}
+    assert index.overlapping('first') == {'block', 'first'}
+    assert index.overlapping('later') == {'later'}
+    assert index.has_overlaps
+
+
+def test_build_sparse_model_only_creates_feasible_variables():
+    """
+    GIVEN two candidate pairs
+    WHEN the sparse model is built
+    THEN there is one variable per shared slot and room, and nothing else.
+    """
+    candidates = [(0, 1, 20, [1]), (2, 3, 30, [0, 1])]
+
+    model, meet = build_sparse_model(candidates, num_rooms=2)
+
+    assert set(meet) == {
+        (0, 1, 1, 0), (0, 1, 1, 1),
+        (2, 3, 0, 0), (2, 3, 0, 1), (2, 3, 1, 0), (2, 3, 1, 1),
+    }
+    assert len(model.Proto().variables) == len(meet)
+
+
+def test_solve_meeting_schedule_respects_constraints(event_setup):
+    """
+    GIVEN attendees with shared interests, one of whom has blocked another
+    WHEN the schedule is solved
+    THEN no one is double-booked, rooms are not shared, blocked and unavailable pairs never meet.
+    """
+    alice, bob, carol, dana = event_setup['users']
+    alice.profile.blocked_users.add(bob.profile)
+
+    meetings = solve_meeting_schedule()
+
+    assert meetings
+    seen_person_slots = set()
+    seen_room_slots = set()
+    for meeting in meetings:
+        pair = {meeting['attendee1'], meeting['attendee2']}
+        assert pair != {alice, bob}
+        for person in pair:
+            assert (person, meeting['time_slot']) not in seen_person_slots
+            seen_person_slots.add((person, meeting['time_slot']))
+            assert UserAvailability.objects.filter(user=person, time_slot=meeting['time_slot']).exists()
+        assert (meeting['room'], meeting['time_slot']) not in seen_room_slots
+        seen_room_slots.add((meeting['room'], meeting['time_slot']))
+
+
+def test_solve_meeting_schedule_with_no_rooms_returns_empty(event_setup):
+    """
+    GIVEN an event without any rooms
+    WHEN the schedule is solved
+    THEN no meetings are returned.
+    """
+    Room.objects.all().delete()
+    assert solve_meeting_schedule() == []
+
+
+def test_two_stage_mode_matches_full_model(event_setup):
+    """
+    GIVEN a small event
+    WHEN the schedule is solved with and without the two-stage formulation
+    THEN both reach the same total score and two-stage rooms are never double-booked.
+    """
+    full = solve_meeting_schedule()
+    two_stage = solve_meeting_schedule(two_stage=True)
+
+    assert sum(m['score'] for m in two_stage) == pytest.approx(sum(m['score'] for m in full))
+    assert set(two_stage[0]) == {'attendee1', 'attendee2', 'time_slot', 'room', 'score'}
+    assert isinstance(two_stage[0]['attendee1'], User) and isinstance(two_stage[0]['room'], Room)
+    room_slots = [(m['room'], m['time_slot']) for m in two_stage]
+    assert len(room_slots) == len(set(room_slots))
+
+
+def test_build_pair_slot_model_drops_the_room_dimension():
+    """
+    GIVEN candidate pairs
+    WHEN the pair x slot model is built and its selection assigned to rooms
+    THEN there is one variable per pair and shared slot, and rooms are handed out in order.
+    """
+    candidates = [(0, 1, 20, [1]), (2, 3, 30, [0, 1])]
+
+    model, meet = build_pair_slot_model(candidates, num_rooms=2)
+
+    assert set(meet) == {(0, 1, 1), (2, 3, 0), (2, 3, 1)}
+    assert assign_rooms([(2, 3, 1), (0, 1, 1)], num_rooms=2) == [(0, 1, 1, 0), (2, 3, 1, 1)]
+    with pytest.raises(ValueError):
+        assign_rooms([(2, 3, 1), (0, 1, 1)], num_rooms=1)
+
+
+def test_score_matrix_matches_scalar_scorer():
+    """
+    GIVEN attendees with overlapping interests, mentor/mentee roles and ratings
+    WHEN the batched score matrix is built
+    THEN every upper-triangular entry equals calculate_interest_score for that pair.
+    """
+    attendees_data = {
+        0: {'interests': ['Python', 'Django'], 'role': Profile.Role.MENTOR, 'avg_rating_received': 4.5},
+        1: {'interests': ['Python'], 'role': Profile.Role.MENTEE, 'avg_rating_received': 3.0},
+        2: {'interests': ['React', 'Django', 'Python'], 'role': Profile.Role.ATTENDEE, 'avg_rating_received': 1.25},
+        3: {'interests': [], 'role': Profile.Role.MENTEE, 'avg_rating_received': 5.0},
+    }
+
+    skills = {'Python': 0, 'Django': 1, 'React': 2}
+    interests = [sorted(skills[name] for name in attendees_data[p_idx]['interests']) for p_idx in range(4)]
+    score_matrix = build_score_matrix(
+        np.cumsum([0] + [len(person_interests) for person_interests in interests]),
+        np.array([skill_idx for person_interests in interests for skill_idx in person_interests], dtype=np.int32),
+        [attendees_data[p_idx]['role'] for p_idx in range(4)],
+        [attendees_data[p_idx]['avg_rating_received'] for p_idx in range(4)],
+    )
+
+    for p1_idx in range(4):
+        for p2_idx in range(4):
+            if p1_idx < p2_idx:
+                expected = calculate_interest_score(attendees_data[p1_idx], attendees_data[p2_idx])
+                assert score_matrix[p1_idx, p2_idx] == expected
+            else:
+                assert score_matrix[p1_idx, p2_idx] == 0
+
+
+def test_average_ratings_received_in_one_query(event_setup, django_assert_num_queries):
+    """
+    GIVEN feedback given by either attendee of several meetings
+    WHEN the average ratings received are calculated for a list or a queryset of users
+    THEN each user gets the average of the ratings their partners gave them, unrated
+    users get 3.0, and the averages come from one query on the rating stats.
+    """
+    alice, bob, carol, dana = event_setup['users']
+    slot, room = event_setup['slots'][0], event_setup['rooms'][0]
+    first = Meeting.objects.create(attendee1=alice, attendee2=bob, time_slot=slot, room=room)
+    second = Meeting.objects.create(attendee1=carol, attendee2=alice, time_slot=event_setup['slots'][1], room=room)
+    MeetingFeedback.objects.create(meeting=first, reviewer=alice, rating=4)  # bob received 4
+    MeetingFeedback.objects.create(meeting=first, reviewer=bob, rating=5)  # alice received 5
+    MeetingFeedback.objects.create(meeting=second, reviewer=carol, rating=2)  # alice received 2
+
+    expected = {alice.id: 3.5, bob.id: 4.0, carol.id: 3.0}
+    with django_assert_num_queries(1):
+        assert calculate_average_ratings_for_users([alice.id, bob.id, carol.id]) == expected
+    queryset = User.objects.exclude(id=dana.id).values_list('id', flat=True)
+    assert calculate_average_ratings_for_users(queryset) == expected
+
+
+def test_notify_many_skips_snoozed_users_in_bulk(event_setup, django_assert_num_queries):
+    """
+    GIVEN users with expired, active and no notification snoozes
+    WHEN they are all notified at once, given as users or ids
+    THEN everyone but the snoozed user gets the (templated) message, using one
+    query to read the snoozes and one to insert.
+    """
+    alice, bob, carol, dana = event_setup['users']
+    now = timezone.now()
+    Profile.objects.filter(user=bob).update(notifications_snoozed_until=now + timezone.timedelta(hours=1))
+    Profile.objects.filter(user=carol).update(notifications_snoozed_until=now - timezone.timedelta(hours=1))
+
+    with django_assert_num_queries(2):
+        counts = notify_many(
+            [alice, bob.id, carol, dana.id, alice.id], Notification.EventType.SCHEDULE_UPDATED,
+            Template("Hi $username, your schedule changed."),
+        )
+
+    assert counts == {'sent': 3, 'suppressed': 1}
+    assert sorted(Notification.objects.values_list('message', flat=True)) == [
+        f"Hi {user.username}, your schedule changed." for user in (alice, carol, dana)
+    ]
+    assert notify_many([], Notification.EventType.SCHEDULE_UPDATED, "Nothing") == {'sent': 0, 'suppressed': 0}
+
+
+def test_load_schedule_data_builds_flat_arrays(event_setup):
+    """
+    GIVEN an event with a block, a user without availability and a persisted meeting
+    WHEN the scheduler loads it
+    THEN people, interests, availability, blocks and the schedule come back as solver-indexed arrays.
+    """
+    alice, bob, carol, dana = event_setup['users']
+    slots, rooms = event_setup['slots'], event_setup['rooms']
+    carol.profile.interests.add(Skill.objects.create(name='Django'))
+    dana.profile.blocked_users.add(alice.profile)
+    User.objects.create_user(username='erin', password='password123')
+    Meeting.objects.create(attendee1=carol, attendee2=bob, time_slot=slots[1], room=rooms[0])
+
+    data = load_schedule_data()
+
+    assert data.person_ids.tolist() == [alice.id, bob.id, carol.id, dana.id]
+    assert data.interest_indptr.tolist() == [0, 1, 2, 4, 5]
+    assert data.availability_lists() == [[0, 1], [0, 1], [0, 1], [1]]
+    assert data.blocked_pairs.tolist() == [[0, 3]]
+    assert data.ratings.tolist() == [3.0] * 4
+    assert data.previous_meetings == {(1, 2, 1): 0}
+
+
+def test_top_k_pruning_keeps_best_partners_and_mentor_pairs(event_setup):
+    """
+    GIVEN alice and bob sharing an extra interest, and carol mentoring dana
+    WHEN candidates are pruned to each attendee's single best partner
+    THEN only alice-bob and the mentor-mentee pair remain, scored as in the full model.
+    """
+    alice, bob, carol, dana = event_setup['users']
+    django_skill = Skill.objects.create(name='Django')
+    alice.profile.interests.add(django_skill)
+    bob.profile.interests.add(django_skill)
+    Profile.objects.filter(user=carol).update(role=Profile.Role.MENTOR)
+    Profile.objects.filter(user=dana).update(role=Profile.Role.MENTEE)
+    data = load_schedule_data()
+
+    candidates, scores = find_top_k_candidates(data, 1)
+
+    full_problem = build_scheduling_problem(data)
+    full_candidates = {candidate[:2]: candidate for candidate in full_problem.candidates}
+    assert [candidate[:2] for candidate in candidates] == [(0, 1), (2, 3)]
+    for candidate in candidates:
+        assert candidate == full_candidates[candidate[:2]]
+        assert scores[candidate[:2]] == full_problem.scores[candidate[:2]]
+
+    assert solve_meeting_schedule(top_k=1, max_time_in_seconds=10)
+    with pytest.raises(ValueError):
+        find_top_k_candidates(data, 0)
+
+
+def test_solve_meeting_schedule_reports_stats_and_profiles(event_setup, tmp_path):
+    """
+    GIVEN a small event
+    WHEN it is solved with a stats object and a profile path
+    THEN every phase is timed, the sizes and solver outcome are recorded and the dumps are written.
+    """
+    stats = ScheduleStats()
+
+    result = solve_meeting_schedule(stats=stats, profile_path=str(tmp_path / 'run'), max_time_in_seconds=10)
+
+    assert list(stats.phases) == ['load', 'candidates', 'solve', 'extract']
+    assert all(timing['wall'] >= 0 and timing['cpu'] >= 0 for timing in stats.phases.values())
+    assert (stats.num_people, stats.num_slots, stats.num_rooms, stats.num_candidates) == (4, 2, 2, 6)
+    assert stats.num_variables > 0 and stats.num_constraints > 0
+    assert stats.status == 'OPTIMAL' and stats.objective == stats.best_bound
+    assert stats.num_conflicts is not None and stats.num_branches is not None
+    assert stats.num_meetings == len(result)
+    assert stats.traced_peak_bytes > 0
+    assert (tmp_path / 'run.prof').exists() and (tmp_path / 'run.tracemalloc').exists()
+
+
+def test_repair_schedule_fills_freed_cell_only(event_setup):
+    """
+    GIVEN a schedule in which alice cancels her meeting with bob in the second slot
+    WHEN the freed cell is repaired with alice excluded
+    THEN two of the remaining free attendees meet there and no other meeting changes.
+    """
+    alice, bob, carol, dana = event_setup['users']
+    slots, rooms = event_setup['slots'], event_setup['rooms']
+    kept = Meeting.objects.create(attendee1=alice, attendee2=carol, time_slot=slots[0], room=rooms[1])
+    Meeting.objects.filter(attendee1=alice, attendee2=bob).delete()
+
+    new_meetings = repair_schedule([(slots[1], rooms[0])], exclude_user_ids=[alice])
+
+    assert len(new_meetings) == 1
+    meeting = Meeting.objects.get(time_slot=slots[1], room=rooms[0])
+    assert {meeting.attendee1, meeting.attendee2} < {bob, carol, dana}
+    assert list(Meeting.objects.exclude(pk=meeting.pk)) == [kept]
+    assert Notification.objects.filter(
+        user__in=[meeting.attendee1, meeting.attendee2], event_type=Notification.EventType.SCHEDULE_UPDATED
+    ).count() == 2
+
+    # The cell is now taken, so a second repair has nothing to fill.
+    assert repair_schedule([(slots[1], rooms[1])], exclude_user_ids=[alice]) == []
+
+
+@pytest.mark.parametrize('two_stage', [False, True])
+def test_keep_stable_preserves_persisted_meetings(event_setup, two_stage):
+    """
+    GIVEN a persisted schedule that is one of several equally good solutions
+    WHEN the schedule is re-solved with keep_stable=True
+    THEN the persisted meetings are kept in the same slot and room.
+    """
+    alice, bob, carol, dana = event_setup['users']
+    slots, rooms = event_setup['slots'], event_setup['rooms']
+    Meeting.objects.create(attendee1=carol, attendee2=alice, time_slot=slots[0], room=rooms[1])
+    Meeting.objects.create(attendee1=bob, attendee2=dana, time_slot=slots[1], room=rooms[1])
+
+    meetings = solve_meeting_schedule(two_stage=two_stage, keep_stable=True)
+
+    scheduled = {(frozenset((m['attendee1'], m['attendee2'])), m['time_slot'], m['room']) for m in meetings}
+    assert (frozenset((alice, carol)), slots[0], rooms[1]) in scheduled
+    assert (frozenset((bob, dana)), slots[1], rooms[1]) in scheduled
+
+
+def test_find_components_and_divide_slot_capacity():
+    """
+    GIVEN two groups of people who can only meet within their group
+    WHEN the candidates are decomposed
+    THEN each group is its own component and the single room is shared out per slot.
+    """
+    candidates = [(0, 1, 20, [0, 1]), (1, 2, 10, [0]), (3, 4, 30, [0])]
+
+    components = find_components(candidates)
+
+    assert components == [[(0, 1, 20, [0, 1]), (1, 2, 10, [0])], [(3, 4, 30, [0])]]
+    assert divide_slot_capacity(components, num_rooms=1) == [{0: 1, 1: 1}, {0: 0}]
+    assert divide_slot_capacity(components, num_rooms=2) == [{0: 1, 1: 1}, {0: 1}]
+
+
+def test_solve_decomposed_in_process_pool():
+    """
+    GIVEN independent components
+    WHEN they are solved in a process pool
+    THEN the merged selection fits the rooms and a report is returned per component.
+    """
+    candidates = [(0, 1, 20, [0, 1]), (1, 2, 10, [0]), (3, 4, 30, [0]), (5, 6, 15, [1])]
+
+    selected, report = solve_decomposed(candidates, num_rooms=2, max_workers=2)
+
+    assert sorted(selected) == [(0, 1, 0), (0, 1, 1), (3, 4, 0), (5, 6, 1)]
+    assert [component['num_pairs'] for component in report] == [2, 1, 1]
+    assert all(component['status'] == 'OPTIMAL' for component in report)
+    assert assign_rooms(selected, num_rooms=2) == [(0, 1, 0, 0), (3, 4, 0, 1), (0, 1, 1, 0), (5, 6, 1, 1)]
+
+
+def test_solve_decomposed_gives_every_component_time():
+    """
+    GIVEN independent components and a time limit used up before any is solved
+    WHEN they are solved one after the other
+    THEN each still gets its minimum share and is solved, rather than dropped.
+    """
+    candidates = [(0, 1, 20, [0, 1]), (1, 2, 10, [0]), (3, 4, 30, [0]), (5, 6, 15, [1])]
+
+    selected, report = solve_decomposed(
+        candidates, num_rooms=2, max_workers=1, solver_options=SolverOptions(max_time_in_seconds=1e-9)
+    )
+
+    assert sorted(selected) == [(0, 1, 0), (0, 1, 1), (3, 4, 0), (5, 6, 1)]
+    assert [component['status'] for component in report] == ['OPTIMAL'] * 3
+
+
+def test_solve_component_falls_back_to_greedy_matching():
+    """
+    GIVEN a component whose deadline has already passed
+    WHEN it is solved
+    THEN CP-SAT finds nothing, and the greedy schedule is returned and flagged instead.
+    """
+    candidates = [(0, 1, 20, [0, 1]), (1, 2, 10, [0]), (0, 2, 30, [1])]
+
+    result = solve_component(candidates, num_rooms=1, deadline=time.time() - 1)
+
+    assert result['fallback'] and result['status'] != 'OPTIMAL'
+    assert sorted(result['selected']) == [(0, 1, 0), (0, 2, 1)]
+    assert result['objective'] == 50
+
+
+def test_decomposed_solve_matches_monolithic_solve(event_setup):
+    """
+    GIVEN a small event
+    WHEN the schedule is solved with decomposition
+    THEN it reaches the same total score as the monolithic model.
+    """
+    full = solve_meeting_schedule()
+    decomposed = solve_meeting_schedule(decompose=True, max_workers=1)
+
+    assert sum(m['score'] for m in decomposed) == pytest.approx(sum(m['score'] for m in full))
+
+
+def test_matching_engine_fills_each_slot_greedily():
+    """
+    GIVEN candidates competing for one room per slot
+    WHEN the matching engine schedules them
+    THEN each slot gets its best non-conflicting pair and no one is double-booked.
+    """
+    candidates = [(0, 1, 20, [0, 1]), (1, 2, 30, [0]), (0, 2, 10, [1]), (3, 4, 25, [1])]
+    problem = SchedulingProblem(candidates=candidates, num_rooms=1)
+
+    assert MatchingEngine().schedule(problem) == [(1, 2, 0, 0), (3, 4, 1, 0)]
+
+    problem.num_rooms = 2
+    assert MatchingEngine().schedule(problem) == [(1, 2, 0, 0), (0, 1, 1, 0), (3, 4, 1, 1)]
+
+
+def test_auto_engine_counts_room_variables_of_the_full_model():
+    """
+    GIVEN a problem with 3 pair x slot decisions and 2 rooms, and a limit of 4 CP-SAT variables
+    WHEN the auto engine schedules it
+    THEN it skips the 6-variable pair x slot x room model but runs the two-stage one.
+    """
+    problem = SchedulingProblem(candidates=[(0, 1, 20, [0, 1]), (2, 3, 10, [0])], num_rooms=2)
+
+    full = get_engine('auto', max_cpsat_variables=4)
+    full.schedule(problem)
+    assert full.last_stats['status'] == 'FEASIBLE'  # The heuristic's
+
+    two_stage = get_engine('auto', max_cpsat_variables=4, two_stage=True)
+    two_stage.schedule(problem)
+    assert two_stage.last_stats['status'] == 'OPTIMAL'
+
+@pytest.mark.parametrize('engine', ['matching', 'auto'])
+def test_solve_meeting_schedule_with_other_engines(event_setup, engine):
+    """
+    GIVEN a small event
+    WHEN the schedule is solved with the matching or auto engine
+    THEN a valid schedule is returned, and auto is as good as CP-SAT alone.
+    """
+    meetings = solve_meeting_schedule(engine=engine)
+
+    assert meetings
+    person_slots = [(p, m['time_slot']) for m in meetings for p in (m['attendee1'], m['attendee2'])]
+    assert len(person_slots) == len(set(person_slots))
+    if engine == 'auto':
+        exact = solve_meeting_schedule(engine='cpsat')
+        assert sum(m['score'] for m in meetings) == pytest.approx(sum(m['score'] for m in exact))
+
+
+@pytest.mark.parametrize('options', [{}, {'two_stage': True}, {'decompose': True, 'max_workers': 1},
+                                     {'engine': 'matching'}])
+def test_overlapping_slots_never_double_book(event_setup, options):
+    """
+    GIVEN an hour-long slot overlapping both regular slots, which everyone is free in
+    WHEN the schedule is solved
+    THEN no one has two meetings in overlapping slots.
+    """
+    first, second = event_setup['slots']
+    block = TimeSlot.objects.create(
+        start_time=first.start_time + timezone.timedelta(minutes=30),
+        end_time=second.start_time + timezone.timedelta(minutes=30),
+    )
+    for user in event_setup['users']:
+        UserAvailability.objects.create(user=user, time_slot=block)
+
+    meetings = solve_meeting_schedule(**options)
+
+    assert meetings
+    slot_ids = {meeting['time_slot'].id for meeting in meetings}
+    assert block.id not in slot_ids or not slot_ids & {first.id, second.id}
+    for user in event_setup['users']:
+        user_slots = [m['time_slot'].id for m in meetings if user in (m['attendee1'], m['attendee2'])]
+        assert len(user_slots) <= 1 or block.id not in user_slots
+
+
+@pytest.mark.parametrize('options', [{}, {'two_stage': True}, {'decompose': True, 'max_workers': 1},
+                                     {'engine': 'matching'}, {'engine': 'auto'}, {'engine': 'tiered'}])
+def test_overlapping_slots_never_share_a_room(event_setup, options):
+    """
+    GIVEN a single room and a short slot inside the first slot, which everyone is free in
+    WHEN the schedule is solved
+    THEN the room never hosts two meetings at once, but both regular slots are still used.
+    """
+    first, second = event_setup['slots']
+    event_setup['rooms'][1].delete()
+    inner = TimeSlot.objects.create(
+        start_time=first.start_time + timezone.timedelta(minutes=30),
+        end_time=first.start_time + timezone.timedelta(minutes=45),
+    )
+    for user in event_setup['users']:
+        UserAvailability.objects.create(user=user, time_slot=inner)
+
+    meetings = solve_meeting_schedule(**options)
+
+    slot_ids = sorted(meeting['time_slot'].id for meeting in meetings)
+    assert slot_ids in ([first.id, second.id], [second.id, inner.id])
+
+
+def test_tiered_engine_schedules_mentor_pairs_first(event_setup):
+    """
+    GIVEN an event with one mentor and two mentees
+    WHEN the schedule is solved with the tiered engine
+    THEN the mentor-mentee tier scores at least as well as in the single model,
+    the rest of the capacity is filled and per-tier statistics are reported.
+    """
+    alice, bob, carol, dana = event_setup['users']
+    for user, role in [(alice, Profile.Role.MENTOR), (bob, Profile.Role.MENTEE), (dana, Profile.Role.MENTEE)]:
+        user.profile.role = role
+        user.profile.save()
+    mentor_pairs = {frozenset((alice, bob)), frozenset((alice, dana))}
+
+    def mentor_score(meetings):
+        return sum(m['score'] for m in meetings if frozenset((m['attendee1'], m['attendee2'])) in mentor_pairs)
+
+    stats = ScheduleStats()
+    tiered = solve_meeting_schedule(engine='tiered', stats=stats)
+    single = solve_meeting_schedule(engine='cpsat')
+
+    assert mentor_score(tiered) >= mentor_score(single) > 0
+    assert len(tiered) == len(single)
+    person_slots = [(p, m['time_slot']) for m in tiered for p in (m['attendee1'], m['attendee2'])]
+    assert len(person_slots) == len(set(person_slots))
+    assert [tier['tier'] for tier in stats.tiers] == ['priority', 'general']
+    assert stats.tiers[0]['num_pairs'] == 2 and stats.tiers[0]['num_meetings'] == 2
+    assert stats.engine == 'tiered' and stats.status == 'OPTIMAL'
+
+
+def test_get_engine_rejects_unknown_names():
+    """
+    GIVEN an unknown engine name
+    WHEN an engine is requested
+    THEN a ValueError is raised.
+    """
+    with pytest.raises(ValueError):
+        get_engine('simulated-annealing')
+
+
+@pytest.mark.parametrize('engine', ['cpsat', 'auto'])
+def test_solution_callback_streams_improving_schedules(event_setup, engine):
+    """
+    GIVEN solver controls and a solution sink
+    WHEN the schedule is solved
+    THEN every reported schedule has progress details and the last one is the result.
+    """
+    progress = []
+
+    meetings = solve_meeting_schedule(
+        engine=engine, max_time_in_seconds=10, num_search_workers=1, relative_gap_limit=0.0, random_seed=7,
+        on_solution=progress.append,
+    )
+
+    assert progress
+    assert all(set(p) == {'meetings', 'objective', 'best_bound', 'elapsed'} for p in progress)
+    assert progress[-1]['meetings'] == meetings
+
+
+def test_solution_callback_can_stop_the_search(event_setup):
+    """
+    GIVEN a sink that is satisfied with the first schedule
+    WHEN the schedule is solved
+    THEN the search stops and that schedule is returned.
+    """
+    progress = []
+
+    def stop_after_first(solution):
+        progress.append(solution)
+        return True
+
+    meetings = solve_meeting_schedule(num_search_workers=1, on_solution=stop_after_first)
+
+    assert len(progress) == 1
+    assert meetings == progress[0]['meetings']
+
+
+def test_persist_schedule_diffs_against_existing_meetings(event_setup):
+    """
+    GIVEN a persisted schedule
+    WHEN a new schedule that keeps, moves, adds and drops meetings is persisted
+    THEN the rows are diffed by attendee pair, a row never changes attendees and
+    only affected attendees are notified.
+    """
+    alice, bob, carol, dana = event_setup['users']
+    slots, rooms = event_setup['slots'], event_setup['rooms']
+    kept = Meeting.objects.create(attendee1=alice, attendee2=bob, time_slot=slots[0], room=rooms[0], score=4.0)
+    dropped = Meeting.objects.create(attendee1=alice, attendee2=carol, time_slot=slots[1], room=rooms[0], score=4.0)
+    moved = Meeting.objects.create(attendee1=bob, attendee2=carol, time_slot=slots[0], room=rooms[1], score=4.0)
+    MeetingRescheduleProposal.objects.create(meeting=dropped, proposer=alice, proposed_time_slot=slots[0])
+
+    summary = persist_schedule([
+        {'attendee1': bob.id, 'attendee2': alice.id, 'time_slot': slots[0].id, 'room': rooms[0].id, 'score': 4.0},
+        {'attendee1': alice, 'attendee2': dana, 'time_slot': slots[1], 'room': rooms[0], 'score': 4.0},
+        {'attendee1': bob.id, 'attendee2': carol.id, 'time_slot': slots[1].id, 'room': rooms[1].id, 'score': 4.0},
+    ])
+
+    assert summary == {
+        'created': 1, 'updated': 1, 'deleted': 1, 'unchanged': 1, 'kept': 0, 'conflicts': 0, 'changed_attendees': 4,
+    }
+    assert Meeting.objects.count() == 3
+    assert Meeting.objects.filter(pk=kept.pk, attendee1=alice, attendee2=bob).exists()
+    assert not Meeting.objects.filter(pk=dropped.pk).exists()
+    assert Meeting.objects.filter(attendee1=alice, attendee2=dana, time_slot=slots[1], room=rooms[0]).exists()
+    assert Meeting.objects.filter(pk=moved.pk, time_slot=slots[1], room=rooms[1]).exists()
+    # The dropped meeting's proposals went with it.
+    assert not MeetingRescheduleProposal.objects.exists()
+    assert Notification.objects.filter(event_type=Notification.EventType.SCHEDULE_UPDATED).count() == 4
+
+
+def test_persist_schedule_swaps_meetings_between_cells(event_setup):
+    """
+    GIVEN two meetings, one with a reschedule proposal
+    WHEN a schedule that swaps their cells is persisted
+    THEN both rows move, keeping their attendees and proposals.
+    """
+    alice, bob, carol, dana = event_setup['users']
+    slots, rooms = event_setup['slots'], event_setup['rooms']
+    first = Meeting.objects.create(attendee1=alice, attendee2=bob, time_slot=slots[0], room=rooms[0], score=4.0)
+    second = Meeting.objects.create(attendee1=carol, attendee2=dana, time_slot=slots[1], room=rooms[1], score=4.0)
+    proposal = MeetingRescheduleProposal.objects.create(meeting=first, proposer=alice, proposed_time_slot=slots[1])
+
+    summary = persist_schedule([
+        {'attendee1': alice.id, 'attendee2': bob.id, 'time_slot': slots[1].id, 'room': rooms[1].id, 'score': 4.0},
+        {'attendee1': carol.id, 'attendee2': dana.id, 'time_slot': slots[0].id, 'room': rooms[0].id, 'score': 4.0},
+    ])
+
+    assert summary['updated'] == 2 and summary['created'] == summary['deleted'] == 0
+    assert Meeting.objects.filter(pk=first.pk, time_slot=slots[1], room=rooms[1]).exists()
+    assert Meeting.objects.filter(pk=second.pk, time_slot=slots[0], room=rooms[0]).exists()
+    proposal.refresh_from_db()
+    assert proposal.meeting_id == first.pk
+
+
+def test_persist_schedule_keeps_meetings_that_took_place(event_setup):
+    """
+    GIVEN a meeting with feedback and a meeting in a slot that has ended
+    WHEN a schedule that drops both and wants one of their cells is persisted
+    THEN both meetings and the feedback are kept, and the clashing meeting is
+    skipped and reported as a conflict.
+    """
+    alice, bob, carol, dana = event_setup['users']
+    slots, rooms = event_setup['slots'], event_setup['rooms']
+    now = timezone.now()
+    past = TimeSlot.objects.create(start_time=now - timezone.timedelta(hours=2), end_time=now - timezone.timedelta(hours=1))
+    rated = Meeting.objects.create(attendee1=alice, attendee2=bob, time_slot=slots[0], room=rooms[0], score=4.0)
+    held = Meeting.objects.create(attendee1=carol, attendee2=dana, time_slot=past, room=rooms[0], score=4.0)
+    MeetingFeedback.objects.create(meeting=rated, reviewer=alice, rating=5)
+
+    summary = persist_schedule([
+        {'attendee1': carol.id, 'attendee2': dana.id, 'time_slot': slots[1].id, 'room': rooms[0].id, 'score': 4.0},
+        {'attendee1': alice.id, 'attendee2': carol.id, 'time_slot': slots[0].id, 'room': rooms[0].id, 'score': 4.0},
+    ])
+
+    assert summary['kept'] == 2 and summary['conflicts'] == 2
+    assert summary['created'] == summary['updated'] == summary['deleted'] == 0
+    assert Meeting.objects.filter(pk=rated.pk, time_slot=slots[0], room=rooms[0]).exists()
+    assert Meeting.objects.filter(pk=held.pk, time_slot=past).exists()
+    assert Meeting.objects.count() == 2
+    assert UserRatingStats.objects.get(user=bob).count == 1
+
+
+def test_persist_schedule_is_idempotent(event_setup):
+    """
+    GIVEN a solved schedule that has already been persisted
+    WHEN it is persisted again
+    THEN nothing changes and no one is notified.
+    """
+    result = solve_meeting_schedule()
+    persist_schedule(result)
+    Notification.objects.all().delete()
+
+    summary = persist_schedule(result)
+
+    assert summary['unchanged'] == len(result)
+    assert summary['changed_attendees'] == 0
+    assert not Notification.objects.exists()
@@ -1,8 +1,10 @@
 from django.urls import path
-from .views import MeetingListView, MeetingICSView
+from .views import MeetingCancelView, MeetingICSView, MeetingListView, RescheduleProposalAcceptView
 
 urlpatterns = [
     # This path is relative to /api/meetings/ as defined in the main urls.py
     path('', MeetingListView.as_view(), name='meeting-list'),
     path('<int:pk>/ical/', MeetingICSView.as_view(), name='meeting-ical'),
+    path('<int:pk>/cancel/', MeetingCancelView.as_view(), name='meeting-cancel'),
+    path('proposals/<int:pk>/accept/', RescheduleProposalAcceptView.as_view(), name='reschedule-proposal-accept'),
 ]
\ No newline at end of file
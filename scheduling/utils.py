@@ -1,7 +1,11 @@
-import collections
-from django.db.models import Q
+from string import Template
+from django.contrib.auth import get_user_model
+from django.db.models import Case, Count, F, Q, QuerySet, Sum, When
 from django.utils import timezone
-from .models import Meeting, MeetingFeedback, Notification
+from .models import Meeting, MeetingFeedback, Notification, TimeSlot, UserAvailability, UserRatingStats
+from .scheduler_model import SlotOverlapIndex, mask_to_slots
+
+User = get_user_model()
 
 def create_notification_if_not_snoozed(user, event_type, message):
     """
@@ -12,33 +16,112 @@ def create_notification_if_not_snoozed(user, event_type, message):
     if not snooze_until or timezone.now() > snooze_until:
         Notification.objects.create(user=user, event_type=event_type, message=message)
 
+def notify_many(users_or_ids, event_type, message_or_template, batch_size=1000):
+    """
+    Creates the same kind of notification for many users at once, skipping users
+    whose notifications are currently snoozed, exactly as
+    `create_notification_if_not_snoozed` does for one user.
+
+    `users_or_ids` is an iterable of users or user ids. `message_or_template` is
+    either the message itself or a string.Template, which is filled in with each
+    recipient's `$username`. Snooze states (and usernames) are read in one query and
+    the notifications are inserted with bulk_create, `batch_size` rows per query.
+    Returns a dict with the number of notifications 'sent' and 'suppressed'.
+    """
+    user_ids = {getattr(user, 'pk', user) for user in users_or_ids}
+    now = timezone.now()
+    notifications, suppressed = [], 0
+    for user_id, username, snooze_until in User.objects.filter(id__in=user_ids).values_list(
+        'id', 'username', 'profile__notifications_snoozed_until'
+    ).order_by('id'):
+        if snooze_until and now <= snooze_until:
+            suppressed += 1
+            continue
+        message = message_or_template
+        if isinstance(message, Template):
+            message = message.safe_substitute(username=username)
+        notifications.append(Notification(user_id=user_id, event_type=event_type, message=message))
+    Notification.objects.bulk_create(notifications, batch_size=batch_size)
+    return {'sent': len(notifications), 'suppressed': suppressed}
+
+def load_availability_masks(user_ids, slot_ids):
+    """
+    Returns a dictionary mapping each user_id to an availability bitmask, with bit i
+    set if the user is available in slot_ids[i]. Users with no availability map to 0.
+    """
+    slot_index = {slot_id: i for i, slot_id in enumerate(slot_ids)}
+    masks = {user_id: 0 for user_id in user_ids}
+    for user_id, slot_id in UserAvailability.objects.filter(user_id__in=user_ids).values_list('user_id', 'time_slot_id'):
+        if slot_id in slot_index:
+            masks[user_id] |= 1 << slot_index[slot_id]
+    return masks
+
+def load_slot_overlaps():
+    """
+    Returns a SlotOverlapIndex over all time slots, keyed by TimeSlot id.
+    """
+    return SlotOverlapIndex(TimeSlot.objects.values_list('id', 'start_time', 'end_time'))
+
+def common_free_slots(user1, user2):
+    """
+    Returns the time slots, in start time order, in which both users are available
+    and neither has a meeting in that slot or in one overlapping it.
+    """
+    slot_ids = list(TimeSlot.objects.order_by('start_time', 'id').values_list('id', flat=True))
+    masks = load_availability_masks([user1.id, user2.id], slot_ids)
+    common_ids = [slot_ids[i] for i in mask_to_slots(masks[user1.id] & masks[user2.id])]
+
+    meeting_slot_ids = Meeting.objects.filter(
+        Q(attendee1_id__in=[user1.id, user2.id]) | Q(attendee2_id__in=[user1.id, user2.id])
+    ).values_list('time_slot_id', flat=True)
+    slot_overlaps = load_slot_overlaps()
+    busy = set().union(*(slot_overlaps.overlapping(slot_id) for slot_id in meeting_slot_ids))
+    common_ids = [slot_id for slot_id in common_ids if slot_id not in busy]
+    return list(TimeSlot.objects.filter(id__in=common_ids).order_by('start_time', 'id'))
+
 def calculate_average_ratings_for_users(user_ids):
     """
     Efficiently calculates the average rating RECEIVED by a list of users.
-    Returns a dictionary mapping user_id to its average rating.
-    """
-    # Get all meetings involving any of the relevant users
-    meetings_qs = Meeting.objects.filter(
-        Q(attendee1_id__in=user_ids) | Q(attendee2_id__in=user_ids)
-    ).values('id', 'attendee1_id', 'attendee2_id')
-
-    # Get all feedback for those meetings
-    feedback_qs = MeetingFeedback.objects.filter(
-        meeting_id__in=[m['id'] for m in meetings_qs]
-    ).values('reviewer_id', 'rating', 'meeting__attendee1_id', 'meeting__attendee2_id')
-
-    # Process the feedback in Python to calculate average received ratings
-    raw_ratings = collections.defaultdict(list)
-    for fb in feedback_qs:
-        # Determine who was reviewed (the person in the meeting who was not the reviewer)
-        reviewed_user_id = fb['meeting__attendee2_id'] if fb['reviewer_id'] == fb['meeting__attendee1_id'] else fb['meeting__attendee1_id']
-        if reviewed_user_id in user_ids:
-            raw_ratings[reviewed_user_id].append(fb['rating'])
-
-    # Calculate the final average, starting with a default of 3.0 for all users
+    Returns a dictionary mapping user_id to its average rating, or 3.0 for users
+    who haven't been rated yet.
+
+    `user_ids` may be a list or a queryset of ids (e.g. `values_list('id', flat=True)`),
+    which is used as a subquery. The averages are read from UserRatingStats, one row
+    per user, rather than from the feedback itself. Either way it takes one query:
+    a queryset is joined to the stats instead of being evaluated for the defaults.
+    """
+    if isinstance(user_ids, QuerySet):
+        return {
+            user_id: rating_sum / count if count else 3.0
+            for user_id, count, rating_sum in User.objects.filter(id__in=user_ids).values_list(
+                'id', 'rating_stats__count', 'rating_stats__rating_sum'
+            )
+        }
     avg_ratings = {user_id: 3.0 for user_id in user_ids}
-    for user_id, ratings in raw_ratings.items():
-        if ratings:
-            avg_ratings[user_id] = sum(ratings) / len(ratings)
-            
-    return avg_ratings
\ No newline at end of file
+    for user_id, count, rating_sum in UserRatingStats.objects.filter(
+        user_id__in=user_ids, count__gt=0
+    ).values_list('user_id', 'count', 'rating_sum'):
+        avg_ratings[user_id] = rating_sum / count
+    return avg_ratings
+
+def compute_rating_stats():
+    """
+    Aggregates all MeetingFeedback into unsaved UserRatingStats, one per rated user,
+    in a single grouped query. The reviewed user of each feedback (the attendee who
+    is not the reviewer) is worked out by the database.
+    """
+    reviewed_user = Case(
+        When(reviewer_id=F('meeting__attendee1_id'), then=F('meeting__attendee2_id')),
+        default=F('meeting__attendee1_id'),
+    )
+    histogram = {f'stars_{stars}': Count('id', filter=Q(rating=stars)) for stars in range(1, 6)}
+    rows = (
+        MeetingFeedback.objects.annotate(reviewed_user_id=reviewed_user)
+        .values('reviewed_user_id')
+        .annotate(count=Count('id'), rating_sum=Sum('rating'), **histogram)
+        .order_by('reviewed_user_id')
+    )
+    return [
+        UserRatingStats(user_id=row.pop('reviewed_user_id'), **row)
+        for row in rows
+    ]
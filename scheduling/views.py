@@ -1,17 +1,49 @@
-from rest_framework import generics, permissions
+import logging
+
+from rest_framework import generics, mixins, permissions, viewsets
+from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.http import JsonResponse, HttpResponse
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+from django.shortcuts import get_object_or_404
 from rest_framework.views import APIView
 from rest_framework import status
-from .models import Profile, Meeting
+from .conditional import ConditionalGetMixin
+from .models import Profile, Meeting, MeetingRescheduleProposal, Notification, Room, ScheduleJob
+from .pagination import MeetingCursorPagination, NotificationCursorPagination
 # Corrected import statement to only include serializers that exist and are used.
-from .serializers import ProfileSerializer, MeetingSerializer
+from .serializers import (MeetingSerializer, NotificationSerializer, ProfileSerializer, ScheduleJobSerializer,
+                          TimeSlotSerializer)
+from .utils import common_free_slots, create_notification_if_not_snoozed, load_slot_overlaps
 from ics import Calendar, Event
 
-class ProfileView(generics.RetrieveUpdateAPIView):
+User = get_user_model()
+logger = logging.getLogger(__name__)
+
+
+def _repair_on_commit(freed_cells, exclude_user_ids):
+    """
+    Offers freed (slot, room) cells to other attendees with `repair_schedule` once
+    the current transaction commits. The change that freed them has already been
+    made, so a failing repair is logged instead of failing the request.
+    """
+    def repair():
+        # Imported here so the API doesn't pull in the solver stack at import time.
+        from .intelligent_scheduler import repair_schedule
+        try:
+            repair_schedule(freed_cells, exclude_user_ids=exclude_user_ids)
+        except Exception:
+            logger.exception("Schedule repair of %s failed", freed_cells)
+
+    transaction.on_commit(repair)
+
+class ProfileView(ConditionalGetMixin, generics.RetrieveUpdateAPIView):
     """
     Provides a user's profile and allows them to update their interests.
+    Answers 304 Not Modified when the profile hasn't been saved since.
     """
     serializer_class = ProfileSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -20,17 +52,201 @@ class ProfileView(generics.RetrieveUpdateAPIView):
         # Return the profile of the currently authenticated user
         return self.request.user.profile
 
-class MeetingListView(generics.ListAPIView):
+    def get_validators(self):
+        profile = self.get_object()
+        return (profile.pk, profile.updated_at), profile.updated_at
+
+class MeetingListView(ConditionalGetMixin, generics.ListAPIView):
     """
     Provides a list of meetings where the currently authenticated user is a participant.
+    Paginated by cursor when the client passes ?cursor= or ?page_size=, and answers
+    304 Not Modified while none of the user's meetings or their slots changed.
     """
     serializer_class = MeetingSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = MeetingCursorPagination
 
     def get_queryset(self):
         user = self.request.user
-        # Correctly filter by attendee1/attendee2 and order by the meeting's start time
-        return Meeting.objects.filter(Q(attendee1=user) | Q(attendee2=user)).order_by('time_slot__start_time')
+        # Correctly filter by attendee1/attendee2 and order by the meeting's start time.
+        # The serializer reads both attendees and the time slot, so join them in.
+        return (
+            Meeting.objects.filter(Q(attendee1=user) | Q(attendee2=user))
+            .select_related('attendee1', 'attendee2', 'time_slot')
+            .order_by('time_slot__start_time', 'id')
+        )
+
+    def get_validators(self):
+        user = self.request.user
+        # The payload renders attendee usernames, and auth_user has no change
+        # timestamp, so the usernames go into the version next to the timestamps.
+        meetings = (
+            Meeting.objects.filter(Q(attendee1=user) | Q(attendee2=user))
+            .order_by('id')
+            .values_list('id', 'updated_at', 'time_slot__updated_at', 'attendee1__username', 'attendee2__username')
+        )
+        return tuple(meetings), None
+
+class NotificationViewSet(ConditionalGetMixin, mixins.ListModelMixin, viewsets.GenericViewSet):
+    """
+    Lists the current user's notifications, newest first and paginated by cursor,
+    and lets them mark one or all of them as read. The list answers 304 Not
+    Modified while none of the user's notifications changed.
+    """
+    serializer_class = NotificationSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = NotificationCursorPagination
+
+    def get_queryset(self):
+        return Notification.objects.filter(user=self.request.user)
+
+    def get_validators(self):
+        notifications = self.get_queryset().aggregate(count=Count('id'), updated_at=Max('updated_at'))
+        return tuple(notifications.values()), None
+
+    @action(detail=True, methods=['post'])
+    def mark_as_read(self, request, pk=None):
+        notification = self.get_object()
+        notification.is_read = True
+        notification.save(update_fields=['is_read', 'updated_at'])
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(detail=False, methods=['post'])
+    def mark_all_as_read(self, request):
+        self.get_queryset().filter(is_read=False).update(is_read=True, updated_at=timezone.now())
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+class MeetingCancelView(APIView):
+    """
+    Lets an attendee cancel one of their meetings. The other attendee is notified
+    and the freed slot is offered to other free attendees with `repair_schedule`.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, pk, format=None):
+        user = request.user
+        meeting = get_object_or_404(
+            Meeting.objects.filter(Q(attendee1=user) | Q(attendee2=user)).select_related(
+                'attendee1__profile', 'attendee2__profile'
+            ),
+            pk=pk,
+        )
+        other_attendee = meeting.attendee2 if meeting.attendee1_id == user.id else meeting.attendee1
+        freed_cell = (meeting.time_slot_id, meeting.room_id)
+        with transaction.atomic():
+            meeting.delete()
+            create_notification_if_not_snoozed(
+                other_attendee, Notification.EventType.MEETING_CANCELLED,
+                f"Your meeting with {user.username} has been cancelled.",
+            )
+            _repair_on_commit([freed_cell], [user.id])
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+class RescheduleProposalAcceptView(APIView):
+    """
+    Lets the receiver of a pending reschedule proposal accept it. The meeting moves
+    to the proposed slot (keeping its room if it is free there), the proposer is
+    notified and the cell it leaves behind is refilled with `repair_schedule`.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, pk, format=None):
+        user = request.user
+        proposal = get_object_or_404(
+            MeetingRescheduleProposal.objects.filter(
+                Q(meeting__attendee1=user) | Q(meeting__attendee2=user),
+                status=MeetingRescheduleProposal.Status.PENDING,
+            ).exclude(proposer=user).select_related('meeting', 'proposer__profile'),
+            pk=pk,
+        )
+        meeting = proposal.meeting
+        attendee_ids = [meeting.attendee1_id, meeting.attendee2_id]
+        conflicting_slots = load_slot_overlaps().overlapping(proposal.proposed_time_slot_id)
+        with transaction.atomic():
+            attendee_meetings = Meeting.objects.select_for_update().filter(
+                Q(attendee1_id__in=attendee_ids) | Q(attendee2_id__in=attendee_ids),
+                time_slot_id__in=conflicting_slots,
+            ).exclude(pk=meeting.pk)
+            if attendee_meetings.exists():
+                return Response(
+                    {'detail': "One of the attendees already has a meeting at the proposed time."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            other_meetings = Meeting.objects.select_for_update().filter(
+                time_slot_id=proposal.proposed_time_slot_id
+            ).exclude(pk=meeting.pk)
+            used_rooms = set(other_meetings.values_list('room_id', flat=True))
+            room_id = meeting.room_id
+            if room_id in used_rooms:
+                room_id = Room.objects.exclude(id__in=used_rooms).order_by('id').values_list('id', flat=True).first()
+            if room_id is None:
+                return Response(
+                    {'detail': "No room is free at the proposed time."}, status=status.HTTP_400_BAD_REQUEST
+                )
+
+            freed_cell = (meeting.time_slot_id, meeting.room_id)
+            meeting.time_slot_id, meeting.room_id = proposal.proposed_time_slot_id, room_id
+            meeting.save(update_fields=['time_slot', 'room', 'updated_at'])
+            proposal.status = MeetingRescheduleProposal.Status.ACCEPTED
+            proposal.save(update_fields=['status'])
+            create_notification_if_not_snoozed(
+                proposal.proposer, Notification.EventType.PROPOSAL_ACCEPTED,
+                f"{user.username} accepted your proposal to reschedule your meeting.",
+            )
+            _repair_on_commit([freed_cell], attendee_ids)
+        return Response({'status': 'Proposal accepted and meeting rescheduled.'})
+
+class ScheduleJobListCreateView(generics.ListCreateAPIView):
+    """
+    Lets organizers submit a background scheduling job and list past jobs.
+    A new job is refused while another one is still queued or running, unless
+    the running one's worker has stopped sending heartbeats.
+    """
+    serializer_class = ScheduleJobSerializer
+    permission_classes = [permissions.IsAdminUser]
+    queryset = ScheduleJob.objects.select_related('requested_by')
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        # Imported here so the API doesn't pull in the solver stack at import time.
+        from .jobs import fail_stale_jobs
+        fail_stale_jobs()
+        with transaction.atomic():
+            active_job = ScheduleJob.objects.select_for_update().filter(
+                status__in=[ScheduleJob.Status.QUEUED, ScheduleJob.Status.RUNNING]
+            ).first()
+            if active_job is not None:
+                return Response(
+                    {'detail': "A scheduling job is already queued or running.", 'job': active_job.pk},
+                    status=status.HTTP_409_CONFLICT,
+                )
+            serializer.save(requested_by=request.user)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+class ScheduleJobDetailView(generics.RetrieveAPIView):
+    """
+    Lets organizers poll a scheduling job's status and progress.
+    """
+    serializer_class = ScheduleJobSerializer
+    permission_classes = [permissions.IsAdminUser]
+    queryset = ScheduleJob.objects.select_related('requested_by')
+
+class CommonAvailabilityView(APIView):
+    """
+    Answers "when are we both free?": lists the time slots in which both the
+    authenticated user and the given user are available. Users who have blocked
+    each other, in either direction, are not found.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, user_id, format=None):
+        visible_users = User.objects.exclude(profile__blocked_users__user=request.user).exclude(
+            profile__blocked_by__user=request.user
+        )
+        other_user = get_object_or_404(visible_users, pk=user_id)
+        slots = common_free_slots(request.user, other_user)
+        return Response({'user': other_user.username, 'time_slots': TimeSlotSerializer(slots, many=True).data})
 
 def health_check(request):
     """